@@ -0,0 +1,479 @@
+"""
+Offline end-to-end benchmark of the FastAPI app.
+
+Requests are sent in-process through an ASGI transport, and every LLM call
+goes through the real client code path to a FakeLLMTransport that answers
+after a configurable latency with a deterministic extraction of the prompt.
+Result caches, the course catalog and the rule-based fast path are switched
+off so every request does the full amount of work.
+
+Run from the project root:
+    python -m backend.bench
+    python -m backend.bench --requests 200 --concurrency 20 --llm-latency 0.5
+    python -m backend.bench --replay requests.jsonl --save baseline.json
+    python -m backend.bench --compare baseline.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Optional
+from backend import llm, metrics
+from backend.fake_llm import FakeLLMTransport
+from backend.llm import httpx
+from backend.ratelimit import LLMGovernor
+import backend.main as app_main
+import backend.parser as parser
+import backend.pdf_extract as pdf_extract
+import backend.store as store
+import backend.ratelimit as ratelimit
+
+
+DELIVERABLES = ["Homework", "Quiz", "Project Milestone", "Lab", "Problem Set", "Essay"]
+
+BOILERPLATE = [
+    "Office hours are held Tuesdays and Thursdays in the department lounge.",
+    "Academic integrity: all submitted work must be your own.",
+    "Grading: homework 30%, projects 30%, exams 40%.",
+    "Late work loses ten percent per day unless an extension was arranged.",
+    "Students needing accommodations should contact the instructor early.",
+]
+
+# Relative change that counts as a regression when comparing runs
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "peak_mb")
+HIGHER_IS_BETTER = ("rps",)
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """Build a minimal PDF with one line of Helvetica text per list item"""
+    objects = []
+    page_ids = []
+    font_id = 3
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for lines in pages:
+        text = " T* ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj"
+            for line in lines
+        )
+        stream = f"BT /F1 11 Tf 14 TL 72 740 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects) + 2
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects) + 2)
+
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)),
+    ] + objects
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate_syllabus_pages(page_count: int, lines_per_page: int = 30, seed: int = 0) -> list[list[str]]:
+    """
+    Generate a synthetic syllabus: policy prose with dated deliverables mixed in.
+
+    Args:
+        page_count: Number of pages
+        lines_per_page: Lines on each page
+        seed: Random seed; different seeds give different text
+
+    Returns:
+        Lines of each page
+    """
+    rng = random.Random(seed)
+    start = date(2024, 9, 2)
+    pages = []
+    for p in range(page_count):
+        lines = [f"Week {p + 1}"] if p else [f"BENCH {100 + seed % 900} Syllabus (variant {seed})", "Course Schedule"]
+        while len(lines) < lines_per_page:
+            if rng.random() < 0.3:
+                due = start + timedelta(days=rng.randint(0, 105))
+                name = f"{rng.choice(DELIVERABLES)} {len(lines) + p * lines_per_page}"
+                lines.append(f"{name} - Due {due:%B} {due.day}, {due.year}")
+            else:
+                lines.append(rng.choice(BOILERPLATE))
+        pages.append(lines)
+    return pages
+
+
+def generate_syllabus(page_count: int = 1, lines_per_page: int = 30, seed: int = 0) -> str:
+    """
+    Generate synthetic syllabus text (see generate_syllabus_pages).
+    """
+    pages = generate_syllabus_pages(page_count, lines_per_page, seed)
+    return pdf_extract.PAGE_SEPARATOR.join("\n".join(lines) for lines in pages)
+
+
+PACK_SECTION = re.compile(r"^" + re.escape(parser.PACK_SECTION_HEADER).replace(r"\{number\}", r"\d+") + r"\n", re.MULTILINE)
+
+
+def rule_responder(system_prompt: str, user_prompt: str) -> str:
+    """
+    Deterministic fake LLM: answer with what the rule-based extractor finds.
+
+    Packed prompts (see parser.build_packed_prompt) get a JSON object with
+    one array per course, as PACKED_SYSTEM_PROMPT asks for.
+    """
+    sections = PACK_SECTION.split(user_prompt)
+    if len(sections) == 1:
+        assignments, _ = parser.extract_assignments_rule_based(user_prompt)
+        return json.dumps([a.to_json() for a in assignments])
+
+    packed = {}
+    for section in sections[1:]:
+        header, _, text = section.partition("\n")
+        course_code = header.removeprefix("Course: ").strip()
+        assignments, _ = parser.extract_assignments_rule_based(text, course_code)
+        packed[course_code] = [a.to_json() for a in assignments]
+    return json.dumps(packed)
+
+
+def load_replay(path: str) -> list[dict]:
+    """
+    Load /analyze request bodies from a JSON Lines file.
+
+    Each line is an object with "text" (or "body") and an optional
+    "course"; lines without text are skipped.
+
+    Args:
+        path: File path
+
+    Returns:
+        List of {"course": ..., "text": ...} request bodies
+    """
+    bodies = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get("text") or record.get("body")
+            if text:
+                bodies.append({"course": record.get("course") or f"REPLAY {number}", "text": text})
+    return bodies
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Observations
+        q: Percentile between 0 and 100
+
+    Returns:
+        Value at or above q percent of the observations (0.0 if empty)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class Scenario:
+    """
+    A named stream of requests sent to one endpoint.
+
+    Args:
+        name: Label used in reports
+        make_request: Function (index) -> keyword arguments for httpx
+            AsyncClient.post, including "url"
+    """
+
+    def __init__(self, name: str, make_request):
+        self.name = name
+        self.make_request = make_request
+
+
+def text_scenario(name: str, url: str, bodies: list[dict]) -> Scenario:
+    """
+    Post JSON bodies to a text endpoint, cycling through them.
+
+    The request index is appended to each syllabus so that repeated bodies
+    are not coalesced with each other.
+    """
+    def make_request(index: int) -> dict:
+        body = bodies[index % len(bodies)]
+        return {"url": url, "json": {"course": body["course"], "text": f"{body['text']}\n\n#{index}"}}
+
+    return Scenario(name, make_request)
+
+
+def pdf_scenario(page_count: int, lines_per_page: int) -> Scenario:
+    """
+    Upload a generated PDF with page_count pages to /analyze-pdf.
+    """
+    def make_request(index: int) -> dict:
+        pages = generate_syllabus_pages(page_count, lines_per_page, seed=index)
+        return {
+            "url": "/analyze-pdf",
+            "files": {"files": (f"bench{index}.pdf", make_pdf(pages), "application/pdf")},
+            "data": {"courses": f"BENCH {index}"},
+        }
+
+    return Scenario(f"pdf_{page_count}p", make_request)
+
+
+async def run_scenario(
+    client,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    trace_memory: bool = False,
+) -> dict:
+    """
+    Send a scenario's requests with bounded concurrency and summarize them.
+
+    Args:
+        client: httpx.AsyncClient bound to the app
+        scenario: Scenario to run
+        requests: Number of requests
+        concurrency: Requests in flight at once
+        trace_memory: Report peak memory allocated by Python during the run
+
+    Returns:
+        Summary with rps, p50_ms/p95_ms/p99_ms, errors, mean milliseconds per
+        processing stage and (with trace_memory) peak_mb
+    """
+    # Build payloads up front so generating them is not timed, and send one
+    # extra request first so one-time setup (clients, pools) is not either
+    payloads = [scenario.make_request(i) for i in range(requests)]
+    await client.post(**scenario.make_request(requests))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(payload: dict) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(**payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    stages_before = metrics.STAGE_SECONDS.totals()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    await asyncio.gather(*(send(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+
+    stages = {}
+    for (stage,), (count, total) in sorted(metrics.STAGE_SECONDS.totals().items()):
+        before_count, before_total = stages_before.get((stage,), (0, 0.0))
+        if count > before_count:
+            stages[stage] = (total - before_total) / (count - before_count) * 1000
+
+    summary = {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "stages": stages,
+    }
+    if trace_memory:
+        summary["peak_mb"] = (tracemalloc.get_traced_memory()[1] - memory_before) / 1e6
+    return summary
+
+
+def run_benchmark(
+    scenarios: list[Scenario],
+    requests: int = 50,
+    concurrency: int = 10,
+    llm_latency: float = 0.05,
+    trace_memory: bool = False,
+    rule_fast_path: bool = False,
+) -> dict:
+    """
+    Run scenarios one after another against the app with a fake LLM.
+
+    Global state that the benchmark replaces (LLM transport, governor,
+    caches, course catalog, fast path switch) is restored afterwards.
+
+    Args:
+        scenarios: Scenarios to run
+        requests: Requests per scenario
+        concurrency: Requests in flight at once
+        llm_latency: Seconds the fake LLM waits before answering
+        trace_memory: Report peak traced memory per scenario (slower)
+        rule_fast_path: Let the rule-based extractor answer without the LLM
+
+    Returns:
+        {"config": {...}, "scenarios": {name: summary}}
+    """
+    original_result_cache = parser.get_result_cache()
+    original_text_cache = pdf_extract.get_text_cache()
+    original_store = store.get_store()
+    original_fast_path = parser.RULE_FAST_PATH_ENABLED
+
+    llm.set_transport(FakeLLMTransport(rule_responder, latency=llm_latency), api_key="bench")
+    ratelimit.set_governor(LLMGovernor(requests_per_minute=0, tokens_per_minute=0))
+    parser.set_result_cache(None)
+    pdf_extract.set_text_cache(None)
+    store.set_store(None)
+    parser.RULE_FAST_PATH_ENABLED = rule_fast_path
+    if trace_memory:
+        tracemalloc.start()
+
+    async def run_all() -> dict:
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return {
+                scenario.name: await run_scenario(client, scenario, requests, concurrency, trace_memory)
+                for scenario in scenarios
+            }
+
+    try:
+        results = asyncio.run(run_all())
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        llm.set_transport(None)
+        ratelimit.set_governor(None)
+        parser.set_result_cache(original_result_cache)
+        pdf_extract.set_text_cache(original_text_cache)
+        store.set_store(original_store)
+        parser.RULE_FAST_PATH_ENABLED = original_fast_path
+
+    return {
+        "config": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "llm_latency": llm_latency,
+            "rule_fast_path": rule_fast_path,
+        },
+        "scenarios": results,
+    }
+
+
+def compare_runs(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    """
+    Find metrics that got worse by more than threshold between two runs.
+
+    Only scenarios present in both runs are compared.
+
+    Args:
+        baseline: Result of an earlier run_benchmark
+        current: Result of this run
+        threshold: Allowed relative change, e.g. 0.1 for 10%
+
+    Returns:
+        One description per regression (empty if none)
+    """
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for field in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if not before.get(field) or field not in now:
+                continue
+            change = (now[field] - before[field]) / before[field]
+            if field in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name} {field}: {before[field]:.2f} -> {now[field]:.2f} ({change:+.0%} worse)")
+    return regressions
+
+
+def print_report(result: dict) -> None:
+    config = result["config"]
+    print(f"{config['requests']} requests per scenario, concurrency {config['concurrency']}, "
+          f"fake LLM latency {config['llm_latency'] * 1000:.0f} ms")
+    for name, summary in result["scenarios"].items():
+        memory = f"  peak {summary['peak_mb']:7.1f} MB" if "peak_mb" in summary else ""
+        print(f"  {name:<12} {summary['rps']:8.1f} req/s  p50 {summary['p50_ms']:8.1f} ms"
+              f"  p95 {summary['p95_ms']:8.1f} ms  p99 {summary['p99_ms']:8.1f} ms"
+              f"  errors {summary['errors']}{memory}")
+        for stage, mean_ms in summary["stages"].items():
+            print(f"      {stage:<14} {mean_ms:9.2f} ms")
+
+
+def build_scenarios(args) -> list[Scenario]:
+    bodies = [
+        {"course": f"BENCH {i}", "text": generate_syllabus(seed=i)}
+        for i in range(8)
+    ]
+    scenarios = [
+        text_scenario("analyze", "/analyze", bodies),
+        text_scenario("stream", "/analyze/stream", bodies),
+    ]
+    if args.replay:
+        scenarios.append(text_scenario("replay", "/analyze", load_replay(args.replay)))
+    for page_count in args.pdf_pages:
+        scenarios.append(pdf_scenario(page_count, args.lines_per_page))
+    return scenarios
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--requests", type=int, default=50, help="requests per scenario")
+    arg_parser.add_argument("--concurrency", type=int, default=10)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    arg_parser.add_argument("--pdf-pages", type=lambda s: [int(n) for n in s.split(",") if n],
+                            default=[1, 5, 20], help="comma-separated page counts of generated PDFs")
+    arg_parser.add_argument("--lines-per-page", type=int, default=30)
+    arg_parser.add_argument("--replay", help="JSON Lines file of request bodies to replay against /analyze")
+    arg_parser.add_argument("--memory", action="store_true", help="trace peak memory per scenario")
+    arg_parser.add_argument("--rule-fast-path", action="store_true",
+                            help="let the rule-based extractor skip the LLM")
+    arg_parser.add_argument("--save", help="write results as JSON to this file")
+    arg_parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    arg_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="relative change that counts as a regression")
+    args = arg_parser.parse_args(argv)
+
+    result = run_benchmark(
+        build_scenarios(args),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        llm_latency=args.llm_latency,
+        trace_memory=args.memory,
+        rule_fast_path=args.rule_fast_path,
+    )
+    print_report(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_runs(json.load(f), result, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Compare Pydantic models with the internal record types.
+
+Measures, for the same data:
+  - memory per assignment (Assignment vs AssignmentRecord)
+  - construction from parsed LLM items (validated model vs item_to_assignment)
+  - weekly aggregation feeding both result types
+  - /analyze response serialization (what FastAPI does with a returned
+    AnalyzeResponse: validate it, dump it to JSON-compatible Python, render
+    with json.dumps; vs the plan_response fast path)
+
+Run from the project root:
+    python -m backend.bench_models
+    python -m backend.bench_models --assignments 100000 --repeat 5
+"""
+import argparse
+import json
+import tracemalloc
+from backend.bench_workload import best_of, generate_assignments
+from backend.main import AnalyzeResponse, plan_response
+from backend.models import Assignment, AssignmentRecord, AssignmentType, WeeklyWorkload
+from backend.parser import item_to_assignment, normalize_date
+from backend.workload import compute_weekly_workload
+
+
+def memory_per_item(build) -> float:
+    """Bytes allocated per object by build() -> list."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(items)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--assignments", type=int, default=50_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    models = generate_assignments(args.assignments)
+    items = [a.model_dump(mode="json") for a in models]
+    records = [AssignmentRecord.from_model(a) for a in models]
+
+    def validated_models():
+        return [
+            Assignment(
+                name=item["name"],
+                course=item["course"],
+                due_date=normalize_date(item["due_date"]),
+                assignment_type=AssignmentType(item["assignment_type"]),
+            )
+            for item in items
+        ]
+
+    model_bytes = memory_per_item(validated_models)
+    record_bytes = memory_per_item(lambda: [item_to_assignment(item) for item in items])
+
+    model_time, _ = best_of(args.repeat, validated_models)
+    record_time, _ = best_of(args.repeat, lambda: [item_to_assignment(item) for item in items])
+
+    weeks = compute_weekly_workload(records)
+    week_models = [WeeklyWorkload(**week.to_json()) for week in weeks]
+    workload_time, _ = best_of(args.repeat, lambda: compute_weekly_workload(records))
+
+    def serialize_models():
+        response = AnalyzeResponse(assignments=models, weekly_workload=week_models)
+        return json.dumps(response.model_dump(mode="json"), separators=(",", ":")).encode()
+
+    def serialize_records():
+        return plan_response(records, weeks).body
+
+    assert json.loads(serialize_models()) == json.loads(serialize_records()), "serialized responses differ"
+    models_json_time, _ = best_of(args.repeat, serialize_models)
+    records_json_time, _ = best_of(args.repeat, serialize_records)
+
+    n = args.assignments
+    print(f"{n} assignments, {len(weeks)} weeks (best of {args.repeat})")
+    print(f"  memory per assignment:  Assignment {model_bytes:7.0f} B   AssignmentRecord {record_bytes:7.0f} B"
+          f" ({model_bytes / record_bytes:.1f}x)")
+    print(f"  build from LLM items:   Assignment {n / model_time:9.0f}/s  AssignmentRecord {n / record_time:9.0f}/s"
+          f" ({model_time / record_time:.1f}x)")
+    print(f"  compute_weekly_workload on records:  {workload_time * 1000:9.2f} ms")
+    print(f"  serialize response:     AnalyzeResponse {n / models_json_time:9.0f}/s  plan_response {n / records_json_time:9.0f}/s"
+          f" ({models_json_time / records_json_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare packed and per-syllabus LLM extraction of short syllabi.
+
+The same batch of short syllabi (one per course, as in a multi-file PDF
+upload) is parsed twice with parse_syllabi_async, once with
+parser.PACKING_ENABLED off (one LLM request per syllabus) and once with it
+on (syllabi packed into shared requests). A local fake LLM answers every
+request after --llm-latency seconds plus the time to generate its output
+at --tokens-per-second, so no API key or network is needed. Reports wall
+time, LLM requests and input/output tokens for both, and checks that both
+runs extracted the same assignments.
+
+Packing always saves requests and input tokens (the system prompt is sent
+once per group), but a packed request generates all of its syllabi's
+output serially, so without a rate limit it can take longer than parallel
+separate requests. --requests-per-minute applies the LLM governor's request
+limit; once its one-minute burst is used up, fewer requests wins.
+
+Run from the project root:
+    python -m backend.bench_packing
+    python -m backend.bench_packing --syllabi 12 --lines 10 --max-tokens 4000
+    python -m backend.bench_packing --requests-per-minute 5
+"""
+import argparse
+import asyncio
+import time
+from backend import llm, metrics
+from backend.bench import generate_syllabus, rule_responder
+from backend.fake_llm import FakeLLMTransport
+from backend.ratelimit import LLMGovernor
+import backend.parser as parser
+import backend.ratelimit as ratelimit
+
+
+def run_once(syllabi: list[tuple[str, str]], packing: bool, llm_latency: float,
+             tokens_per_second: float, max_tokens: int) -> dict:
+    """
+    Parse syllabi once with packing on or off.
+
+    Returns:
+        {"seconds", "requests", "input_tokens", "output_tokens", "results"}
+    """
+    transport = FakeLLMTransport(rule_responder, latency=llm_latency, tokens_per_second=tokens_per_second)
+    llm.set_transport(transport, api_key="bench")
+    parser.PACKING_ENABLED = packing
+    parser.PACK_MAX_TOKENS = max_tokens
+    input_before = metrics.LLM_TOKENS.value("input")
+    output_before = metrics.LLM_TOKENS.value("output")
+
+    start = time.perf_counter()
+    results = asyncio.run(parser.parse_syllabi_async(syllabi))
+    seconds = time.perf_counter() - start
+
+    return {
+        "seconds": seconds,
+        "requests": transport.requests,
+        "input_tokens": metrics.LLM_TOKENS.value("input") - input_before,
+        "output_tokens": metrics.LLM_TOKENS.value("output") - output_before,
+        "results": [sorted((a.name, a.due_date) for a in assignments) for assignments in results],
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--syllabi", type=int, default=8, help="short syllabi in the batch, one per course")
+    arg_parser.add_argument("--lines", type=int, default=12, help="schedule lines per syllabus")
+    arg_parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds before the fake LLM answers")
+    arg_parser.add_argument("--tokens-per-second", type=float, default=80.0, help="fake LLM output speed")
+    arg_parser.add_argument("--max-tokens", type=int, default=parser.PACK_MAX_TOKENS,
+                            help="syllabus tokens per packed request")
+    arg_parser.add_argument("--requests-per-minute", type=int, default=0,
+                            help="LLM governor request limit (0: unlimited)")
+    args = arg_parser.parse_args()
+
+    syllabi = [
+        (generate_syllabus(1, args.lines, seed=seed), f"BENCH {100 + seed}")
+        for seed in range(args.syllabi)
+    ]
+
+    original = (parser.PACKING_ENABLED, parser.PACK_MAX_TOKENS, parser.RULE_FAST_PATH_ENABLED,
+                parser.get_result_cache(), parser.PROMPT_FILTER_ENABLED)
+    parser.RULE_FAST_PATH_ENABLED = False
+    parser.PROMPT_FILTER_ENABLED = False
+    parser.set_result_cache(None)
+    ratelimit.set_governor(LLMGovernor(requests_per_minute=args.requests_per_minute, tokens_per_minute=0))
+    try:
+        runs = {
+            packing: run_once(syllabi, packing, args.llm_latency, args.tokens_per_second, args.max_tokens)
+            for packing in (False, True)
+        }
+    finally:
+        llm.set_transport(None)
+        ratelimit.set_governor(None)
+        (parser.PACKING_ENABLED, parser.PACK_MAX_TOKENS, parser.RULE_FAST_PATH_ENABLED,
+         cache, parser.PROMPT_FILTER_ENABLED) = original
+        parser.set_result_cache(cache)
+
+    separate, packed = runs[False], runs[True]
+    print(f"{args.syllabi} syllabi of {args.lines} lines, LLM latency {args.llm_latency * 1000:.0f} ms,"
+          f" {args.tokens_per_second:.0f} output tokens/s, {args.requests_per_minute or 'unlimited'} requests/min")
+    print(f"{'':<10} {'wall ms':>9} {'requests':>9} {'input tok':>10} {'output tok':>11}")
+    for name, run in (("separate", separate), ("packed", packed)):
+        print(f"{name:<10} {run['seconds'] * 1000:9.0f} {run['requests']:9d}"
+              f" {run['input_tokens']:10.0f} {run['output_tokens']:11.0f}")
+    print(f"packed/separate: wall {packed['seconds'] / separate['seconds']:.2f}x,"
+          f" input tokens {packed['input_tokens'] / separate['input_tokens']:.2f}x")
+    if packed["results"] != separate["results"]:
+        print("WARNING: packed extraction differs from per-syllabus extraction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Measure the prompt filter: tokens saved and recall against the full text.
+
+Each fixture syllabus is extracted twice, once from the full text and once
+from filter_schedule_text's output, and recall is the share of full-text
+assignments (by name and due date) that the filtered prompt still finds.
+By default a deterministic stand-in for the LLM (the rule-based extractor)
+is used; --llm calls Claude instead (needs CLAUDE_API_KEY).
+
+Run from the project root:
+    python -m backend.bench_prompt
+    python -m backend.bench_prompt --synthetic 50 --context-lines 1
+    python -m backend.bench_prompt --llm
+"""
+import argparse
+from backend.bench import generate_syllabus
+from backend.parser import (
+    SYSTEM_PROMPT,
+    build_user_prompt,
+    call_llm,
+    extract_assignments_rule_based,
+    filter_schedule_text,
+    parse_llm_response,
+    prompt_filter_report,
+)
+
+
+FIXTURES = {
+    "list": """CSE 374 Intermediate Programming Concepts and Tools
+Autumn 2024
+
+Instructor: Dr. Smith. Office hours are Mondays 2-3pm in CSE 210.
+Grading: homework 40%, midterm 25%, final 35%.
+Late work is accepted up to two days late with a 10% penalty per day.
+Academic integrity: collaboration is encouraged but write your own code.
+
+Assignments
+- Homework 1: Due October 8, 2024
+- Homework 2: Due October 22, 2024
+- Midterm Exam: November 5, 2024
+- Final Project Proposal - Due November 19, 2024
+
+Accessibility: contact Disability Resources for accommodations.
+""",
+    "table": """PSYCH 101 Introduction to Psychology - Spring 2025
+
+Course description: a survey of the science of behavior and mental processes.
+Required text: Myers, Psychology (13th edition).
+Participation in section counts for 10% of the grade.
+
+Week | Date | Topic | Deliverable
+Week 1 | Jan 13 | Foundations | none
+Week 3 | Jan 27 | The brain | Quiz 1 Jan 31
+Week 6 | Feb 17 | Memory | Essay draft due Feb 21
+Week 9 | Mar 10 | Learning | Midterm exam Mar 12
+Week 15 | Apr 28 | Review | Final paper due May 2
+
+Religious accommodations: let the instructor know in the first two weeks.
+Counseling services are available to all students at no cost.
+""",
+    "bare-dates": """CSE 351 The Hardware/Software Interface
+Autumn 2024
+
+Lectures meet in Kane 130. Section meets in the basement labs.
+Textbook: Bryant and O'Hallaron, Computer Systems (3rd edition).
+Grades are curved at the end of the quarter.
+
+Date   Topic              Work
+10/08  Data representation Lab 1
+10/15  Pointers           Quiz 3
+10/22  Assembly           Lab 2
+11/07  Midterm Exam
+12/05  Caches             Lab 4
+
+Please bring a laptop to every section.
+""",
+    "prose": """HIST 210 Modern Europe, Fall 2024
+
+This course traces European history from 1789 to the present through
+primary sources, lectures and discussion. Attendance is expected at
+every session and participation is part of the grade.
+
+The first response paper is due on September 20, 2024 and should be
+about three pages long. The midterm exam will be held in class on
+October 18, 2024. A research paper of ten pages is due
+December 6, 2024.
+
+Plagiarism policy: any uncredited use of another's work will be
+reported to the dean. Extensions are granted only with documentation.
+""",
+}
+
+
+def llm_extract(text: str, course: str) -> set:
+    content = call_llm(SYSTEM_PROMPT, build_user_prompt(text, course))
+    return {(a.name.strip().casefold(), a.due_date) for a in parse_llm_response(content, course)}
+
+
+def rule_extract(text: str, course: str) -> set:
+    assignments, _ = extract_assignments_rule_based(text, course)
+    return {(a.name.strip().casefold(), a.due_date) for a in assignments}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--synthetic", type=int, default=20,
+                            help="generated syllabi to add to the fixtures")
+    arg_parser.add_argument("--pages", type=int, default=3)
+    arg_parser.add_argument("--context-lines", type=int, default=None)
+    arg_parser.add_argument("--llm", action="store_true", help="extract with Claude instead of the rule extractor")
+    args = arg_parser.parse_args()
+
+    fixtures = dict(FIXTURES)
+    for seed in range(args.synthetic):
+        fixtures[f"synthetic-{seed}"] = generate_syllabus(args.pages, seed=seed)
+    extract = llm_extract if args.llm else rule_extract
+
+    total_original = total_filtered = 0
+    total_expected = total_found = 0
+    print(f"{'fixture':<14} {'tokens':>7} {'sent':>7} {'saved':>6} {'recall':>7}")
+    for name, text in fixtures.items():
+        filtered = filter_schedule_text(text, args.context_lines)
+        report = prompt_filter_report(text, filtered)
+        expected = extract(text, "BENCH 100")
+        found = extract(filtered, "BENCH 100") & expected
+        recall = len(found) / len(expected) if expected else 1.0
+
+        total_original += report["original_tokens"]
+        total_filtered += report["filtered_tokens"]
+        total_expected += len(expected)
+        total_found += len(found)
+        print(f"{name:<14} {report['original_tokens']:7d} {report['filtered_tokens']:7d}"
+              f" {report['saved_ratio']:6.0%} {recall:7.1%}")
+
+    saved = 1 - total_filtered / total_original if total_original else 0.0
+    recall = total_found / total_expected if total_expected else 1.0
+    print(f"{'total':<14} {total_original:7d} {total_filtered:7d} {saved:6.0%} {recall:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Measure the prompt cache: time to first token and input token cost.
+
+Sends the same sequence of streamed extraction requests (SYSTEM_PROMPT plus
+a different generated syllabus each time) to a local fake LLM twice, with
+parser.PROMPT_CACHE_ENABLED off and on. The fake processes uncached input
+at --prefill-tokens-per-second before the first token, caches the system
+prompt like the API (only if it has at least --min-cache-tokens tokens)
+and reports cache reads and writes in usage. Input cost is in
+uncached-token equivalents at the API's prices: cache writes cost 1.25x
+and cache reads 0.1x of a normal input token.
+
+Run from the project root:
+    python -m backend.bench_prompt_cache
+    python -m backend.bench_prompt_cache --requests 50 --min-cache-tokens 256
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from backend import llm, metrics
+from backend.bench import generate_syllabus
+from backend.fake_llm import FakeLLMTransport
+from backend.ratelimit import LLMGovernor, estimate_tokens
+import backend.parser as parser
+import backend.ratelimit as ratelimit
+
+
+CACHE_WRITE_PRICE = 1.25
+CACHE_READ_PRICE = 0.1
+
+
+async def first_token_seconds(user_prompt: str) -> float:
+    """Stream one request and return the seconds until its first piece of text."""
+    start = time.perf_counter()
+    first = None
+    async for _ in parser.stream_llm_async(parser.SYSTEM_PROMPT, user_prompt):
+        if first is None:
+            first = time.perf_counter() - start
+    return first if first is not None else time.perf_counter() - start
+
+
+def run_once(prompts: list[str], cached: bool, prefill_tokens_per_second: float, min_cache_tokens: int) -> dict:
+    """
+    Send prompts one after another with the prompt cache on or off.
+
+    Returns:
+        {"ttft": [seconds per request], "input", "cache_read", "cache_write", "cost"}
+    """
+    llm.set_transport(
+        FakeLLMTransport(
+            responder=lambda system, user: '[{"name": "Homework 1", "course": "BENCH 100", '
+                                           '"due_date": "2024-10-15", "assignment_type": "homework"}]',
+            prefill_tokens_per_second=prefill_tokens_per_second,
+            prompt_cache_min_tokens=min_cache_tokens,
+        ),
+        api_key="bench",
+    )
+    parser.PROMPT_CACHE_ENABLED = cached
+    before = {direction: metrics.LLM_TOKENS.value(direction) for direction in ("input", "cache_read", "cache_write")}
+
+    async def run_all() -> list[float]:
+        return [await first_token_seconds(prompt) for prompt in prompts]
+
+    ttft = asyncio.run(run_all())
+    used = {direction: metrics.LLM_TOKENS.value(direction) - before[direction] for direction in before}
+    used["cost"] = used["input"] + CACHE_WRITE_PRICE * used["cache_write"] + CACHE_READ_PRICE * used["cache_read"]
+    used["ttft"] = ttft
+    return used
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--requests", type=int, default=20)
+    arg_parser.add_argument("--lines", type=int, default=15, help="schedule lines per generated syllabus")
+    arg_parser.add_argument("--prefill-tokens-per-second", type=float, default=5000.0,
+                            help="fake LLM speed on uncached input")
+    arg_parser.add_argument("--min-cache-tokens", type=int, default=1024,
+                            help="shortest cacheable prefix (the API's minimum for Sonnet is 1024)")
+    args = arg_parser.parse_args()
+
+    prompts = [
+        parser.build_user_prompt(generate_syllabus(1, args.lines, seed=seed), "BENCH 100")
+        for seed in range(args.requests)
+    ]
+    system_tokens = estimate_tokens(parser.SYSTEM_PROMPT)
+
+    original = parser.PROMPT_CACHE_ENABLED
+    ratelimit.set_governor(LLMGovernor(requests_per_minute=0, tokens_per_minute=0))
+    try:
+        runs = {
+            cached: run_once(prompts, cached, args.prefill_tokens_per_second, args.min_cache_tokens)
+            for cached in (False, True)
+        }
+    finally:
+        llm.set_transport(None)
+        ratelimit.set_governor(None)
+        parser.PROMPT_CACHE_ENABLED = original
+
+    print(f"{args.requests} streamed requests, system prompt ~{system_tokens} tokens,"
+          f" prefill {args.prefill_tokens_per_second:.0f} tokens/s")
+    if system_tokens < args.min_cache_tokens:
+        print(f"  note: the system prompt is shorter than the {args.min_cache_tokens}-token minimum,"
+              f" so it is never cached")
+    print(f"{'':<10} {'ttft p50 ms':>12} {'later p50 ms':>13} {'input':>8} {'read':>8} {'write':>8} {'cost':>9}")
+    for name, run in (("uncached", runs[False]), ("cached", runs[True])):
+        later = run["ttft"][1:] or run["ttft"]
+        print(f"{name:<10} {statistics.median(run['ttft']) * 1000:12.1f} {statistics.median(later) * 1000:13.1f}"
+              f" {run['input']:8.0f} {run['cache_read']:8.0f} {run['cache_write']:8.0f} {run['cost']:9.0f}")
+    print(f"cached/uncached input cost: {runs[True]['cost'] / runs[False]['cost']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
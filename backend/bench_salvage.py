@@ -0,0 +1,91 @@
+"""
+Measure the tolerant response parser and the cost of repairing bad items.
+
+For generated syllabi, builds the LLM response the rule-based extractor
+would give and corrupts --bad-ratio of its items (unparseable dates). Reports:
+  - parse throughput on clean responses: the old fence-stripping
+    json.loads path vs parse_llm_response_partial
+  - tokens needed to recover the corrupted items: re-extracting the whole
+    window (what a user resubmitting costs) vs the repair request that
+    holds only the rejected items
+
+Run from the project root:
+    python -m backend.bench_salvage
+    python -m backend.bench_salvage --syllabi 200 --bad-ratio 0.2
+"""
+import argparse
+import json
+import random
+from backend.bench import generate_syllabus
+from backend.bench_workload import best_of
+from backend.parser import (
+    REPAIR_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+    build_repair_prompt,
+    build_user_prompt,
+    extract_assignments_rule_based,
+    item_to_assignment,
+    parse_llm_response_partial,
+)
+from backend.ratelimit import estimate_tokens
+
+
+def fence_strip_parse(content: str, course_code: str) -> list:
+    """The response handling parse_syllabus used before the tolerant parser."""
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    data = json.loads(content.strip())
+    return [item_to_assignment(item, course_code) for item in data]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--syllabi", type=int, default=100)
+    arg_parser.add_argument("--pages", type=int, default=2)
+    arg_parser.add_argument("--bad-ratio", type=float, default=0.1, help="share of items to corrupt")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(0)
+    course = "BENCH 100"
+    texts = [generate_syllabus(args.pages, seed=seed) for seed in range(args.syllabi)]
+    responses = []
+    for text in texts:
+        assignments, _ = extract_assignments_rule_based(text, course)
+        responses.append([a.to_json() for a in assignments])
+    clean = ["```json\n" + json.dumps(items, indent=2) + "\n```" for items in responses]
+    item_count = sum(len(items) for items in responses)
+
+    old_time, _ = best_of(args.repeat, lambda: [fence_strip_parse(c, course) for c in clean])
+    new_time, _ = best_of(args.repeat, lambda: [parse_llm_response_partial(c, course) for c in clean])
+
+    retry_tokens = repair_tokens = kept = bad = 0
+    for text, items in zip(texts, responses):
+        corrupted = [
+            {**item, "due_date": "sometime in " + item["due_date"]} if rng.random() < args.bad_ratio else item
+            for item in items
+        ]
+        assignments, errors = parse_llm_response_partial(json.dumps(corrupted), course)
+        if not errors:
+            continue
+        kept += len(assignments)
+        bad += len(errors)
+        retry_tokens += estimate_tokens(SYSTEM_PROMPT + build_user_prompt(text, course)) + estimate_tokens(json.dumps(items))
+        repair_tokens += (estimate_tokens(REPAIR_SYSTEM_PROMPT + build_repair_prompt(errors))
+                          + estimate_tokens(json.dumps([items[0]] * len(errors))))
+
+    print(f"{args.syllabi} responses, {item_count} items (best of {args.repeat})")
+    print(f"  parse clean responses:  fence strip + json.loads {item_count / old_time:9.0f} items/s"
+          f"   parse_llm_response_partial {item_count / new_time:9.0f} items/s")
+    if bad:
+        print(f"  {bad} corrupted items, {kept} valid items kept alongside them")
+        print(f"  tokens to recover them: full re-extraction {retry_tokens:8d}   repair request {repair_tokens:8d}"
+              f" ({repair_tokens / retry_tokens:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Profile cold start of the FastAPI app.
+
+Each run starts a fresh interpreter with -X importtime, imports
+backend.main, then times the startup preloading (llm.preload) and the
+optional warm-up hook (main.warm_up) in the same process. Reports the
+median of the runs, the modules with the largest cumulative import time,
+and whether heavy dependencies that should load lazily were imported.
+
+Run from the project root:
+    python -m backend.bench_startup
+    python -m backend.bench_startup --runs 10 --budget-ms 600
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+# Must not be imported by "import backend.main"
+LAZY_MODULES = ("pdfplumber", "numpy", "anthropic")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main as main
+imported = time.perf_counter() - start
+lazy = [m for m in %r if m in sys.modules]
+start = time.perf_counter()
+main.llm.preload()
+preload = time.perf_counter() - start
+start = time.perf_counter()
+main.warm_up()
+warm_up = time.perf_counter() - start
+print(json.dumps({"import": imported, "preload": preload, "warm_up": warm_up, "lazy_loaded": lazy}))
+""" % (LAZY_MODULES,)
+
+
+def profile_once() -> tuple[dict, dict[str, int]]:
+    """
+    Start one interpreter and profile it.
+
+    Returns:
+        (timings in seconds plus lazy_loaded module list,
+         cumulative import microseconds of each top-level import)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; keep only top-level ones
+        if cumulative_us.strip().isdigit() and not name[1:].startswith(" "):
+            cumulative[name.strip()] = int(cumulative_us)
+    return json.loads(result.stdout.splitlines()[-1]), cumulative
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    arg_parser.add_argument("--budget-ms", type=float, default=None,
+                            help="exit with status 1 if the median import of backend.main takes longer")
+    args = arg_parser.parse_args()
+
+    runs = [profile_once() for _ in range(args.runs)]
+    timings = [timing for timing, _ in runs]
+    import_ms = statistics.median(t["import"] for t in timings) * 1000
+    preload_ms = statistics.median(t["preload"] for t in timings) * 1000
+    warm_up_ms = statistics.median(t["warm_up"] for t in timings) * 1000
+
+    print(f"cold start, median of {args.runs} runs")
+    print(f"  import backend.main:   {import_ms:8.1f} ms")
+    print(f"  llm.preload():         {preload_ms:8.1f} ms  (in the background after startup)")
+    print(f"  warm_up():             {warm_up_ms:8.1f} ms  (at startup if SYLLABUS_WARMUP=1)")
+
+    _, cumulative = runs[-1]
+    print("  slowest imports (last run, cumulative):")
+    for name, us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"    {name:<32} {us / 1000:8.1f} ms")
+
+    lazy_loaded = timings[-1]["lazy_loaded"]
+    status = 0
+    if lazy_loaded:
+        print(f"\nImported eagerly but should be lazy: {', '.join(lazy_loaded)}")
+        status = 1
+    if args.budget_ms is not None:
+        verdict = "within" if import_ms <= args.budget_ms else "over"
+        print(f"\nImport time {import_ms:.1f} ms is {verdict} the {args.budget_ms:.0f} ms budget")
+        if import_ms > args.budget_ms:
+            status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
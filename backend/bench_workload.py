@@ -0,0 +1,160 @@
+"""
+Benchmark compute_weekly_workload against the vectorized batch engine.
+
+Run from the project root:
+    python -m backend.bench_workload
+    python -m backend.bench_workload --assignments 500000 --repeat 5
+    python -m backend.bench_workload --students 10000 --courses 300
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from backend.models import Assignment, AssignmentType
+from backend.workload import compute_weekly_workload
+from backend.workload_batch import (
+    assignments_to_columns,
+    columns_to_weekly_workloads,
+    compute_cohort_workloads,
+    compute_weekly_columns,
+)
+
+
+def generate_assignments(count: int, seed: int = 0) -> list[Assignment]:
+    """
+    Generate random assignments spread over one academic year.
+
+    Args:
+        count: Number of assignments
+        seed: Random seed
+
+    Returns:
+        List of Assignment objects
+    """
+    rng = random.Random(seed)
+    start = date(2024, 8, 26)
+    types = list(AssignmentType)
+    return [
+        Assignment(
+            name=f"Assignment {i}",
+            course=f"DEPT {rng.randint(100, 499)}",
+            due_date=start + timedelta(days=rng.randint(0, 300)),
+            assignment_type=rng.choice(types),
+        )
+        for i in range(count)
+    ]
+
+
+def generate_cohort(
+    course_count: int,
+    student_count: int,
+    assignments_per_course: int = 25,
+    courses_per_student: int = 4,
+    seed: int = 0,
+) -> tuple[dict[str, list[Assignment]], dict[str, list[str]]]:
+    """
+    Generate courses with assignments and students enrolled in them.
+
+    Args:
+        course_count: Number of courses
+        student_count: Number of students
+        assignments_per_course: Assignments in each course
+        courses_per_student: Courses each student takes
+        seed: Random seed
+
+    Returns:
+        (assignments keyed by course code, course codes keyed by student ID)
+    """
+    rng = random.Random(seed)
+    start = date(2024, 8, 26)
+    types = list(AssignmentType)
+    courses = {}
+    for c in range(course_count):
+        code = f"DEPT {100 + c}"
+        courses[code] = [
+            Assignment(
+                name=f"{code} Assignment {i}",
+                course=code,
+                due_date=start + timedelta(days=rng.randint(0, 110)),
+                assignment_type=rng.choice(types),
+            )
+            for i in range(assignments_per_course)
+        ]
+
+    codes = list(courses)
+    students = {
+        f"student-{s}": rng.sample(codes, courses_per_student)
+        for s in range(student_count)
+    }
+    return courses, students
+
+
+def best_of(repeat: int, fn):
+    """Run fn repeat times and return (best seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_assignments(args):
+    assignments = generate_assignments(args.assignments)
+    due_ordinals, type_codes = assignments_to_columns(assignments)
+
+    loop_time, expected = best_of(args.repeat, lambda: compute_weekly_workload(assignments))
+    convert_time, _ = best_of(args.repeat, lambda: assignments_to_columns(assignments))
+    columns_time, columns = best_of(args.repeat, lambda: compute_weekly_columns(due_ordinals, type_codes))
+    models_time, actual = best_of(args.repeat, lambda: columns_to_weekly_workloads(columns))
+
+    assert actual == expected, "batch engine result differs from compute_weekly_workload"
+
+    total_batch = convert_time + columns_time + models_time
+    print(f"{args.assignments} assignments, {len(expected)} weeks (best of {args.repeat})")
+    print(f"  compute_weekly_workload:       {loop_time * 1000:9.2f} ms")
+    print(f"  batch: Assignment -> columns:  {convert_time * 1000:9.2f} ms")
+    print(f"  batch: weekly aggregation:     {columns_time * 1000:9.2f} ms")
+    print(f"  batch: columns -> models:      {models_time * 1000:9.2f} ms")
+    print(f"  batch total:                   {total_batch * 1000:9.2f} ms ({loop_time / total_batch:.1f}x)")
+    print(f"  aggregation only speedup:      {loop_time / columns_time:9.1f}x")
+
+
+def bench_cohort(args):
+    courses, students = generate_cohort(args.courses, args.students)
+
+    def per_student():
+        return {
+            student_id: compute_weekly_workload([a for code in codes for a in courses[code]])
+            for student_id, codes in students.items()
+        }
+
+    loop_time, expected = best_of(args.repeat, per_student)
+    batch_time, actual = best_of(args.repeat, lambda: compute_cohort_workloads(courses, students))
+
+    assert actual == expected, "cohort result differs from per-student compute_weekly_workload"
+
+    print(f"{args.students} students, {args.courses} courses (best of {args.repeat})")
+    print(f"  per-student compute_weekly_workload: {args.students / loop_time:10.0f} students/s")
+    print(f"  compute_cohort_workloads:            {args.students / batch_time:10.0f} students/s"
+          f" ({loop_time / batch_time:.1f}x)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--assignments", type=int, default=200_000)
+    arg_parser.add_argument("--students", type=int, default=0,
+                            help="benchmark the cohort API with this many students instead")
+    arg_parser.add_argument("--courses", type=int, default=200)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.students:
+        bench_cohort(args)
+    else:
+        bench_assignments(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare WorkloadIndex queries with re-scanning the weekly workload list.
+
+Builds a department-wide cohort (--students students over --courses
+courses), then answers --queries rounds of dashboard questions two ways:
+  - scan: what dashboards do with a flat weekly list today; sort and
+    walk the weekly totals (or the assignments, for date ranges) for every
+    question
+  - index: WorkloadIndex.from_cohort once, then prefix-sum lookups
+Each round asks for the top 5 weeks, the heaviest 3-week window and the
+summary of a random 4-week range. Both give the same answers.
+
+Run from the project root:
+    python -m backend.bench_workload_query
+    python -m backend.bench_workload_query --students 20000 --courses 400 --queries 5000
+"""
+import argparse
+import random
+from datetime import timedelta
+from backend.bench_workload import best_of, generate_cohort
+from backend.workload import TYPE_WEIGHTS, get_week_start
+from backend.workload_query import WorkloadIndex
+
+
+def scan_queries(weighted, ranges):
+    """Answer every round by scanning the weekly totals and the assignments."""
+    intensity = {}
+    for assignment, weight in weighted:
+        monday = get_week_start(assignment.due_date)
+        intensity[monday] = intensity.get(monday, 0.0) + weight * TYPE_WEIGHTS[assignment.assignment_type]
+    first = min(intensity)
+    calendar = [intensity.get(first + timedelta(weeks=i), 0.0)
+                for i in range((max(intensity) - first).days // 7 + 1)]
+
+    answers = []
+    for start, end in ranges:
+        top = sorted(intensity, key=lambda week: (-intensity[week], week))[:5]
+        windows = [sum(calendar[i:i + 3]) for i in range(len(calendar) - 2)]
+        peak = windows.index(max(windows))
+        total = sum(
+            weight * TYPE_WEIGHTS[a.assignment_type] for a, weight in weighted if start <= a.due_date <= end
+        )
+        answers.append((top, first + timedelta(weeks=peak), total))
+    return answers
+
+
+def index_queries(index, ranges):
+    """Answer every round from the index."""
+    answers = []
+    for start, end in ranges:
+        top = [week.week_start_date for week in index.top_weeks(5)]
+        peak = index.peak_window(3).start_date
+        answers.append((top, peak, index.summary(start, end).intensity_score))
+    return answers
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--students", type=int, default=5000)
+    arg_parser.add_argument("--courses", type=int, default=200)
+    arg_parser.add_argument("--queries", type=int, default=200, help="rounds of dashboard questions")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    courses, students = generate_cohort(args.courses, args.students)
+    enrolled = {code: 0 for code in courses}
+    for codes in students.values():
+        for code in codes:
+            enrolled[code] += 1
+    assignments = [a for code in courses for a in courses[code] if enrolled[code]]
+    weighted = [(a, enrolled[a.course]) for a in assignments]
+
+    rng = random.Random(0)
+    first = min(a.due_date for a in assignments)
+    ranges = []
+    for _ in range(args.queries):
+        start = first + timedelta(days=rng.randint(0, 90))
+        ranges.append((start, start + timedelta(weeks=4, days=-1)))
+
+    scan_time, expected = best_of(args.repeat, lambda: scan_queries(weighted, ranges))
+    build_time, index = best_of(args.repeat, lambda: WorkloadIndex.from_cohort(courses, students))
+    query_time, actual = best_of(args.repeat, lambda: index_queries(index, ranges))
+
+    assert actual == expected, "index answers differ from scanning"
+
+    print(f"{args.students} students, {args.courses} courses, {len(assignments)} assignments,"
+          f" {args.queries} query rounds (best of {args.repeat})")
+    print(f"  scan:  {scan_time * 1000:9.2f} ms   ({args.queries / scan_time:10.0f} rounds/s)")
+    print(f"  index: build {build_time * 1000:9.2f} ms + queries {query_time * 1000:9.2f} ms"
+          f"   ({args.queries / query_time:10.0f} rounds/s)")
+    print(f"  speedup including build: {scan_time / (build_time + query_time):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Persistent on-disk caches for expensive syllabus processing steps, and
+coalescing of identical in-flight work.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+
+CACHE_DIR = os.environ.get("SYLLABUS_CACHE_DIR", ".cache")
+
+# Access times of cache hits are kept in memory and written in one
+# statement with the next set() or after this many hits
+ACCESS_FLUSH_SIZE = int(os.environ.get("SYLLABUS_CACHE_ACCESS_FLUSH", "256"))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize syllabus text so that whitespace-only differences hash the same.
+
+    Line endings are unified, runs of spaces/tabs are collapsed, and blank
+    lines are dropped. The wording itself is left untouched.
+
+    Args:
+        text: Raw syllabus text
+
+    Returns:
+        Normalized text
+    """
+    lines = []
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def content_hash(*parts: str) -> str:
+    """
+    Build a SHA-256 hex digest over several string parts.
+
+    Args:
+        parts: Strings that together identify a piece of content
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Key/value string cache stored in a SQLite file.
+
+    Entries are evicted least-recently-used first once the cache holds more
+    than max_entries items or more than max_bytes of values, and expire
+    ttl_seconds after they were written. Every entry carries a tag so that
+    groups of entries (e.g. everything produced by an old prompt) can be
+    dropped at once.
+
+    A hit only reads the database: its new access time is recorded in
+    memory and written together with others before the next eviction
+    (see ACCESS_FLUSH_SIZE). From async code use get_async and set_async,
+    which run on a worker thread instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = 1000,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # Access times of hits not yet written, keyed by cache key
+        self._accessed: dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable across application crashes under WAL; a power loss can at
+        # worst drop the last few cached results
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                tag TEXT NOT NULL DEFAULT '',
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_tag ON entries (tag)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached value, refreshing its LRU position on a hit.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self._accessed.pop(key, None)
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                self._flush_accessed()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """
+        get() on a worker thread, for use from the event loop.
+        """
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key: str, value: str, tag: str = "") -> None:
+        """
+        Store a value, evicting old entries if the cache is over its limits.
+
+        Args:
+            key: Cache key
+            value: String value to store
+            tag: Group label used by invalidate() and retain_only()
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO entries (key, value, tag, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, value, tag, size, now, now),
+            )
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            self._evict(now)
+            self._conn.commit()
+
+    async def set_async(self, key: str, value: str, tag: str = "") -> None:
+        """
+        set() on a worker thread, for use from the event loop.
+        """
+        await asyncio.to_thread(self.set, key, value, tag)
+
+    def invalidate(self, tag: Optional[str] = None) -> int:
+        """
+        Remove entries with the given tag, or every entry if no tag is given.
+
+        Args:
+            tag: Tag to remove
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if tag is None:
+                cursor = self._conn.execute("DELETE FROM entries")
+            else:
+                cursor = self._conn.execute("DELETE FROM entries WHERE tag = ?", (tag,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def retain_only(self, tag: str) -> int:
+        """
+        Remove every entry whose tag differs from the given one.
+
+        Args:
+            tag: Tag to keep
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM entries WHERE tag != ?", (tag,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Report hit/miss counters for this process and current cache size.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
+
+    def _flush_accessed(self) -> None:
+        # Write pending access times; the caller holds the lock and commits
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += cursor.rowcount
+
+        if self.max_entries is not None:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                cursor = self._conn.execute(
+                    """
+                    DELETE FROM entries WHERE key IN (
+                        SELECT key FROM entries ORDER BY accessed_at ASC, rowid ASC LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                )
+                self.evictions += cursor.rowcount
+
+        if self.max_bytes is not None:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed_at ASC, rowid ASC"
+                ).fetchall()
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= size
+                    self.evictions += 1
+
+
+class _LeaderInterrupted(Exception):
+    """Set on a coalesced call whose leader was cancelled or interrupted."""
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers that
+    arrive while it is running wait for the leader's result instead of
+    repeating the work. If the leader is cancelled or interrupted, its
+    waiters claim the key again and the first of them runs the work.
+    Threads and event-loop tasks can share one instance. Results are not
+    kept after the leader finishes; pair with a cache.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn, or wait for an identical call already in progress.
+
+        Args:
+            key: Identifies identical work
+            fn: Function producing the result
+
+        Returns:
+            Result of fn (possibly from another caller's execution)
+        """
+        while True:
+            future, leader = self._claim(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderInterrupted:
+                continue
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._resolve(key, future, exception=e)
+            raise
+        self._resolve(key, future, result=result)
+        return result
+
+    async def run_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of run; fn is a coroutine function.
+
+        A waiting caller that is cancelled does not affect the leader or
+        the other waiters.
+
+        Args:
+            key: Identifies identical work
+            fn: Coroutine function producing the result
+
+        Returns:
+            Result of fn (possibly from another caller's execution)
+        """
+        while True:
+            future, leader = self._claim(key)
+            if leader:
+                break
+            try:
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderInterrupted:
+                continue
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._resolve(key, future, exception=e)
+            raise
+        self._resolve(key, future, result=result)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Report how many calls ran and how many were coalesced.
+
+        Returns:
+            Dictionary with leaders, coalesced, and in_flight
+        """
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _resolve(
+        self,
+        key: str,
+        future: Future,
+        result: Any = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        with self._lock:
+            del self._inflight[key]
+        if exception is None:
+            future.set_result(result)
+        elif isinstance(exception, Exception):
+            future.set_exception(exception)
+        else:
+            # The leader was cancelled or interrupted, which says nothing
+            # about the work itself; waiters retry it
+            future.set_exception(_LeaderInterrupted(repr(exception)))
@@ -0,0 +1,282 @@
+"""
+Local stand-in for the Anthropic Messages API.
+
+FakeLLMTransport answers /v1/messages requests in-process, so the real
+client code path (request building, pooling, response parsing) can be
+exercised and benchmarked without network access or an API key.
+
+Usage:
+    from backend import llm
+    from backend.fake_llm import FakeLLMTransport
+
+    llm.set_transport(FakeLLMTransport(latency=0.5), api_key="fake")
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+from backend.llm import httpx
+from backend.ratelimit import estimate_tokens
+
+
+def empty_responder(system_prompt: str, user_prompt: str) -> str:
+    """
+    Default responder: no assignments found.
+    """
+    return "[]"
+
+
+class FakeLLMTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    httpx transport that simulates the Anthropic Messages API.
+
+    Streaming requests ("stream": true) are answered with server-sent
+    events, the response text split into pieces of stream_chunk_chars
+    characters sent stream_delay seconds apart.
+
+    Generation time can be simulated with tokens_per_second: non-streaming
+    responses then also wait output_tokens / tokens_per_second seconds.
+    prefill_tokens_per_second adds the time to process the uncached input
+    tokens before the first byte of every response.
+
+    Prompt caching is simulated like the API does it: the system prompt up
+    to the last block with cache_control is cached for prompt_cache_ttl
+    seconds (refreshed on every hit) if it has at least
+    prompt_cache_min_tokens tokens. Usage then reports those tokens as
+    cache_creation_input_tokens on the first request and as
+    cache_read_input_tokens on later ones, not as input_tokens.
+
+    Throttling can be simulated with error_statuses (status codes returned
+    for the first requests, e.g. [429, 529]) and requests_per_minute (429
+    once more requests than this arrived in the last 60 seconds).
+
+    Args:
+        responder: Function (system_prompt, user_prompt) -> response text
+        latency: Seconds to wait before answering each request
+        stream_chunk_chars: Characters per streamed text delta
+        stream_delay: Seconds between streamed text deltas
+        error_statuses: Status codes to answer the first requests with
+        requests_per_minute: Simulated API rate limit
+        retry_after: Retry-After header value for simulated errors
+        tokens_per_second: Simulated output speed (None: instant)
+        prefill_tokens_per_second: Simulated uncached input speed (None: instant)
+        prompt_cache_min_tokens: Shortest cacheable prompt prefix
+        prompt_cache_ttl: Seconds a cached prefix stays cached
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str, str], str]] = None,
+        latency: float = 0.0,
+        stream_chunk_chars: int = 16,
+        stream_delay: float = 0.0,
+        error_statuses: Optional[list[int]] = None,
+        requests_per_minute: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        prefill_tokens_per_second: Optional[float] = None,
+        prompt_cache_min_tokens: int = 1024,
+        prompt_cache_ttl: float = 300.0,
+    ):
+        self.responder = responder or empty_responder
+        self.latency = latency
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_delay = stream_delay
+        self.error_statuses = deque(error_statuses or [])
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self.prompt_cache_ttl = prompt_cache_ttl
+        self._prompt_cache: dict[str, float] = {}
+        self.requests = 0
+        self.errors = 0
+        self._accepted: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            time.sleep(self.latency)
+        response, generation_time = self._respond(request)
+        if generation_time:
+            time.sleep(generation_time)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response, generation_time = self._respond(request)
+        if generation_time:
+            await asyncio.sleep(generation_time)
+        return response
+
+    def _respond(self, request: httpx.Request) -> tuple[httpx.Response, float]:
+        with self._lock:
+            self.requests += 1
+            message_id = f"msg_fake_{self.requests}"
+            error_status = self._error_status()
+            if error_status:
+                self.errors += 1
+
+        if error_status:
+            return self._error(error_status), 0.0
+
+        body = json.loads(request.content)
+        system = body.get("system", "")
+        system_prompt = _system_text(system)
+        user_prompt = _user_text(body["messages"])
+        text = self.responder(system_prompt, user_prompt)
+        cache_read, cache_write = self._use_prompt_cache(body.get("model", ""), system)
+        usage = {
+            "input_tokens": max(0, estimate_tokens(system_prompt + user_prompt) - cache_read - cache_write),
+            "cache_creation_input_tokens": cache_write,
+            "cache_read_input_tokens": cache_read,
+            "output_tokens": estimate_tokens(text),
+        }
+        prefill_time = 0.0
+        if self.prefill_tokens_per_second:
+            prefill_time = (usage["input_tokens"] + cache_write) / self.prefill_tokens_per_second
+
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=_EventStream(self._events(message_id, body, text, usage), self.stream_delay),
+            ), prefill_time
+
+        generation_time = usage["output_tokens"] / self.tokens_per_second if self.tokens_per_second else 0.0
+        return httpx.Response(
+            200,
+            json={
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "fake"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": usage,
+            },
+        ), prefill_time + generation_time
+
+    def _use_prompt_cache(self, model: str, system) -> tuple[int, int]:
+        """
+        Look up and store the cacheable system prompt prefix.
+
+        Returns:
+            (tokens read from the cache, tokens written to it)
+        """
+        if isinstance(system, str):
+            return 0, 0
+        breakpoints = [i for i, block in enumerate(system) if block.get("cache_control")]
+        if not breakpoints:
+            return 0, 0
+        prefix = _system_text(system[:breakpoints[-1] + 1])
+        tokens = estimate_tokens(prefix)
+        if tokens < self.prompt_cache_min_tokens:
+            return 0, 0
+
+        key = f"{model}\0{prefix}"
+        now = time.monotonic()
+        with self._lock:
+            hit = self._prompt_cache.get(key, 0.0) > now
+            self._prompt_cache[key] = now + self.prompt_cache_ttl
+        return (tokens, 0) if hit else (0, tokens)
+
+    def _error_status(self) -> Optional[int]:
+        if self.error_statuses:
+            return self.error_statuses.popleft()
+        if self.requests_per_minute is not None:
+            now = time.monotonic()
+            while self._accepted and self._accepted[0] <= now - 60:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.requests_per_minute:
+                return 429
+            self._accepted.append(now)
+        return None
+
+    def _error(self, status: int) -> httpx.Response:
+        error_type = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+        headers = {}
+        if self.retry_after is not None:
+            headers["retry-after"] = str(self.retry_after)
+        return httpx.Response(
+            status,
+            headers=headers,
+            json={"type": "error", "error": {"type": error_type, "message": f"Simulated {error_type}"}},
+        )
+
+    def _events(self, message_id: str, body: dict, text: str, usage: dict) -> list[bytes]:
+        events = [
+            ("message_start", {
+                "type": "message_start",
+                "message": {
+                    "id": message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "model": body.get("model", "fake"),
+                    "content": [],
+                    "stop_reason": None,
+                    "stop_sequence": None,
+                    "usage": {**usage, "output_tokens": 1},
+                },
+            }),
+            ("content_block_start", {
+                "type": "content_block_start",
+                "index": 0,
+                "content_block": {"type": "text", "text": ""},
+            }),
+        ]
+        for start in range(0, len(text), self.stream_chunk_chars):
+            events.append(("content_block_delta", {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": text[start:start + self.stream_chunk_chars]},
+            }))
+        events += [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            ("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": usage["output_tokens"]},
+            }),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+        return [
+            f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+            for name, data in events
+        ]
+
+
+class _EventStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, events: list[bytes], delay: float):
+        self.events = events
+        self.delay = delay
+
+    def __iter__(self):
+        for event in self.events:
+            if self.delay:
+                time.sleep(self.delay)
+            yield event
+
+    async def __aiter__(self):
+        for event in self.events:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield event
+
+
+def _system_text(system) -> str:
+    if isinstance(system, str):
+        return system
+    return "".join(block.get("text", "") for block in system)
+
+
+def _user_text(messages: list) -> str:
+    content = messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
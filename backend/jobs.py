@@ -0,0 +1,214 @@
+"""
+In-process background job queue for syllabus analysis.
+
+Jobs are callables run by a fixed pool of worker threads. The queue is
+bounded, so submitting while it is full fails immediately instead of
+piling up work; finished jobs are kept for JOB_TTL_SECONDS so clients can
+poll for their results.
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+
+JOB_WORKERS = int(os.environ.get("SYLLABUS_JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("SYLLABUS_JOB_QUEUE_SIZE", "100"))
+JOB_TTL_SECONDS = float(os.environ.get("SYLLABUS_JOB_TTL_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_job_queue: Optional["JobQueue"] = None
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """
+    A unit of work and its outcome.
+
+    Attributes:
+        id: Job ID
+        status: One of QUEUED, RUNNING, DONE, FAILED
+        result: Return value of the job function once DONE
+        error: Error message once FAILED
+    """
+
+    def __init__(self, fn: Callable[..., Any], args: tuple):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._fn = fn
+        self._args = args
+
+
+class JobQueue:
+    """
+    Bounded job queue served by worker threads.
+
+    Worker threads are started on the first submit.
+
+    Args:
+        workers: Number of worker threads
+        max_queued: Jobs that may wait for a worker before submit fails
+        ttl_seconds: How long finished jobs are kept
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_SIZE,
+        ttl_seconds: float = JOB_TTL_SECONDS,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._stopped = threading.Event()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Job:
+        """
+        Queue fn(*args) to run on a worker thread.
+
+        Args:
+            fn: Job function; its return value becomes the job result
+            *args: Arguments for fn
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        job = Job(fn, args)
+        with self._lock:
+            self._prune()
+            self._start_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job ID returned by submit
+
+        Returns:
+            The Job, or None if it is unknown or has expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """
+        Report queue depth and job counts by status.
+
+        Returns:
+            Dictionary with workers, max_queued, and a count per status
+        """
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "max_queued": self.max_queued, **counts}
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the worker threads once they finish their current job.
+
+        Args:
+            wait: Block until the workers have exited
+        """
+        self._stopped.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"job-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            job.status = RUNNING
+            try:
+                job.result = job._fn(*job._args)
+                job.status = DONE
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+                job._fn = job._args = None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the process-wide job queue, creating it on first use.
+
+    Returns:
+        JobQueue configured from the SYLLABUS_JOB_* environment variables
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
+
+
+def set_job_queue(job_queue: Optional[JobQueue]) -> None:
+    """
+    Replace the process-wide job queue (None recreates it on next use).
+
+    Args:
+        job_queue: JobQueue to use
+    """
+    global _job_queue
+    _job_queue = job_queue
+
+
+def shutdown() -> None:
+    """
+    Stop the process-wide job queue's workers if it was created.
+    """
+    global _job_queue
+    if _job_queue is not None:
+        _job_queue.shutdown()
+        _job_queue = None
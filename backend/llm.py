@@ -0,0 +1,142 @@
+"""
+Shared Anthropic clients for outbound LLM calls.
+
+Clients are created lazily on first use and reused for the life of the
+process so that connections (and their TLS sessions) are pooled instead of
+being set up on every request. The clients do not retry on their own;
+backend.ratelimit owns the retry policy.
+"""
+import asyncio
+import os
+import threading
+from typing import Optional
+
+try:
+    # anthropic>=1.0 is built on httpx2; earlier releases use httpx
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
+
+LLM_TIMEOUT_SECONDS = float(os.environ.get("SYLLABUS_LLM_TIMEOUT_SECONDS", "120"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("SYLLABUS_LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("SYLLABUS_LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("SYLLABUS_LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("SYLLABUS_LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+_client = None
+_client_lock = threading.Lock()
+_async_client = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_transport = None
+_api_key_override: Optional[str] = None
+
+
+def _api_key() -> Optional[str]:
+    return _api_key_override or os.environ.get("CLAUDE_API_KEY")
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def get_client():
+    """
+    Get the process-wide synchronous Anthropic client.
+
+    Returns:
+        anthropic.Anthropic instance backed by a pooled httpx.Client
+    """
+    global _client
+    if _client is None:
+        # Locked so a request and startup preloading cannot both create one
+        with _client_lock:
+            if _client is None:
+                from anthropic import Anthropic
+
+                http_client = httpx.Client(
+                    timeout=_timeout(),
+                    limits=_limits(),
+                    transport=_transport,
+                )
+                _client = Anthropic(api_key=_api_key(), http_client=http_client, max_retries=0)
+    return _client
+
+
+def get_async_client():
+    """
+    Get the shared asynchronous Anthropic client for the running event loop.
+
+    Pooled connections belong to the event loop that opened them, so a new
+    client is created if this is called from a different loop than before
+    (in production there is a single loop per worker).
+
+    Returns:
+        anthropic.AsyncAnthropic instance backed by a pooled httpx.AsyncClient
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        from anthropic import AsyncAnthropic
+
+        http_client = httpx.AsyncClient(
+            timeout=_timeout(),
+            limits=_limits(),
+            transport=_transport,
+        )
+        _async_client = AsyncAnthropic(api_key=_api_key(), http_client=http_client, max_retries=0)
+        _async_client_loop = loop
+    return _async_client
+
+
+def preload() -> None:
+    """
+    Import the Anthropic SDK and create the shared sync client now.
+
+    The SDK takes on the order of a second to import, which would otherwise
+    be paid by the first request. The client is only created if an API key
+    is configured.
+    """
+    import anthropic  # noqa: F401
+
+    if _api_key() or _transport is not None:
+        get_client()
+
+
+def set_transport(transport, api_key: Optional[str] = None) -> None:
+    """
+    Route all LLM traffic through a custom httpx transport.
+
+    Used to plug in a local stub (see backend.fake_llm) for offline tests and
+    benchmarks. Passing None restores the default network transport.
+
+    Args:
+        transport: httpx transport implementing the sync and/or async
+            interface, or None
+        api_key: Optional API key to send instead of CLAUDE_API_KEY
+    """
+    global _transport, _api_key_override
+    _transport = transport
+    _api_key_override = api_key
+    reset_clients()
+
+
+def reset_clients() -> None:
+    """
+    Drop the shared clients so they are rebuilt on next use.
+    """
+    global _client, _async_client, _async_client_loop
+    if _client is not None:
+        _client.close()
+    _client = None
+    _async_client = None
+    _async_client_loop = None
@@ -1,14 +1,91 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Optional, Union
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from backend.parser import parse_syllabus
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from backend.cache import SingleFlight
+from backend.parser import (
+    ParseResult,
+    chunk_flights,
+    get_result_cache,
+    parse_syllabi_results_async,
+    parse_syllabus_result,
+    parse_syllabus_result_async,
+    result_cache_key,
+    stream_syllabus,
+)
 from backend.workload import compute_weekly_workload
-from backend.models import Assignment, WeeklyWorkload
-import pdfplumber
+from backend.models import Assignment, AssignmentRecord, WeeklyWorkload, WeeklyWorkloadRecord
+from backend import jobs, llm, metrics, parser, pdf_extract
+from backend.ratelimit import LLMThrottledError, get_governor
+from backend.terms import TermCalendar, infer_term_from_dates, parse_term, resolve_term
+from backend.store import get_store
+
+
+# PDF extraction is driven from a thread pool; LLM_CONCURRENCY caps how many
+# syllabi are sent to the LLM at once across all requests.
+PDF_WORKERS = int(os.environ.get("SYLLABUS_PDF_WORKERS", "4"))
+LLM_CONCURRENCY = int(os.environ.get("SYLLABUS_LLM_CONCURRENCY", "5"))
+
+_pdf_executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf")
+
+# Heavy dependencies are imported on first use (pdfplumber on the first PDF,
+# NumPy on the first batch workload) so the app starts quickly. The Anthropic
+# SDK and LLM client are loaded in the background right after startup instead
+# of by the first LLM request; SYLLABUS_WARMUP=1 also loads the PDF and batch
+# tooling before the app starts serving.
+PRELOAD_LLM_CLIENT = os.environ.get("SYLLABUS_PRELOAD_LLM", "1") == "1"
+WARMUP_ENABLED = os.environ.get("SYLLABUS_WARMUP", "0") == "1"
+
+# Identical syllabi (same text, course and term) analyzed at the same time share
+# one parse, and only the first request holds an LLM slot
+_analysis_flights = SingleFlight()
+
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+_llm_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def warm_up() -> None:
+    """
+    Load everything the first requests would otherwise pay for.
+
+    Imports PDF tooling and the NumPy batch engine, and runs a tiny syllabus
+    through rule-based extraction and workload aggregation. Called at
+    startup when SYLLABUS_WARMUP=1; safe to call again.
+    """
+    from backend.parser import extract_assignments_rule_based
+    from backend.workload_batch import compute_weekly_workload_batch
+    from backend.workload_query import WorkloadIndex
+
+    pdf_extract.preload()
+    assignments, _ = extract_assignments_rule_based("Homework 1 - Due October 15, 2024", "WARMUP")
+    compute_weekly_workload_batch(assignments)
+    WorkloadIndex(assignments).top_weeks(1)
+    compute_weekly_workload(assignments)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    if PRELOAD_LLM_CLIENT:
+        # Not awaited: requests are served while the SDK loads, and an LLM
+        # call that arrives first waits on the same import
+        loop.run_in_executor(None, llm.preload)
+    if WARMUP_ENABLED:
+        await loop.run_in_executor(None, warm_up)
+    yield
+    jobs.shutdown()
+    pdf_extract.shutdown()
 
 
-app = FastAPI(title="Syllabus to Plan")
+app = FastAPI(title="Syllabus to Plan", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,11 +94,100 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Plain ASGI rather than @app.middleware("http"), which runs every request
+# and streamed body through an extra task and memory channel
+app.add_middleware(metrics.RequestTimingMiddleware)
+
+
+def throttled_error(error: LLMThrottledError) -> HTTPException:
+    """
+    Map LLM API throttling to HTTP 503 with a Retry-After hint.
+
+    Args:
+        error: Error raised once retries ran out
+
+    Returns:
+        HTTPException to raise
+    """
+    retry_after = math.ceil(error.retry_after) if error.retry_after else 30
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(retry_after)})
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore limiting concurrent LLM calls on the running event loop.
+
+    Returns:
+        asyncio.Semaphore with LLM_CONCURRENCY slots
+    """
+    global _llm_semaphore, _llm_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _llm_semaphore is None or _llm_semaphore_loop is not loop:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        _llm_semaphore_loop = loop
+    return _llm_semaphore
+
+
+def workload_term(
+    term: Union[str, TermCalendar, None],
+    assignments: list[AssignmentRecord],
+    text: str = "",
+) -> Optional[TermCalendar]:
+    """
+    Get the term to number workload weeks by.
+
+    Uses the term label (or calendar) if given, then the syllabus text,
+    then the due dates themselves, so every endpoint numbers weeks the
+    same way whether or not the user named the term.
+
+    Args:
+        term: Term label, TermCalendar or None
+        assignments: Assignments the workload is computed for
+        text: Raw syllabus text, if there is a single one
+
+    Returns:
+        TermCalendar, or None if nothing gives a term
+    """
+    calendar = resolve_term(term, text)
+    if calendar is None:
+        calendar = infer_term_from_dates([a.due_date for a in assignments])
+    return calendar
+
+
+async def parse_with_limit(
+    text: str,
+    course: str,
+    term: Union[str, TermCalendar, None] = None,
+) -> ParseResult:
+    """
+    Parse a syllabus while holding one of the LLM concurrency slots.
+
+    Requests for a syllabus that is already being parsed for the same
+    course and term wait for that parse instead of starting another.
+
+    Args:
+        text: Raw syllabus text
+        course: Course code
+        term: Term label or TermCalendar; inferred from the text if not given
+
+    Returns:
+        Extracted assignments and whether the extraction is complete
+    """
+    term = resolve_term(term, text)
+
+    async def parse() -> ParseResult:
+        async with get_llm_semaphore():
+            return await parse_syllabus_result_async(text, course, term)
+
+    result = await _analysis_flights.run_async(result_cache_key(text, course, term), parse)
+    return ParseResult(list(result.assignments), result.complete)
 
 
 class AnalyzeRequest(BaseModel):
     course: str
     text: str
+    # e.g. "Fall 2026"; inferred from the syllabus if not given
+    term: Optional[str] = None
 
 
 class AnalyzeResponse(BaseModel):
@@ -29,6 +195,90 @@ class AnalyzeResponse(BaseModel):
     weekly_workload: list[WeeklyWorkload]
 
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+
+
+class BatchWorkloadRequest(BaseModel):
+    courses: dict[str, list[Assignment]]
+    students: dict[str, list[str]]
+
+
+class BatchWorkloadResponse(BaseModel):
+    workloads: dict[str, list[WeeklyWorkload]]
+
+
+class WorkloadQueryRequest(BaseModel):
+    courses: dict[str, list[Assignment]]
+    # Course codes keyed by student ID; without it each course counts once
+    students: Optional[dict[str, list[str]]] = None
+    term: Optional[str] = None
+    top_k: int = Field(3, ge=0)
+    window_weeks: int = Field(2, ge=1)
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class WorkloadSummary(BaseModel):
+    start_date: date
+    end_date: date
+    assignment_count: int
+    intensity_score: float
+    assignments_by_type: dict[str, int]
+    intensity_by_course: dict[str, float]
+
+
+class WorkloadQueryResponse(BaseModel):
+    summary: Optional[WorkloadSummary]
+    top_weeks: list[WeeklyWorkload]
+    peak_window: Optional[WorkloadSummary]
+    heatmap_start_date: Optional[date]
+    heatmap: list[list[float]]
+
+
+def json_response(body) -> Response:
+    return Response(json.dumps(body, separators=(",", ":")), media_type="application/json")
+
+
+def plan_response(
+    assignments: list[AssignmentRecord],
+    weekly_workload: list[WeeklyWorkloadRecord],
+) -> Response:
+    """
+    Serialize an AnalyzeResponse body straight from internal records.
+
+    Produces the same JSON as AnalyzeResponse without building and
+    validating a Pydantic model per assignment and week.
+
+    Args:
+        assignments: Extracted assignments
+        weekly_workload: Weekly workload summaries
+
+    Returns:
+        application/json Response
+    """
+    return json_response({
+        "assignments": [a.to_json() for a in assignments],
+        "weekly_workload": [week.to_json() for week in weekly_workload],
+    })
+
+
+def analyze_response(
+    assignments: list[AssignmentRecord],
+    weekly_workload: list[WeeklyWorkloadRecord],
+) -> AnalyzeResponse:
+    """
+    Build an AnalyzeResponse model from internal records without revalidating them.
+    """
+    return AnalyzeResponse.model_construct(
+        assignments=[a.to_model() for a in assignments],
+        weekly_workload=[week.to_model() for week in weekly_workload],
+    )
+
+
 @app.get("/")
 def serve_frontend():
     """
@@ -45,43 +295,492 @@ def health_check():
     return {"status": "ok"}
 
 
+def _cache_gauge(field: str) -> dict:
+    result_cache = get_result_cache()
+    text_cache = pdf_extract.get_text_cache()
+    return {
+        ("llm_results",): result_cache.stats()[field] if result_cache else None,
+        ("pdf_text",): text_cache.stats()[field] if text_cache else None,
+    }
+
+
+metrics.Gauge(
+    "syllabus_cache_hit_ratio", "Hit ratio of each cache since startup.",
+    labelnames=("cache",), callback=lambda: _cache_gauge("hit_ratio"),
+)
+metrics.Gauge(
+    "syllabus_cache_entries", "Entries stored in each cache.",
+    labelnames=("cache",), callback=lambda: _cache_gauge("entries"),
+)
+metrics.Gauge(
+    "syllabus_coalesced_calls", "Calls that waited for an identical in-flight call.",
+    labelnames=("level",),
+    callback=lambda: {
+        ("analysis",): _analysis_flights.stats()["coalesced"],
+        ("llm",): chunk_flights.stats()["coalesced"],
+    },
+)
+metrics.Gauge(
+    "syllabus_llm_rate_limit", "LLM governor state: concurrency limit, calls in flight, retries.",
+    labelnames=("field",),
+    callback=lambda: {(field,): value for field, value in get_governor().stats().items()},
+)
+metrics.Gauge(
+    "syllabus_jobs", "Background jobs by status.",
+    labelnames=("status",),
+    callback=lambda: {
+        (status,): count for status, count in jobs.get_job_queue().stats().items()
+        if status in (jobs.QUEUED, jobs.RUNNING, jobs.DONE, jobs.FAILED)
+    },
+)
+
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Export stage latencies, request latencies, LLM token counts and cache
+    statistics in the Prometheus text format.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Report hit/miss counts and size of the LLM result and PDF text caches,
+    how many analyses and LLM calls were coalesced with identical in-flight
+    ones, and the LLM rate limiter's state.
+    """
+    result_cache = get_result_cache()
+    text_cache = pdf_extract.get_text_cache()
+    return {
+        "llm_results": result_cache.stats() if result_cache else None,
+        "pdf_text": text_cache.stats() if text_cache else None,
+        "coalesced": {
+            "analyses": _analysis_flights.stats(),
+            "llm_calls": chunk_flights.stats(),
+        },
+        "llm_rate_limit": get_governor().stats(),
+    }
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_syllabus(request: AnalyzeRequest):
+async def analyze_syllabus(request: AnalyzeRequest):
     """
     Parse syllabus text and return assignments with weekly workload analysis.
 
     Args:
-        request: Contains course code and raw syllabus text
+        request: Contains course code, raw syllabus text and optional term
 
     Returns:
         Assignments and weekly workload summaries
     """
     try:
-        assignments = parse_syllabus(request.text, request.course)
-        weekly_workload = compute_weekly_workload(assignments)
+        term = resolve_term(request.term, request.text)
+        assignments = (await parse_with_limit(request.text, request.course, term)).assignments
+        weekly_workload = compute_weekly_workload(assignments, workload_term(term, assignments))
 
-        return AnalyzeResponse(
-            assignments=assignments,
-            weekly_workload=weekly_workload
-        )
+        return plan_response(assignments, weekly_workload)
+    except LLMThrottledError as e:
+        raise throttled_error(e)
     except Exception:
-        return AnalyzeResponse(
-            assignments=[],
-            weekly_workload=[]
+        return plan_response([], [])
+
+
+@app.post("/analyze/stream")
+async def analyze_syllabus_stream(request: AnalyzeRequest):
+    """
+    Parse syllabus text, streaming results as newline-delimited JSON.
+
+    Each assignment is sent on its own line as soon as it is extracted:
+        {"type": "assignment", "assignment": {...}}
+    If the LLM API keeps throttling requests, an error line is sent
+    before it:
+        {"type": "error", "status": 503, "detail": "..."}
+    The last line carries the weekly workload for everything sent:
+        {"type": "weekly_workload", "weekly_workload": [...]}
+
+    Args:
+        request: Contains course code, raw syllabus text and optional term
+
+    Returns:
+        StreamingResponse with media type application/x-ndjson
+    """
+    term = resolve_term(request.term, request.text)
+
+    async def generate():
+        assignments = []
+        try:
+            async with get_llm_semaphore():
+                async for assignment in stream_syllabus(request.text, request.course, term):
+                    assignments.append(assignment)
+                    yield json.dumps({
+                        "type": "assignment",
+                        "assignment": assignment.to_json(),
+                    }) + "\n"
+        except LLMThrottledError as e:
+            yield json.dumps({"type": "error", "status": 503, "detail": str(e)}) + "\n"
+        except Exception:
+            pass
+
+        assignments.sort(key=lambda a: a.due_date)
+        weekly_workload = compute_weekly_workload(assignments, workload_term(term, assignments))
+        yield json.dumps({
+            "type": "weekly_workload",
+            "weekly_workload": [week.to_json() for week in weekly_workload],
+        }) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.post("/workload/batch", response_model=BatchWorkloadResponse)
+def compute_batch_workload(request: BatchWorkloadRequest):
+    """
+    Compute weekly workloads for many students from already-extracted courses.
+
+    Each course's assignments are aggregated once and shared by every
+    student enrolled in it; no LLM calls are made.
+
+    Args:
+        request: Assignments keyed by course code and course codes keyed by student ID
+
+    Returns:
+        Weekly workload summaries keyed by student ID
+    """
+    from backend.workload_batch import compute_cohort_workloads
+
+    try:
+        workloads = compute_cohort_workloads(request.courses, request.students)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return json_response({
+        "workloads": {
+            student_id: [week.to_json() for week in weeks]
+            for student_id, weeks in workloads.items()
+        }
+    })
+
+
+@app.post("/workload/query", response_model=WorkloadQueryResponse)
+def query_workload(request: WorkloadQueryRequest):
+    """
+    Answer peak-week, window and heatmap questions about a workload.
+
+    The courses (or, with students, the whole cohort, each course weighted
+    by its enrollment) are indexed once with prefix sums; every part of the
+    response is then a constant-time or small lookup.
+
+    Args:
+        request: Assignments keyed by course code, optional enrollments and
+            term, the number of heaviest weeks, the window length in weeks
+            and the date range of the summary and heatmap
+
+    Returns:
+        Summary of the range, heaviest weeks, heaviest window of
+        window_weeks weeks and a daily heatmap (one row per week)
+    """
+    from backend.workload_query import WorkloadIndex, WorkloadSpanError
+
+    term = parse_term(request.term) if request.term else None
+    try:
+        if request.students is None:
+            index = WorkloadIndex([a for assignments in request.courses.values() for a in assignments], term=term)
+        else:
+            index = WorkloadIndex.from_cohort(request.courses, request.students, term)
+    except WorkloadSpanError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    summary = index.summary(request.start, request.end)
+    peak_window = index.peak_window(request.window_weeks)
+    heatmap_start, heatmap = index.heatmap(request.start, request.end)
+    return json_response({
+        "summary": summary.to_json() if summary else None,
+        "top_weeks": [week.to_json() for week in index.top_weeks(request.top_k)],
+        "peak_window": peak_window.to_json() if peak_window else None,
+        "heatmap_start_date": heatmap_start.isoformat() if heatmap_start else None,
+        "heatmap": heatmap,
+    })
+
+
+@app.get("/plan", response_model=AnalyzeResponse)
+def get_plan(
+    courses: list[str] = Query(...),
+    term: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """
+    Assemble a plan from courses already stored in the catalog.
+
+    Args:
+        courses: Course codes
+        term: Term the courses were uploaded for
+        start: Earliest due date to include
+        end: Latest due date to include
+
+    Returns:
+        Assignments and weekly workload summaries
+    """
+    store = get_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Course catalog is disabled")
+
+    assignments = store.get_assignments(courses, term, start, end)
+    return plan_response(assignments, compute_weekly_workload(assignments, workload_term(term, assignments)))
+
+
+async def read_pdf_file(
+    file: UploadFile,
+    course: str,
+    term: Optional[str] = None,
+) -> tuple[str, Optional[list[AssignmentRecord]], Optional[str]]:
+    """
+    Spool an uploaded PDF and get its stored assignments or its text.
+
+    The upload is spooled to a temporary file and answered from the course
+    catalog if the same PDF was already analyzed for this course and term.
+    Otherwise text extraction runs in a worker thread (which fans large
+    documents out to the PDF process pool) unless the same PDF was extracted
+    before.
+
+    Args:
+        file: Uploaded PDF file
+        course: Course code for this file
+        term: Optional term label the course is stored under
+
+    Returns:
+        (SHA-256 of the upload, stored assignments or None, extracted text
+        or None if the assignments were stored)
+    """
+    loop = asyncio.get_running_loop()
+    store = get_store()
+
+    try:
+        with metrics.timed("upload_read"):
+            path, digest = await pdf_extract.spool_upload(file)
+        try:
+            stored = await store.find_course_async(course, term, digest) if store else None
+            if stored is not None:
+                return digest, stored, None
+            with metrics.timed("pdf_extract"):
+                text_content = await loop.run_in_executor(
+                    _pdf_executor, pdf_extract.extract_text_cached, path, digest
+                )
+        finally:
+            os.unlink(path)
+    except pdf_extract.PDFLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if not text_content.strip():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Could not extract text from PDF: {file.filename}"
+        )
+    return digest, None, text_content
+
+
+async def analyze_pdf_file(file: UploadFile, course: str, term: Optional[str] = None) -> list[AssignmentRecord]:
+    """
+    Run the extract + parse pipeline for a single uploaded PDF.
+
+    See read_pdf_file for extraction; the LLM call is awaited on the shared
+    async client, so several files can be processed at the same time.
+
+    Args:
+        file: Uploaded PDF file
+        course: Course code for this file
+        term: Optional term label the course is stored under and dated in
+
+    Returns:
+        Assignments extracted from the file
+    """
+    digest, stored, text_content = await read_pdf_file(file, course, term)
+    if stored is not None:
+        return stored
+
+    result = await parse_with_limit(text_content, course, term)
+    # A failed window or unrepaired items leave the result partial; the next
+    # upload should retry it instead of being served the gap from the catalog
+    store = get_store()
+    if store and result.complete:
+        await store.save_course_async(course, term, digest, result.assignments)
+    return result.assignments
+
+
+async def analyze_pdf_files_packed(
+    files: list[UploadFile],
+    courses: list[str],
+    term: Optional[str] = None,
+) -> list[list[AssignmentRecord]]:
+    """
+    Extract all uploaded PDFs, then parse them together so short syllabi
+    share LLM requests (see parse_syllabi_results_async).
+
+    Args:
+        files: Uploaded PDF files
+        courses: Course code for each file
+        term: Optional term label the courses are stored under
+
+    Returns:
+        Assignments for each file, in order
+    """
+    read = await asyncio.gather(*(
+        read_pdf_file(file, course, term)
+        for file, course in zip(files, courses)
+    ))
+    pending = [i for i, (_, stored, _) in enumerate(read) if stored is None]
+
+    async with get_llm_semaphore():
+        parsed = await parse_syllabi_results_async([(read[i][2], courses[i]) for i in pending], term)
+
+    results = [stored for _, stored, _ in read]
+    complete = []
+    for i, result in zip(pending, parsed):
+        results[i] = result.assignments
+        if result.complete:
+            complete.append((courses[i], term, read[i][0], result.assignments, None))
+    store = get_store()
+    if store and complete:
+        await store.save_courses_async(complete)
+    return results
+
+
+def run_text_job(text: str, course: str, term: Optional[str] = None) -> AnalyzeResponse:
+    """
+    Job body for POST /jobs: parse syllabus text on a worker thread.
+    """
+    term = resolve_term(term, text)
+    assignments = parse_syllabus_result(text, course, term).assignments
+    return analyze_response(assignments, compute_weekly_workload(assignments, workload_term(term, assignments)))
+
+
+def run_pdf_job(path: str, digest: str, filename: str, course: str, term: Optional[str]) -> AnalyzeResponse:
+    """
+    Job body for POST /jobs/pdf: extract and parse a spooled PDF on a worker thread.
+
+    Deletes the spooled file when done.
+    """
+    store = get_store()
+    try:
+        assignments = store.find_course(course, term, digest) if store else None
+        if assignments is None:
+            with metrics.timed("pdf_extract"):
+                text_content = pdf_extract.extract_text_cached(path, digest)
+    finally:
+        os.unlink(path)
+
+    if assignments is None:
+        if not text_content.strip():
+            raise ValueError(f"Could not extract text from PDF: {filename}")
+        result = parse_syllabus_result(text_content, course, term)
+        assignments = result.assignments
+        if store and result.complete:
+            store.save_course(course, term, digest, assignments)
+
+    return analyze_response(assignments, compute_weekly_workload(assignments, workload_term(term, assignments)))
+
+
+def submit_job(fn, *args) -> JobResponse:
+    """
+    Queue a job, mapping a full queue to HTTP 429.
+    """
+    try:
+        job = jobs.get_job_queue().submit(fn, *args)
+    except jobs.QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return JobResponse(job_id=job.id, status=job.status)
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+def create_text_job(request: AnalyzeRequest):
+    """
+    Queue syllabus text for analysis and return a job ID immediately.
+
+    Args:
+        request: Contains course code, raw syllabus text and optional term
+
+    Returns:
+        Job ID and initial status; poll GET /jobs/{job_id} for the result
+    """
+    return submit_job(run_text_job, request.text, request.course, request.term)
+
+
+@app.post("/jobs/pdf", response_model=JobResponse, status_code=202)
+async def create_pdf_job(
+    file: UploadFile = File(...),
+    course: str = Form(...),
+    term: Optional[str] = Form(None)
+):
+    """
+    Queue a syllabus PDF for analysis and return a job ID immediately.
+
+    The upload is spooled to disk before the request returns; extraction
+    and parsing happen on a job worker.
+
+    Args:
+        file: Uploaded PDF file
+        course: Course code for this file
+        term: Optional term label, e.g. "Fall 2026" (also resolves dates without a year)
+
+    Returns:
+        Job ID and initial status; poll GET /jobs/{job_id} for the result
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only PDF files are supported. Invalid file: {file.filename}"
         )
 
+    try:
+        with metrics.timed("upload_read"):
+            path, digest = await pdf_extract.spool_upload(file)
+    except pdf_extract.PDFLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        return submit_job(run_pdf_job, path, digest, file.filename, course, term)
+    except HTTPException:
+        os.unlink(path)
+        raise
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    """
+    Get the status of a queued job, and its result once it is done.
+
+    Args:
+        job_id: ID returned by POST /jobs or POST /jobs/pdf
+
+    Returns:
+        Job status with result (status "done") or error (status "failed")
+    """
+    job = jobs.get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+    return JobResponse(job_id=job.id, status=job.status, result=job.result, error=job.error)
+
 
 @app.post("/analyze-pdf", response_model=AnalyzeResponse)
 async def analyze_pdf(
     files: list[UploadFile] = File(...),
-    courses: list[str] = Form(...)
+    courses: list[str] = Form(...),
+    term: Optional[str] = Form(None)
 ):
     """
     Parse syllabus PDFs and return assignments with weekly workload analysis.
 
+    Extracted courses are stored in the course catalog, so uploading the
+    same PDF again for the same course and term skips extraction.
+
     Args:
         files: List of uploaded PDF files (max 5)
         courses: List of course codes (one per file)
+        term: Optional term label, e.g. "Fall 2026" (also resolves dates without a year)
 
     Returns:
         Assignments and weekly workload summaries
@@ -109,46 +808,30 @@ async def analyze_pdf(
             )
 
     try:
-        all_assignments = []
-
-        # Process each PDF
-        for file, course in zip(files, courses):
-            content = await file.read()
-
-            # Extract text from PDF using pdfplumber
-            import io
-            text_content = ""
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n"
-
-            if not text_content.strip():
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Could not extract text from PDF: {file.filename}"
-                )
+        if parser.PACKING_ENABLED and len(files) > 1:
+            results = await analyze_pdf_files_packed(files, courses, term)
+        else:
+            # Process all PDFs concurrently
+            results = await asyncio.gather(*(
+                analyze_pdf_file(file, course, term)
+                for file, course in zip(files, courses)
+            ))
 
-            # Parse this syllabus
-            assignments = parse_syllabus(text_content, course)
+        all_assignments = []
+        for assignments in results:
             all_assignments.extend(assignments)
 
         # Sort all assignments chronologically
         all_assignments.sort(key=lambda a: a.due_date)
 
-        # Compute weekly workload across all courses
-        weekly_workload = compute_weekly_workload(all_assignments)
+        # Compute weekly workload across all courses, numbered by term week
+        weekly_workload = compute_weekly_workload(all_assignments, workload_term(term, all_assignments))
 
-        return AnalyzeResponse(
-            assignments=all_assignments,
-            weekly_workload=weekly_workload
-        )
+        return plan_response(all_assignments, weekly_workload)
 
     except HTTPException:
         raise
+    except LLMThrottledError as e:
+        raise throttled_error(e)
     except Exception:
-        return AnalyzeResponse(
-            assignments=[],
-            weekly_workload=[]
-        )
+        return plan_response([], [])
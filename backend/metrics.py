@@ -0,0 +1,391 @@
+"""
+Lightweight in-process metrics exported in the Prometheus text format.
+
+Counters and histograms are plain Python objects guarded by a lock; an
+observation is a bisect and two additions, so instrumenting hot paths
+costs well under a microsecond. Gauges are read from callbacks when
+/metrics is scraped.
+
+Usage:
+    from backend.metrics import timed
+
+    with timed("llm"):
+        content = call_llm(system_prompt, user_prompt)
+"""
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+
+METRICS_ENABLED = os.environ.get("SYLLABUS_METRICS", "1") == "1"
+
+# Seconds; covers sub-millisecond parsing up to multi-minute LLM calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonically increasing count, optionally split by labels.
+
+    Args:
+        name: Metric name
+        documentation: Help text
+        labelnames: Label names
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, *labelvalues) -> None:
+        """
+        Increase the count.
+
+        Args:
+            amount: Amount to add
+            *labelvalues: One value per label name
+        """
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        """
+        Get the current count for a label combination.
+        """
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Args:
+        name: Metric name
+        documentation: Help text
+        labelnames: Label names
+        buckets: Upper bounds of the buckets, ascending
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._children: dict[tuple, _HistogramChild] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *labelvalues) -> _HistogramChild:
+        """
+        Get the series for a label combination (cache it on hot paths).
+
+        Args:
+            *labelvalues: One value per label name
+
+        Returns:
+            Object with an observe(value) method
+        """
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """
+        Record one value.
+
+        Args:
+            value: Observed value
+            *labelvalues: One value per label name
+        """
+        if METRICS_ENABLED:
+            self.labels(*labelvalues).observe(value)
+
+    def totals(self) -> dict[tuple, tuple[int, float]]:
+        """
+        Get the observation count and sum of every series.
+
+        Returns:
+            Dictionary of {labelvalues tuple: (count, sum)}
+        """
+        with self._lock:
+            children = list(self._children.items())
+        totals = {}
+        for labelvalues, child in children:
+            with child._lock:
+                totals[labelvalues] = (child.count, child.sum)
+        return totals
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for labelvalues, child in children:
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    Current value(s) read from a callback at scrape time.
+
+    Args:
+        name: Metric name
+        documentation: Help text
+        labelnames: Label names
+        callback: Function returning {labelvalues tuple: value}; values
+            that are None are skipped
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        callback: Optional[Callable[[], dict]] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+        _registry.append(self)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        values = self.callback() if self.callback else {}
+        for labelvalues, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "syllabus_stage_duration_seconds",
+    "Time spent in each processing stage.",
+    labelnames=("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "syllabus_http_request_duration_seconds",
+    "Time from request to response headers, by route.",
+    labelnames=("method", "route", "status"),
+)
+LLM_TOKENS = Counter(
+    "syllabus_llm_tokens_total",
+    "Tokens reported by the LLM API (input excludes prompt cache reads and writes).",
+    labelnames=("direction",),
+)
+LLM_PROMPT_CACHE = Counter(
+    "syllabus_llm_prompt_cache_requests_total",
+    "LLM requests by prompt cache outcome (hit: read from the cache, write: stored in it, miss: neither).",
+    labelnames=("outcome",),
+)
+RESPONSE_ITEM_ERRORS = Counter(
+    "syllabus_llm_item_errors_total",
+    "Elements of LLM responses that failed validation, by outcome (repaired by a follow-up request, or dropped).",
+    labelnames=("outcome",),
+)
+PROMPT_FILTER_TOKENS = Counter(
+    "syllabus_prompt_filter_tokens_total",
+    "Estimated syllabus tokens kept in or removed from LLM prompts by the prompt filter.",
+    labelnames=("kind",),
+)
+
+
+class _Timer:
+    __slots__ = ("series", "start", "elapsed")
+
+    def __init__(self, series: _HistogramChild):
+        self.series = series
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
+        if METRICS_ENABLED:
+            self.series.observe(self.elapsed)
+        return False
+
+
+def timed(stage: str) -> _Timer:
+    """
+    Time a block of code as one observation of a processing stage.
+
+    Works across awaits; failed blocks are recorded too.
+
+    Args:
+        stage: Stage name, e.g. "llm" or "pdf_extract"
+
+    Returns:
+        Context manager
+    """
+    return _Timer(STAGE_SECONDS.labels(stage))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Record one observation of a processing stage timed by the caller.
+
+    Args:
+        stage: Stage name, e.g. "llm_wait"
+        seconds: Duration of the stage
+    """
+    if METRICS_ENABLED:
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+def record_llm_usage(message) -> None:
+    """
+    Count the tokens of a Messages API response and its prompt cache outcome.
+
+    Args:
+        message: anthropic Message
+    """
+    usage = message.usage
+    cache_read = usage.cache_read_input_tokens or 0
+    cache_write = usage.cache_creation_input_tokens or 0
+    LLM_TOKENS.inc(usage.input_tokens, "input")
+    LLM_TOKENS.inc(usage.output_tokens, "output")
+    LLM_TOKENS.inc(cache_read, "cache_read")
+    LLM_TOKENS.inc(cache_write, "cache_write")
+    LLM_PROMPT_CACHE.inc(1, "hit" if cache_read else "write" if cache_write else "miss")
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware recording REQUEST_SECONDS for every HTTP request.
+
+    Wraps send to take the status from the response start message, so
+    streaming bodies pass through untouched and are timed until their
+    headers. A request that fails before sending headers is recorded with
+    status 500.
+
+    Args:
+        app: ASGI application to wrap
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
+
+        async def send_timed(message) -> None:
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            if not recorded:
+                record(500)
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text format.
+
+    Returns:
+        Exposition text
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,8 @@
+from dataclasses import dataclass, field
 from datetime import date
 from enum import Enum
+from functools import lru_cache
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -29,3 +32,88 @@ class WeeklyWorkload(BaseModel):
     assignment_count: int
     intensity_score: float
     assignments_by_type: dict[str, int] = Field(default_factory=dict)
+    # Week of the academic term (1 is the first week), if the term is known
+    week_number: Optional[int] = None
+
+
+# A plan only spans a few hundred distinct dates
+_isoformat = lru_cache(maxsize=4096)(date.isoformat)
+
+
+# Internal counterparts of Assignment and WeeklyWorkload. The parser, the
+# workload aggregators and the course store build these instead of Pydantic
+# models: they have the same fields, so code that reads attributes accepts
+# either, but creating one skips validation (values are already checked by
+# whoever builds them). Pydantic models are only created at the API boundary.
+
+@dataclass(frozen=True, slots=True)
+class AssignmentRecord:
+    name: str
+    course: str
+    due_date: date
+    assignment_type: AssignmentType
+
+    @classmethod
+    def from_model(cls, assignment) -> "AssignmentRecord":
+        """
+        Copy any object with Assignment's fields into a record.
+        """
+        return cls(assignment.name, assignment.course, assignment.due_date, assignment.assignment_type)
+
+    def to_model(self) -> Assignment:
+        """
+        Build the equivalent Assignment without validating it again.
+        """
+        return Assignment.model_construct(
+            name=self.name,
+            course=self.course,
+            due_date=self.due_date,
+            assignment_type=self.assignment_type,
+        )
+
+    def to_json(self) -> dict:
+        """
+        JSON-ready dict, same as Assignment.model_dump(mode="json").
+        """
+        return {
+            "name": self.name,
+            "course": self.course,
+            "due_date": _isoformat(self.due_date),
+            "assignment_type": self.assignment_type.value,
+        }
+
+
+@dataclass(slots=True)
+class WeeklyWorkloadRecord:
+    week_start_date: date
+    week_end_date: date
+    assignment_count: int
+    intensity_score: float
+    assignments_by_type: dict[str, int] = field(default_factory=dict)
+    week_number: Optional[int] = None
+
+    def to_model(self) -> WeeklyWorkload:
+        """
+        Build the equivalent WeeklyWorkload without validating it again.
+        """
+        return WeeklyWorkload.model_construct(
+            week_start_date=self.week_start_date,
+            week_end_date=self.week_end_date,
+            assignment_count=self.assignment_count,
+            intensity_score=self.intensity_score,
+            assignments_by_type=self.assignments_by_type,
+            week_number=self.week_number,
+        )
+
+    def to_json(self) -> dict:
+        """
+        JSON-ready dict, same as WeeklyWorkload.model_dump(mode="json").
+        """
+        return {
+            "week_start_date": _isoformat(self.week_start_date),
+            "week_end_date": _isoformat(self.week_end_date),
+            "assignment_count": self.assignment_count,
+            "intensity_score": float(self.intensity_score),
+            "assignments_by_type": self.assignments_by_type,
+            "week_number": self.week_number,
+        }
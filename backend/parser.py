@@ -1,7 +1,19 @@
+import asyncio
+import hashlib
 import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date
-from typing import Optional
-from backend.models import Assignment, AssignmentType
+from typing import AsyncIterator, Optional, Union
+from backend import llm
+from backend.metrics import PROMPT_FILTER_TOKENS, RESPONSE_ITEM_ERRORS, observe_stage, record_llm_usage, timed
+from backend.ratelimit import LLMThrottledError, estimate_tokens, get_governor
+from backend.cache import CACHE_DIR, DiskCache, SingleFlight, content_hash, normalize_text
+from backend.models import AssignmentRecord, AssignmentType
+from backend.terms import TermCalendar, find_week_reference, resolve_term
 
 
 SYSTEM_PROMPT = """You are an AI assistant that extracts assignment deadlines from college course syllabi.
@@ -19,6 +31,7 @@ Rules:
 - Do NOT invent or guess dates or years
 - If the syllabus says "October 15" without a year, return "10-15" (not a full year)
 - If the syllabus says "October 15, 2024", return "2024-10-15"
+- If a due date is only given as a week of the term and a weekday (e.g. "Week 7 Thursday"), return it as written: "Week 7 Thursday"
 - If a due date is ambiguous or missing, omit the assignment
 - Do NOT include readings, participation, or vague "weekly work" without specific dates
 - CRITICAL: Use the course code from "Course: XXX" in the prompt if provided - do NOT extract course code from syllabus content
@@ -40,6 +53,178 @@ Example output:
   }
 ]"""
 
+MODEL_NAME = "claude-sonnet-4-5-20250929"
+MAX_TOKENS = 4096
+
+# Appended to SYSTEM_PROMPT when several syllabi share one request
+PACKED_PROMPT_SUFFIX = """
+
+The prompt may contain several syllabi, each starting with a line "=== Syllabus N ===" followed by its "Course: XXX" header. In that case return one JSON object instead of an array: a key for every course code in the headers, each mapping to the array of that syllabus's assignments (an empty array if it has none). Use that course code for every assignment in the syllabus.
+
+Example output for two syllabi:
+{"CSE 374": [{"name": "Problem Set 1", "course": "CSE 374", "due_date": "10-15", "assignment_type": "homework"}], "MATH 126": []}"""
+
+PACKED_SYSTEM_PROMPT = SYSTEM_PROMPT + PACKED_PROMPT_SUFFIX
+
+# Sent with only the elements of a response that failed validation
+REPAIR_SYSTEM_PROMPT = """You fix assignment records extracted from a college course syllabus that failed validation.
+
+Each input item is a record (or broken JSON text) followed by the validation error. Return ONLY a JSON array with one corrected object per item, in the same order, each with exactly these fields:
+- name (string)
+- course (string): keep the record's course code
+- due_date (string): MM-DD, or YYYY-MM-DD if the record states the year, or "Week N Weekday" if that is all it states
+- assignment_type (string): one of "exam", "homework", "project", "quiz", "other"
+
+Do NOT invent dates: leave out items whose due date cannot be read from the record. Return only valid JSON, no commentary."""
+PACK_SECTION_HEADER = "=== Syllabus {number} ==="
+
+# Changes whenever any prompt that shapes a cached result is edited (packed
+# and repaired answers are cached too), so results from an older prompt are
+# never served.
+PROMPT_VERSION = hashlib.sha256("\0".join([
+    SYSTEM_PROMPT, PACKED_SYSTEM_PROMPT, PACK_SECTION_HEADER, REPAIR_SYSTEM_PROMPT,
+]).encode("utf-8")).hexdigest()[:12]
+
+# Syllabi the rule-based extractor handles with at least this confidence
+# skip the LLM entirely. Opt-in: the extractor only knows line-oriented
+# schedules, and a wrong result it is sure about is never checked.
+RULE_FAST_PATH_ENABLED = os.environ.get("SYLLABUS_RULE_FAST_PATH", "0") == "1"
+RULE_CONFIDENCE_THRESHOLD = float(os.environ.get("SYLLABUS_RULE_CONFIDENCE", "0.8"))
+# Confidence is capped at this when any line holds several dates or several
+# deliverables, since the extractor cannot tell which date belongs to which
+RULE_AMBIGUOUS_CONFIDENCE = 0.5
+
+# Syllabi longer than this are split into windows that are extracted in
+# parallel (roughly 3k input tokens per window).
+CHUNK_MAX_CHARS = int(os.environ.get("SYLLABUS_CHUNK_MAX_CHARS", "12000"))
+CHUNK_CONCURRENCY = int(os.environ.get("SYLLABUS_CHUNK_CONCURRENCY", "4"))
+CHUNK_HEADER_LINES = 5
+
+# Lines without dates, due words or schedule headings (policies, office
+# hours, boilerplate) are dropped before the LLM call, keeping a few lines of
+# context around every line that is kept. The full text is sent if the
+# filter would keep more than PROMPT_FILTER_MAX_RATIO of it.
+PROMPT_FILTER_ENABLED = os.environ.get("SYLLABUS_PROMPT_FILTER", "1") == "1"
+PROMPT_FILTER_CONTEXT_LINES = int(os.environ.get("SYLLABUS_PROMPT_FILTER_CONTEXT_LINES", "1"))
+PROMPT_FILTER_HEADER_LINES = 2
+PROMPT_FILTER_MAX_RATIO = float(os.environ.get("SYLLABUS_PROMPT_FILTER_MAX_RATIO", "0.9"))
+
+# Short syllabi uploaded together can be packed into one LLM request of up
+# to PACK_MAX_TOKENS syllabus tokens (see parse_syllabi_async)
+PACKING_ENABLED = os.environ.get("SYLLABUS_PACK_SYLLABI", "0") == "1"
+PACK_MAX_TOKENS = int(os.environ.get("SYLLABUS_PACK_MAX_TOKENS", "6000"))
+
+# The system prompt is identical on every request, so it is marked for the
+# API's prompt cache: later calls read it from the cache instead of
+# processing it again. The API only caches prompts of at least about 1024
+# tokens (Sonnet), so shorter system prompts are simply sent uncached.
+PROMPT_CACHE_ENABLED = os.environ.get("SYLLABUS_PROMPT_CACHE", "1") == "1"
+
+# Elements of a response that fail validation are sent back to the LLM on
+# their own to be fixed, instead of discarding or re-extracting the window
+RESPONSE_REPAIR_ENABLED = os.environ.get("SYLLABUS_RESPONSE_REPAIR", "1") == "1"
+
+RESULT_CACHE_ENABLED = os.environ.get("SYLLABUS_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("SYLLABUS_CACHE_MAX_ENTRIES", "1000"))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("SYLLABUS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_result_cache: Optional[DiskCache] = None
+
+# Identical windows (same text and course) being extracted at the same
+# time share one LLM call
+chunk_flights = SingleFlight()
+
+
+def get_result_cache() -> Optional[DiskCache]:
+    """
+    Get the process-wide cache of LLM extraction results.
+
+    The cache is opened on first use. Entries written under a different
+    prompt version or model are dropped when it is opened.
+
+    Returns:
+        DiskCache instance, or None if result caching is disabled
+    """
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_ENABLED:
+        _result_cache = DiskCache(
+            os.path.join(CACHE_DIR, "llm_results.sqlite3"),
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+        )
+        _result_cache.retain_only(result_cache_tag())
+    return _result_cache
+
+
+def set_result_cache(cache: Optional[DiskCache]) -> None:
+    """
+    Replace the process-wide result cache (None disables caching).
+
+    Args:
+        cache: DiskCache to use for LLM extraction results
+    """
+    global _result_cache, RESULT_CACHE_ENABLED
+    _result_cache = cache
+    RESULT_CACHE_ENABLED = cache is not None
+
+
+def result_cache_tag() -> str:
+    """
+    Tag identifying the prompt and model that produced a cached result.
+
+    Returns:
+        Tag string
+    """
+    return f"{MODEL_NAME}:{PROMPT_VERSION}"
+
+
+def result_cache_key(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> str:
+    """
+    Build the content-addressed cache key for an extraction request.
+
+    Repaired, packed and streamed results are cached as records whose dates
+    were resolved in the request's term, so the term is part of the key.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Optional course code the request was made with
+        term: Calendar the due dates were resolved in
+
+    Returns:
+        Hex digest identifying the request
+    """
+    return content_hash(
+        normalize_text(syllabus_text),
+        course_code or "",
+        term.name if term else "",
+        term.start.isoformat() if term else "",
+        PROMPT_VERSION,
+        MODEL_NAME,
+    )
+
+
+def invalidate_result_cache(all_entries: bool = False) -> int:
+    """
+    Drop cached extraction results.
+
+    Args:
+        all_entries: If True drop everything, otherwise only entries produced
+            by a prompt or model other than the current one
+
+    Returns:
+        Number of entries removed
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return 0
+    if all_entries:
+        return cache.invalidate()
+    return cache.retain_only(result_cache_tag())
+
 
 def call_llm(system_prompt: str, user_prompt: str) -> str:
     """
@@ -51,33 +236,186 @@ def call_llm(system_prompt: str, user_prompt: str) -> str:
 
     Returns:
         Raw text response from Claude
+
+    Raises:
+        LLMThrottledError: If the API keeps throttling the request
     """
-    import os
-    from anthropic import Anthropic
+    client = llm.get_client()
+    requests = []
 
-    client = Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
+    def send():
+        # Only the request itself counts as "llm"; rate-limit waits and
+        # retry backoff around it go to "llm_wait"
+        timer = timed("llm")
+        requests.append(timer)
+        with timer:
+            return client.messages.create(
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=system_param(system_prompt),
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+
+    started = time.perf_counter()
+    try:
+        message = get_governor().call(
+            send,
+            estimated_tokens=estimate_tokens(system_prompt + user_prompt),
+            used_tokens=message_tokens,
+        )
+    finally:
+        observe_stage("llm_wait", time.perf_counter() - started - sum(t.elapsed for t in requests))
+    record_llm_usage(message)
+
+    return message.content[0].text
 
-    message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=4096,
-        system=system_prompt,
-        messages=[
-            {"role": "user", "content": user_prompt}
-        ]
-    )
+
+async def call_llm_async(system_prompt: str, user_prompt: str) -> str:
+    """
+    Call Claude API without blocking the event loop.
+
+    Uses the shared async client, so many calls can be in flight on one
+    worker without a thread each.
+
+    Args:
+        system_prompt: Instructions for the LLM
+        user_prompt: User content to process
+
+    Returns:
+        Raw text response from Claude
+
+    Raises:
+        LLMThrottledError: If the API keeps throttling the request
+    """
+    client = llm.get_async_client()
+    requests = []
+
+    async def send():
+        timer = timed("llm")
+        requests.append(timer)
+        with timer:
+            return await client.messages.create(
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=system_param(system_prompt),
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+
+    started = time.perf_counter()
+    try:
+        message = await get_governor().call_async(
+            send,
+            estimated_tokens=estimate_tokens(system_prompt + user_prompt),
+            used_tokens=message_tokens,
+        )
+    finally:
+        observe_stage("llm_wait", time.perf_counter() - started - sum(t.elapsed for t in requests))
+    record_llm_usage(message)
 
     return message.content[0].text
 
 
-def normalize_date(date_str: str) -> date:
+async def stream_llm_async(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+    """
+    Call Claude API with streaming output.
+
+    Args:
+        system_prompt: Instructions for the LLM
+        user_prompt: User content to process
+
+    Yields:
+        Pieces of response text as they arrive
+
+    Raises:
+        LLMThrottledError: If the API keeps throttling the request
+    """
+    client = llm.get_async_client()
+    governor = get_governor()
+    estimated = estimate_tokens(system_prompt + user_prompt)
+    attempt = 0
+
+    while True:
+        await governor.admit_async(estimated)
+        started = False
+        try:
+            async with client.messages.stream(
+                model=MODEL_NAME,
+                max_tokens=MAX_TOKENS,
+                system=system_param(system_prompt),
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            ) as stream:
+                async for text in stream.text_stream:
+                    started = True
+                    yield text
+                message = await stream.get_final_message()
+        except BaseException as e:
+            governor.finish(e, estimated)
+            # Text already passed on cannot be taken back, so only retry
+            # throttling that happens before the first piece
+            if started or not isinstance(e, Exception):
+                raise
+            delay = governor.retry_delay(e, attempt)
+            if delay is None:
+                raise
+        else:
+            governor.finish(None, estimated, message_tokens(message))
+            record_llm_usage(message)
+            return
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def system_param(system_prompt: str) -> Union[str, list[dict]]:
+    """
+    Build the system parameter of a Messages API request.
+
+    Args:
+        system_prompt: Instructions for the LLM
+
+    Returns:
+        One text block with a prompt cache breakpoint, or the plain prompt
+        if PROMPT_CACHE_ENABLED is off
+    """
+    if not PROMPT_CACHE_ENABLED:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def message_tokens(message) -> int:
+    """
+    Count the tokens a Messages API response used against rate limits.
+
+    Prompt cache reads do not count toward the input token limit, but
+    cache writes do.
+
+    Args:
+        message: anthropic Message
+
+    Returns:
+        Input plus cache write plus output tokens
+    """
+    usage = message.usage
+    return usage.input_tokens + (usage.cache_creation_input_tokens or 0) + usage.output_tokens
+
+
+def normalize_date(date_str: str, term: Optional[TermCalendar] = None) -> date:
     """
     Normalize date string to a date object.
 
-    If date is in MM-DD format, prepends current year.
+    If date is in MM-DD format, takes the year from the term (see
+    TermCalendar.resolve), or the current year if there is no term.
     If date is in YYYY-MM-DD format, uses it as-is.
+    With a term, week references like "Week 7 Thursday" are resolved too.
 
     Args:
         date_str: Date string in either MM-DD or YYYY-MM-DD format
+        term: Calendar of the syllabus's term
 
     Returns:
         date object
@@ -88,61 +426,1535 @@ def normalize_date(date_str: str) -> date:
     if len(date_str) == 10 and date_str[4] == '-':
         return date.fromisoformat(date_str)
 
-    # Year not present (MM-DD format), use current year
+    # Year not present (MM-DD format)
     if len(date_str) == 5 and date_str[2] == '-':
+        if term is not None:
+            return term.resolve(int(date_str[:2]), int(date_str[3:]))
         current_year = date.today().year
         full_date = f"{current_year}-{date_str}"
         return date.fromisoformat(full_date)
 
+    if term is not None:
+        found = find_week_reference(date_str)
+        if found is not None:
+            _, week, weekday = found
+            return term.resolve_week_day(week, weekday)
+
     # Try parsing as-is for other formats
     return date.fromisoformat(date_str)
 
 
-def parse_syllabus(syllabus_text: str, course_code: Optional[str] = None) -> list[Assignment]:
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+DATE_PATTERNS = [
+    # October 15, 2024 / Oct. 15th / Sept 3 (but not "marks 10")
+    re.compile(
+        r"\b(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+        r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?\s+"
+        r"(?P<day>\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s*(?P<year>\d{4})\b)?",
+        re.IGNORECASE,
+    ),
+    # 2024-10-15
+    re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b"),
+    # 10/15/2024 / 10/15/24
+    re.compile(r"\b(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})\b"),
+    # due 10/15 / due: Tue 10/15; without a year, a bare 3/4 is as likely a
+    # section or a score as a date
+    re.compile(
+        r"\b(?:due|by|date)\b:?\s*(?:(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s*)?"
+        r"(?P<month>\d{1,2})/(?P<day>\d{1,2})\b(?!/)",
+        re.IGNORECASE,
+    ),
+]
+
+# Checked in order; the first matching keyword decides the type.
+TYPE_KEYWORDS = [
+    (AssignmentType.EXAM, re.compile(
+        r"\b(exam|midterm)s?\b|\bfinal\b(?!\s+(project|paper|report|essay|presentation))", re.IGNORECASE
+    )),
+    (AssignmentType.QUIZ, re.compile(r"\bquiz(zes)?\b", re.IGNORECASE)),
+    (AssignmentType.PROJECT, re.compile(r"\b(project|proposal|presentation|milestone)s?\b", re.IGNORECASE)),
+    (AssignmentType.HOMEWORK, re.compile(
+        r"\b(homework|hw\s*\d*|problem\s+sets?|psets?|assignments?|labs?|exercises?)\b", re.IGNORECASE
+    )),
+    (AssignmentType.OTHER, re.compile(r"\b(essay|paper|report|submission|deliverable)s?\b", re.IGNORECASE)),
+]
+
+# Items the LLM prompt tells the model to leave out.
+EXCLUDED_KEYWORDS = re.compile(r"\b(reading|readings|participation|no class|holiday|break)\b", re.IGNORECASE)
+DUE_KEYWORD = re.compile(r"\bdue\b", re.IGNORECASE)
+
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_NOISE = (
+    r"(?:[\s\-–—:|,;()]|\b(?:due|on|by)\b"
+    r"|\b(?:mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:rs?|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\b\.?)+"
+)
+EDGE_NOISE = re.compile(f"^{_NOISE}|{_NOISE}$", re.IGNORECASE)
+# "Week 2 (Oct 5): Homework 1" -- the week label is not the item's name
+WEEK_LABEL = re.compile(r"^week\s+\d{1,2}\b[\s:|\-–—,.]*", re.IGNORECASE)
+# Deliverable keywords separated by at most this are one name ("Final Exam")
+KEYWORD_JOINER = re.compile(r"^[\s\-–—]*$")
+
+
+def classify_assignment_type(name: str) -> Optional[AssignmentType]:
     """
-    Parse syllabus text and extract assignments.
+    Classify an assignment by keywords in its name.
+
+    Args:
+        name: Assignment name or syllabus line
+
+    Returns:
+        AssignmentType, or None if no deliverable keyword is present
+    """
+    for assignment_type, pattern in TYPE_KEYWORDS:
+        if pattern.search(name):
+            return assignment_type
+    return None
+
+
+def _find_date(line: str) -> Optional[tuple[re.Match, str]]:
+    """
+    Find the first date in a line.
+
+    Returns:
+        (match, date string in YYYY-MM-DD or MM-DD form), or None
+    """
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(line)
+        if match is None:
+            continue
+
+        month = match.group("month")
+        month = MONTHS[month[:3].lower()] if month.isalpha() else int(month)
+        day = int(match.group("day"))
+        year = match.groupdict().get("year")
+
+        if year is None:
+            return match, f"{month:02d}-{day:02d}"
+        if len(year) == 2:
+            year = f"20{year}"
+        return match, f"{year}-{month:02d}-{day:02d}"
+    return None
+
+
+def _count_dates(line: str) -> int:
+    # Non-overlapping date matches of any pattern
+    spans = sorted(match.span() for pattern in DATE_PATTERNS for match in pattern.finditer(line))
+    count, end = 0, -1
+    for span_start, span_end in spans:
+        if span_start >= end:
+            count += 1
+            end = span_end
+        else:
+            end = max(end, span_end)
+    return count
+
+
+def _count_deliverables(line: str) -> int:
+    # Deliverable keywords, with adjacent ones ("Project Proposal") counted once
+    spans = sorted(match.span() for _, pattern in TYPE_KEYWORDS for match in pattern.finditer(line))
+    count, end = 0, None
+    for span_start, span_end in spans:
+        if end is None or (span_start > end and not KEYWORD_JOINER.match(line[end:span_start])):
+            count += 1
+        end = span_end if end is None else max(end, span_end)
+    return count
+
+
+def _clean_name(text: str) -> str:
+    return EDGE_NOISE.sub("", text).strip()
+
+
+def _pick_name(line: str, match: re.Match) -> str:
+    # Name the item after the text on the side of the date that holds a
+    # deliverable keyword, preferring the text before it
+    before = _clean_name(WEEK_LABEL.sub("", _clean_name(line[:match.start()])))
+    after = _clean_name(WEEK_LABEL.sub("", _clean_name(line[match.end():])))
+    for candidate in (before, after):
+        if candidate and classify_assignment_type(candidate) is not None:
+            return candidate
+    return before or after
+
+
+def extract_assignments_rule_based(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], float]:
+    """
+    Extract assignments with regular expressions instead of the LLM.
+
+    Handles line-oriented schedules such as "Homework 1 - Due October 15, 2024"
+    or "Oct 15 | Quiz 2", and with a term also "Lab 2 - Week 7 Thursday".
+    Lines are split on ";" into separate items. Lines that carry a date but
+    no recognizable deliverable, and lines that say something is due
+    without a readable date, count against the confidence score; a line
+    with several dates or deliverables caps it at RULE_AMBIGUOUS_CONFIDENCE.
 
     Args:
         syllabus_text: Raw text content of the syllabus
-        course_code: Optional course code to use for all assignments (overrides LLM extraction)
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve dates without a year and week references
+
+    Returns:
+        (assignments, confidence) where confidence is between 0.0 and 1.0
+    """
+    course = course_code or "UNKNOWN"
+    assignments = []
+    seen = set()
+    unresolved = 0
+    ambiguous = False
+
+    segments = (segment for raw_line in syllabus_text.splitlines() for segment in raw_line.split(";"))
+    for segment in segments:
+        line = LIST_MARKER.sub("", segment).strip()
+        if not line:
+            continue
+
+        if EXCLUDED_KEYWORDS.search(line):
+            continue
+
+        found = _find_date(line)
+        if found is None and term is not None:
+            week_reference = find_week_reference(line)
+            if week_reference is not None:
+                match = week_reference[0]
+                found = match, match.group(0)
+        if found is None:
+            if DUE_KEYWORD.search(line):
+                unresolved += 1
+            continue
+
+        match, date_str = found
+        assignment_type = classify_assignment_type(line)
+        if assignment_type is None:
+            unresolved += 1
+            continue
+        if _count_dates(line) > 1 or _count_deliverables(line) > 1:
+            ambiguous = True
+
+        name = _pick_name(line, match)
+        try:
+            due_date = normalize_date(date_str, term)
+        except ValueError:
+            unresolved += 1
+            continue
+        if not name:
+            unresolved += 1
+            continue
+
+        if (name, due_date) in seen:
+            continue
+        seen.add((name, due_date))
+
+        assignments.append(AssignmentRecord(
+            name=name,
+            course=course,
+            due_date=due_date,
+            assignment_type=assignment_type
+        ))
+
+    if not assignments:
+        return [], 0.0
+    confidence = len(assignments) / (len(assignments) + unresolved)
+    if ambiguous:
+        confidence = min(confidence, RULE_AMBIGUOUS_CONFIDENCE)
+    return assignments, confidence
+
+
+def item_to_assignment(
+    item: dict,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> AssignmentRecord:
+    """
+    Convert one item of the LLM's JSON array into an AssignmentRecord.
+
+    Args:
+        item: Dictionary with name, course, due_date and assignment_type
+        course_code: Optional course code to use instead of the item's course
+        term: Calendar used to resolve the due date (see normalize_date)
+
+    Returns:
+        AssignmentRecord
+
+    Raises:
+        ValueError, KeyError: If the item is missing fields or has bad values
+    """
+    name = item["name"]
+    if not isinstance(name, str):
+        raise ValueError(f"Assignment name must be a string: {name!r}")
+
+    # Normalize the date (add current year if missing)
+    normalized_date = normalize_date(item["due_date"], term)
+
+    # Use user-provided course code if available, otherwise use LLM extraction
+    final_course = course_code if course_code else item["course"]
+    if not isinstance(final_course, str):
+        raise ValueError(f"Course must be a string: {final_course!r}")
+
+    return AssignmentRecord(
+        name=name,
+        course=final_course,
+        due_date=normalized_date,
+        assignment_type=AssignmentType(item["assignment_type"])
+    )
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parse a JSON array that arrives in pieces, returning each element as
+    soon as it is complete.
+
+    Anything before the opening "[" (prose, markdown fences) and after the
+    closing "]" is ignored. Elements that fail to decode are skipped,
+    counted in errors and kept as raw text in failed.
+    """
+
+    def __init__(self):
+        self.errors = 0
+        self.failed: list[str] = []
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._pending = ""
+
+    def feed(self, text: str) -> list:
+        """
+        Consume the next piece of text.
+
+        Args:
+            text: Next piece of the streamed response
+
+        Returns:
+            Elements that were completed by this piece
+        """
+        items = []
+        element_start = 0 if self._depth else None
+
+        for i, ch in enumerate(text):
+            if self._finished:
+                break
+
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+
+            if self._depth == 0:
+                if ch == "{" or ch == "[":
+                    self._depth = 1
+                    element_start = i
+                elif ch == "]":
+                    self._finished = True
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = self._pending + text[element_start:i + 1]
+                    self._pending = ""
+                    element_start = None
+                    try:
+                        items.append(json.loads(raw))
+                    except ValueError:
+                        self.errors += 1
+                        self.failed.append(raw)
+
+        if self._depth and element_start is not None:
+            self._pending += text[element_start:]
+
+        return items
+
+    @property
+    def complete(self) -> bool:
+        """Whether the closing "]" of the array has been seen."""
+        return self._finished
+
+    @property
+    def pending(self) -> str:
+        """Text of the element that is still open, if any."""
+        return self._pending
+
+
+@dataclass(slots=True)
+class ItemError:
+    """
+    An element of an LLM response that did not become an assignment.
+
+    item is the decoded element, or its raw text if it was not valid JSON.
+    """
+    item: object
+    error: str
+
+
+# ItemError.error for a response that ends before its closing "]" (e.g. cut
+# off at max_tokens); elements after the cut are missing, so a result with
+# this error is never complete, even if the open element is repaired
+TRUNCATED_ERROR = "response cut off before the array closed"
+
+
+def is_truncated(errors: list[ItemError]) -> bool:
+    """
+    Whether errors from parse_llm_response_partial include TRUNCATED_ERROR.
+    """
+    return any(error.error == TRUNCATED_ERROR for error in errors)
+
+
+@dataclass(slots=True)
+class ParseResult:
+    """
+    Assignments extracted from a syllabus, and whether that is all of them.
+
+    complete is False when a window failed (LLM error, coalesced call
+    interrupted) or response items could not be repaired; such a result is
+    still returned, but must not be stored as the syllabus's extraction.
+    """
+    assignments: list[AssignmentRecord]
+    complete: bool = True
+
+
+_json_decoder = json.JSONDecoder()
+
+
+def decode_json_value(content: str, opener: str = "["):
+    """
+    Decode the JSON value that starts at the first opener in content.
+
+    Markdown fences and prose around the value are skipped by position, so
+    the response is not copied before decoding.
+
+    Args:
+        content: Raw text returned by the LLM
+        opener: "[" for an array, "{" for an object
+
+    Returns:
+        Decoded value
+
+    Raises:
+        ValueError: If there is no opener or the value is not valid JSON
+    """
+    start = content.find(opener)
+    if start < 0:
+        raise ValueError(f"No JSON value starting with {opener!r} in response")
+    value, _ = _json_decoder.raw_decode(content, start)
+    return value
+
+
+def validate_items(
+    items: list,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], list[ItemError]]:
+    """
+    Convert each decoded element independently, keeping the valid ones.
+
+    Args:
+        items: Elements of the LLM's JSON array
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        (assignments, errors for the elements that were rejected)
+    """
+    assignments = []
+    errors = []
+    for item in items:
+        try:
+            if not isinstance(item, dict):
+                raise TypeError(f"Expected an object, got {type(item).__name__}")
+            assignments.append(item_to_assignment(item, course_code, term))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            errors.append(ItemError(item, f"{type(e).__name__}: {e}"))
+    return assignments, errors
+
+
+def parse_llm_response_partial(
+    content: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], list[ItemError]]:
+    """
+    Convert the raw LLM response, salvaging what can be salvaged.
+
+    The array is decoded in one pass. If it is not valid JSON as a whole
+    (e.g. a broken element, or output cut off at max_tokens), every element
+    that does decode is still used. Elements are validated independently.
+    A response without its closing "]" gets a TRUNCATED_ERROR error holding
+    the open element's text.
+
+    Args:
+        content: Raw text returned by the LLM
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        (valid assignments, errors for rejected elements)
+
+    Raises:
+        ValueError: If the response holds no JSON array at all
+    """
+    truncated = None
+    with timed("json_parse"):
+        try:
+            items = decode_json_value(content, "[")
+            failed = []
+        except ValueError:
+            if "[" not in content:
+                raise
+            array_parser = IncrementalJSONArrayParser()
+            items = array_parser.feed(content)
+            failed = array_parser.failed
+            if not array_parser.complete:
+                truncated = array_parser.pending
+
+    with timed("validate"):
+        assignments, errors = validate_items(items, course_code, term)
+    errors.extend(ItemError(raw, "invalid JSON") for raw in failed)
+    if truncated is not None:
+        errors.append(ItemError(truncated, TRUNCATED_ERROR))
+    return assignments, errors
+
+
+def parse_llm_response(
+    content: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> list[AssignmentRecord]:
+    """
+    Convert the raw LLM response into AssignmentRecord objects.
+
+    Args:
+        content: Raw text returned by the LLM
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        List of AssignmentRecord objects
+
+    Raises:
+        ValueError: If the response is not a valid assignment list
+    """
+    assignments, errors = parse_llm_response_partial(content, course_code, term)
+    if errors:
+        raise ValueError(f"{len(errors)} invalid item(s) in response: {errors[0].error}")
+    return assignments
+
+
+def build_repair_prompt(errors: list[ItemError]) -> str:
+    """
+    Build the user prompt asking the LLM to fix rejected elements.
+
+    Args:
+        errors: Rejected elements of an earlier response
+
+    Returns:
+        Prompt text to send with REPAIR_SYSTEM_PROMPT
+    """
+    return "\n\n".join(
+        f"Item: {error.item if isinstance(error.item, str) else json.dumps(error.item)}\nError: {error.error}"
+        for error in errors
+    )
+
+
+def finish_repair(
+    content: str,
+    errors: list[ItemError],
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], int]:
+    """
+    Parse the LLM's answer to a repair prompt and count the outcome.
 
     Returns:
-        List of Assignment objects, or empty list if parsing fails
+        (repaired assignments, number of elements still unresolved)
     """
     try:
-        user_prompt = syllabus_text
-        if course_code:
-            user_prompt = f"Course: {course_code}\n\n{syllabus_text}"
-
-        content = call_llm(SYSTEM_PROMPT, user_prompt)
-
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-
-        data = json.loads(content)
-
-        assignments = []
-        for item in data:
-            # Normalize the date (add current year if missing)
-            normalized_date = normalize_date(item["due_date"])
-
-            # Use user-provided course code if available, otherwise use LLM extraction
-            final_course = course_code if course_code else item["course"]
-
-            assignment = Assignment(
-                name=item["name"],
-                course=final_course,
-                due_date=normalized_date,
-                assignment_type=AssignmentType(item["assignment_type"])
-            )
-            assignments.append(assignment)
+        repaired, _ = parse_llm_response_partial(content, course_code, term)
+    except ValueError:
+        repaired = []
+    repaired = repaired[:len(errors)]
+    unresolved = len(errors) - len(repaired)
+    RESPONSE_ITEM_ERRORS.inc(len(repaired), "repaired")
+    RESPONSE_ITEM_ERRORS.inc(unresolved, "dropped")
+    return repaired, unresolved
 
-        return assignments
 
-    except Exception:
-        return []
+def repair_items(
+    errors: list[ItemError],
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], int]:
+    """
+    Ask the LLM to fix only the rejected elements of a response.
+
+    The request holds just those elements and their errors, not the
+    syllabus, so it costs a fraction of extracting the window again. If
+    the request fails (including throttling) the elements are dropped, so
+    the valid part of the original response is still used.
+
+    Args:
+        errors: Rejected elements from parse_llm_response_partial
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        (repaired assignments, number of elements still unresolved)
+
+    """
+    if not RESPONSE_REPAIR_ENABLED:
+        RESPONSE_ITEM_ERRORS.inc(len(errors), "dropped")
+        return [], len(errors)
+    try:
+        content = call_llm(REPAIR_SYSTEM_PROMPT, build_repair_prompt(errors))
+    except Exception:
+        content = ""
+    return finish_repair(content, errors, course_code, term)
+
+
+async def repair_items_async(
+    errors: list[ItemError],
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> tuple[list[AssignmentRecord], int]:
+    """
+    Async variant of repair_items that uses the shared async LLM client.
+    """
+    if not RESPONSE_REPAIR_ENABLED:
+        RESPONSE_ITEM_ERRORS.inc(len(errors), "dropped")
+        return [], len(errors)
+    try:
+        content = await call_llm_async(REPAIR_SYSTEM_PROMPT, build_repair_prompt(errors))
+    except Exception:
+        content = ""
+    return finish_repair(content, errors, course_code, term)
+
+
+def records_json(assignments: list[AssignmentRecord]) -> str:
+    """
+    Serialize assignments as a JSON array parse_llm_response accepts.
+    """
+    return json.dumps([assignment.to_json() for assignment in assignments])
+
+
+def build_user_prompt(syllabus_text: str, course_code: Optional[str] = None) -> str:
+    """
+    Build the user prompt, tagging it with the course code if provided.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Optional course code
+
+    Returns:
+        Prompt text to send to the LLM
+    """
+    if course_code:
+        return f"Course: {course_code}\n\n{syllabus_text}"
+    return syllabus_text
+
+
+SECTION_HEADING = re.compile(
+    r"^\s*(?:(?:week|module|unit|lecture|session|part)\s+\d+\b"
+    r"|(?:course\s+)?(?:schedule|calendar|assignments|exams|deadlines|important\s+dates)\b\s*:?\s*$)",
+    re.IGNORECASE,
+)
+
+
+def split_syllabus(syllabus_text: str, max_chars: Optional[int] = None) -> list[str]:
+    """
+    Split a long syllabus into windows for separate LLM calls.
+
+    Text is cut at page breaks and at schedule headings ("Week 7",
+    "Module 3", "Course Schedule", ...) and the sections are packed into
+    windows of at most max_chars characters. A section longer than that is
+    split on line boundaries. Every window after the first starts with the
+    first few lines of the syllabus so the model keeps the title and term
+    in view.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        max_chars: Window size; defaults to CHUNK_MAX_CHARS
+
+    Returns:
+        List of text windows (a single window for short syllabi)
+    """
+    max_chars = max_chars or CHUNK_MAX_CHARS
+    if len(syllabus_text) <= max_chars:
+        return [syllabus_text]
+
+    # Break into sections at page breaks and headings
+    sections = []
+    current = []
+    for page in syllabus_text.split("\f"):
+        for line in page.splitlines():
+            if SECTION_HEADING.match(line) and current:
+                sections.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            sections.append("\n".join(current))
+            current = []
+
+    # Split any oversized section on line boundaries
+    pieces = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        piece = []
+        size = 0
+        for line in section.splitlines():
+            if piece and size + len(line) + 1 > max_chars:
+                pieces.append("\n".join(piece))
+                piece = []
+                size = 0
+            piece.append(line)
+            size += len(line) + 1
+        if piece:
+            pieces.append("\n".join(piece))
+
+    # Pack sections into windows
+    windows = []
+    window = []
+    size = 0
+    for piece in pieces:
+        if window and size + len(piece) + 1 > max_chars:
+            windows.append("\n".join(window))
+            window = []
+            size = 0
+        window.append(piece)
+        size += len(piece) + 1
+    if window:
+        windows.append("\n".join(window))
+
+    header_lines = [line for line in syllabus_text.splitlines() if line.strip()][:CHUNK_HEADER_LINES]
+    header = "\n".join(header_lines)
+    return [windows[0]] + [f"{header}\n...\n{window}" for window in windows[1:]]
+
+
+WEEK_REFERENCE = re.compile(r"\bweek\s+\d+\b", re.IGNORECASE)
+# Anything that may be part of a date, for the prompt filter only: bare
+# m/d or m-d (schedule tables rarely repeat the year or a "due"), weekday
+# names and month names or abbreviations. Much looser than DATE_PATTERNS,
+# since a dropped line silently loses its deadline while a kept one only
+# costs a few tokens. "May" only capitalized, so "you may" is not a date.
+SCHEDULE_DATE = re.compile(
+    r"\b\d{1,2}[/-]\d{1,2}\b"
+    r"|\b(?i:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:rs?(?:day)?)?|fri(?:day)?"
+    r"|sat(?:urday)?|sun(?:day)?)s?\b"
+    r"|\b(?i:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b"
+    r"|\bMay\b"
+)
+FILTER_GAP = "..."
+
+
+def is_schedule_line(line: str) -> bool:
+    """
+    Check whether a line may carry a deadline.
+
+    Args:
+        line: One line of syllabus text
+
+    Returns:
+        True if the line may have a date (see SCHEDULE_DATE), says
+        something is due, or is a schedule heading or week reference
+    """
+    return bool(
+        SCHEDULE_DATE.search(line)
+        or DUE_KEYWORD.search(line)
+        or SECTION_HEADING.match(line)
+        or WEEK_REFERENCE.search(line)
+    )
+
+
+def filter_schedule_text(syllabus_text: str, context_lines: Optional[int] = None) -> str:
+    """
+    Drop syllabus lines that cannot contribute a deadline.
+
+    Keeps the first PROMPT_FILTER_HEADER_LINES non-empty lines (title and term),
+    every schedule line (see is_schedule_line) and context_lines lines on
+    either side of it. Runs of dropped lines are replaced by "...", and page
+    breaks are preserved. Returns the text unchanged if it has no schedule
+    lines or the filter would keep more than PROMPT_FILTER_MAX_RATIO of it.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        context_lines: Lines kept around each schedule line; defaults to
+            PROMPT_FILTER_CONTEXT_LINES
+
+    Returns:
+        Filtered text
+    """
+    if context_lines is None:
+        context_lines = PROMPT_FILTER_CONTEXT_LINES
+
+    pages = [page.split("\n") for page in syllabus_text.split("\f")]
+    lines = [line for page in pages for line in page]
+
+    keep = [False] * len(lines)
+    header = 0
+    found = False
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        if header < PROMPT_FILTER_HEADER_LINES:
+            keep[i] = True
+            header += 1
+        if is_schedule_line(line):
+            found = True
+            for j in range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)):
+                keep[j] = True
+    if not found:
+        return syllabus_text
+
+    filtered_pages = []
+    i = 0
+    for page in pages:
+        kept = []
+        for line in page:
+            if keep[i]:
+                kept.append(line)
+            elif not kept or kept[-1] != FILTER_GAP:
+                kept.append(FILTER_GAP)
+            i += 1
+        filtered_pages.append("\n".join(kept))
+    filtered = "\f".join(filtered_pages)
+
+    if len(filtered) > len(syllabus_text) * PROMPT_FILTER_MAX_RATIO:
+        return syllabus_text
+    return filtered
+
+
+def prompt_filter_report(syllabus_text: str, filtered_text: str) -> dict:
+    """
+    Summarize how many input tokens filtering saved.
+
+    Args:
+        syllabus_text: Text before filtering
+        filtered_text: Text after filter_schedule_text
+
+    Returns:
+        Dictionary with original_tokens, filtered_tokens, saved_tokens and
+        saved_ratio
+    """
+    original = estimate_tokens(syllabus_text)
+    filtered = estimate_tokens(filtered_text)
+    return {
+        "original_tokens": original,
+        "filtered_tokens": filtered,
+        "saved_tokens": original - filtered,
+        "saved_ratio": (original - filtered) / original if original else 0.0,
+    }
+
+
+def prepare_llm_text(syllabus_text: str) -> str:
+    """
+    Apply the prompt filter if enabled, counting kept and removed tokens.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+
+    Returns:
+        Text to split into windows for the LLM
+    """
+    if not PROMPT_FILTER_ENABLED:
+        return syllabus_text
+
+    with timed("prompt_filter"):
+        filtered = filter_schedule_text(syllabus_text)
+    report = prompt_filter_report(syllabus_text, filtered)
+    PROMPT_FILTER_TOKENS.inc(report["filtered_tokens"], "kept")
+    PROMPT_FILTER_TOKENS.inc(report["saved_tokens"], "removed")
+    return filtered
+
+
+def merge_assignments(assignment_lists: list[list[AssignmentRecord]]) -> list[AssignmentRecord]:
+    """
+    Merge per-chunk results, dropping duplicates by (name, due_date).
+
+    Args:
+        assignment_lists: Assignments extracted from each chunk, in order
+
+    Returns:
+        Combined list keeping the first occurrence of each assignment
+    """
+    merged = []
+    seen = set()
+    for assignments in assignment_lists:
+        for assignment in assignments:
+            key = (assignment.name.strip().casefold(), assignment.due_date)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(assignment)
+    return merged
+
+
+def merge_results(results: list[ParseResult]) -> ParseResult:
+    """
+    Merge per-chunk results (see merge_assignments); complete only if all are.
+    """
+    return ParseResult(
+        merge_assignments([result.assignments for result in results]),
+        all(result.complete for result in results),
+    )
+
+
+def extract_chunk(
+    chunk: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> ParseResult:
+    """
+    Extract assignments from one text window with the LLM, using the cache.
+
+    If the same window is already being extracted for the same course,
+    waits for that call instead of making another. Elements of the response
+    that fail validation are sent back on their own (see repair_items); the
+    valid ones are kept either way.
+
+    Args:
+        chunk: Syllabus text window
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        ParseResult; incomplete (and empty) if this chunk fails
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    try:
+        cache = get_result_cache()
+        key = result_cache_key(chunk, course_code, term)
+
+        content = cache.get(key) if cache else None
+        if content is not None:
+            return ParseResult(parse_llm_response(content, course_code, term))
+
+        def extract() -> ParseResult:
+            with timed("prompt_build"):
+                user_prompt = build_user_prompt(chunk, course_code)
+            content = call_llm(SYSTEM_PROMPT, user_prompt)
+            assignments, errors = parse_llm_response_partial(content, course_code, term)
+            complete = not is_truncated(errors)
+            if errors:
+                repaired, unresolved = repair_items(errors, course_code, term)
+                assignments += repaired
+                content = records_json(assignments)
+                complete = complete and not unresolved
+
+            # A partial result is returned but not cached, so the next
+            # request for this window tries again
+            if cache and complete:
+                cache.set(key, content, tag=result_cache_tag())
+
+            return ParseResult(assignments, complete)
+
+        result = chunk_flights.run(key, extract)
+        return ParseResult(list(result.assignments), result.complete)
+
+    except LLMThrottledError:
+        raise
+    except Exception:
+        return ParseResult([], complete=False)
+
+
+async def extract_chunk_async(
+    chunk: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> ParseResult:
+    """
+    Async variant of extract_chunk that uses the shared async LLM client.
+
+    Args:
+        chunk: Syllabus text window
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Returns:
+        ParseResult; incomplete (and empty) if this chunk fails
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    try:
+        cache = get_result_cache()
+        key = result_cache_key(chunk, course_code, term)
+
+        content = await cache.get_async(key) if cache else None
+        if content is not None:
+            return ParseResult(parse_llm_response(content, course_code, term))
+
+        async def extract() -> ParseResult:
+            with timed("prompt_build"):
+                user_prompt = build_user_prompt(chunk, course_code)
+            content = await call_llm_async(SYSTEM_PROMPT, user_prompt)
+            assignments, errors = parse_llm_response_partial(content, course_code, term)
+            complete = not is_truncated(errors)
+            if errors:
+                repaired, unresolved = await repair_items_async(errors, course_code, term)
+                assignments += repaired
+                content = records_json(assignments)
+                complete = complete and not unresolved
+
+            if cache and complete:
+                await cache.set_async(key, content, tag=result_cache_tag())
+
+            return ParseResult(assignments, complete)
+
+        result = await chunk_flights.run_async(key, extract)
+        return ParseResult(list(result.assignments), result.complete)
+
+    except LLMThrottledError:
+        raise
+    except Exception:
+        return ParseResult([], complete=False)
+
+
+def parse_syllabus(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Union[str, TermCalendar, None] = None,
+) -> list[AssignmentRecord]:
+    """
+    Parse syllabus text and extract assignments (see parse_syllabus_result).
+
+    Returns:
+        List of AssignmentRecord objects, or empty list if parsing fails
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    return parse_syllabus_result(syllabus_text, course_code, term).assignments
+
+
+def rule_fast_path(
+    syllabus_text: str,
+    course_code: str,
+    term: Optional[TermCalendar],
+) -> Optional[list[AssignmentRecord]]:
+    """
+    Try the rule-based extractor before spending an LLM request.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Course code to assign
+        term: Term calendar partial dates are resolved in
+
+    Returns:
+        Extracted assignments if RULE_FAST_PATH_ENABLED is on and the
+        extractor is at least RULE_CONFIDENCE_THRESHOLD sure of them,
+        otherwise None
+    """
+    if not RULE_FAST_PATH_ENABLED:
+        return None
+    with timed("rule_extract"):
+        assignments, confidence = extract_assignments_rule_based(syllabus_text, course_code, term)
+    return assignments if confidence >= RULE_CONFIDENCE_THRESHOLD else None
+
+
+def parse_syllabus_result(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Union[str, TermCalendar, None] = None,
+) -> ParseResult:
+    """
+    Parse syllabus text and extract assignments.
+
+    Well-structured syllabi are handled by the rule-based extractor when it
+    is confident enough. Otherwise lines that cannot carry a deadline are
+    dropped (see filter_schedule_text), the rest is split into windows (see
+    split_syllabus), each window is extracted by the LLM in parallel with
+    results served from the cache when possible, and the results are merged.
+    Dates without a year and week references are resolved in the term's
+    calendar (see terms.resolve_term).
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Optional course code to use for all assignments (overrides LLM extraction)
+        term: Term label (e.g. "Fall 2026") or TermCalendar; inferred from
+            the syllabus if not given
+
+    Returns:
+        ParseResult, complete only if every window was extracted in full
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    try:
+        term = resolve_term(term, syllabus_text)
+        assignments = rule_fast_path(syllabus_text, course_code, term)
+        if assignments is not None:
+            return ParseResult(assignments)
+
+        text = prepare_llm_text(syllabus_text)
+        with timed("split"):
+            chunks = split_syllabus(text)
+        if len(chunks) == 1:
+            return extract_chunk(chunks[0], course_code, term)
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), CHUNK_CONCURRENCY)) as pool:
+            results = list(pool.map(lambda chunk: extract_chunk(chunk, course_code, term), chunks))
+
+        return merge_results(results)
+
+    except LLMThrottledError:
+        raise
+    except Exception:
+        return ParseResult([], complete=False)
+
+
+async def parse_syllabus_async(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Union[str, TermCalendar, None] = None,
+) -> list[AssignmentRecord]:
+    """
+    Async variant of parse_syllabus that uses the shared async LLM client.
+
+    Returns:
+        List of AssignmentRecord objects, or empty list if parsing fails
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    return (await parse_syllabus_result_async(syllabus_text, course_code, term)).assignments
+
+
+async def parse_syllabus_result_async(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Union[str, TermCalendar, None] = None,
+) -> ParseResult:
+    """
+    Async variant of parse_syllabus_result that uses the shared async LLM client.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Optional course code to use for all assignments (overrides LLM extraction)
+        term: Term label or TermCalendar; inferred from the syllabus if not given
+
+    Returns:
+        ParseResult, complete only if every window was extracted in full
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    try:
+        term = resolve_term(term, syllabus_text)
+        assignments = rule_fast_path(syllabus_text, course_code, term)
+        if assignments is not None:
+            return ParseResult(assignments)
+
+        text = prepare_llm_text(syllabus_text)
+        with timed("split"):
+            chunks = split_syllabus(text)
+        semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+        async def extract_limited(chunk: str) -> ParseResult:
+            async with semaphore:
+                return await extract_chunk_async(chunk, course_code, term)
+
+        results = await asyncio.gather(*(extract_limited(chunk) for chunk in chunks))
+
+        return merge_results(results)
+
+    except LLMThrottledError:
+        raise
+    except Exception:
+        return ParseResult([], complete=False)
+
+
+def build_packed_prompt(syllabi: list[tuple[str, str]]) -> str:
+    """
+    Build one user prompt holding several syllabi.
+
+    Args:
+        syllabi: (syllabus text, course code) pairs with distinct course codes
+
+    Returns:
+        Prompt text to send with PACKED_SYSTEM_PROMPT
+    """
+    return "\n\n".join(
+        f"{PACK_SECTION_HEADER.format(number=number)}\n{build_user_prompt(text, course_code)}"
+        for number, (text, course_code) in enumerate(syllabi, start=1)
+    )
+
+
+def pack_syllabi(syllabi: list[tuple[str, str]], max_tokens: Optional[int] = None) -> list[list[int]]:
+    """
+    Group syllabi into requests of at most max_tokens syllabus tokens.
+
+    Syllabi are placed first-fit in order; a group never holds the same
+    course code twice. A syllabus larger than max_tokens, or too long for a
+    single window, gets a group of its own.
+
+    Args:
+        syllabi: (syllabus text, course code) pairs
+        max_tokens: Token budget per group; defaults to PACK_MAX_TOKENS
+
+    Returns:
+        Groups of indexes into syllabi
+    """
+    max_tokens = max_tokens or PACK_MAX_TOKENS
+    groups: list[list[int]] = []
+    sizes: list[int] = []
+    courses: list[set] = []
+
+    for index, (text, course_code) in enumerate(syllabi):
+        tokens = estimate_tokens(text)
+        if tokens > max_tokens or len(text) > CHUNK_MAX_CHARS:
+            groups.append([index])
+            sizes.append(max_tokens)
+            courses.append({course_code})
+            continue
+        for position in range(len(groups)):
+            if sizes[position] + tokens <= max_tokens and course_code not in courses[position]:
+                break
+        else:
+            position = len(groups)
+            groups.append([])
+            sizes.append(0)
+            courses.append(set())
+        groups[position].append(index)
+        courses[position].add(course_code)
+        sizes[position] += tokens
+
+    return groups
+
+
+def parse_packed_response(
+    content: str,
+    course_codes: list[str],
+    terms: Optional[list[Optional[TermCalendar]]] = None,
+) -> dict[str, tuple[list[AssignmentRecord], list[ItemError]]]:
+    """
+    Split the response to a packed prompt back into per-course results.
+
+    Courses that are missing from the response are left out, so the caller
+    can extract them on their own. Items are validated independently.
+
+    Args:
+        content: Raw text returned by the LLM
+        course_codes: Course codes that were packed into the prompt
+        terms: Calendar for each course, used to resolve due dates
+
+    Returns:
+        {course code: (valid assignments, errors for rejected items)}
+
+    Raises:
+        ValueError: If the response holds no JSON object
+    """
+    with timed("json_parse"):
+        data = decode_json_value(content, "{")
+
+    results = {}
+    with timed("validate"):
+        for course_code, term in zip(course_codes, terms or [None] * len(course_codes)):
+            items = data.get(course_code)
+            if isinstance(items, list):
+                results[course_code] = validate_items(items, course_code, term)
+    return results
+
+
+async def extract_packed_async(
+    syllabi: list[tuple[str, str]],
+    terms: Optional[list[Optional[TermCalendar]]] = None,
+) -> list[ParseResult]:
+    """
+    Extract several single-window syllabi with one LLM call.
+
+    Each course's part of the response is cached under the same key a
+    separate extract_chunk_async call would use. Rejected items are
+    repaired as in extract_chunk_async, and courses the packed response
+    does not cover are extracted separately.
+
+    Args:
+        syllabi: (syllabus text, course code) pairs with distinct course codes
+        terms: Calendar for each syllabus, used to resolve due dates
+
+    Returns:
+        ParseResult for each syllabus, in order
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    cache = get_result_cache()
+    course_codes = [course_code for _, course_code in syllabi]
+    terms = terms or [None] * len(syllabi)
+
+    try:
+        with timed("prompt_build"):
+            user_prompt = build_packed_prompt(syllabi)
+        content = await call_llm_async(PACKED_SYSTEM_PROMPT, user_prompt)
+        parsed = parse_packed_response(content, course_codes, terms)
+    except LLMThrottledError:
+        raise
+    except Exception:
+        parsed = {}
+
+    results = []
+    for (text, course_code), term in zip(syllabi, terms):
+        if course_code in parsed:
+            assignments, errors = parsed[course_code]
+            unresolved = 0
+            if errors:
+                repaired, unresolved = await repair_items_async(errors, course_code, term)
+                assignments += repaired
+            if cache and not unresolved:
+                await cache.set_async(
+                    result_cache_key(text, course_code, term), records_json(assignments), tag=result_cache_tag()
+                )
+            results.append(ParseResult(assignments, complete=not unresolved))
+        else:
+            results.append(await extract_chunk_async(text, course_code, term))
+    return results
+
+
+async def parse_syllabi_async(
+    syllabi: list[tuple[str, Optional[str]]],
+    term: Optional[str] = None,
+) -> list[list[AssignmentRecord]]:
+    """
+    Parse several syllabi (see parse_syllabi_results_async).
+
+    Returns:
+        Assignments for each syllabus, in order (empty lists for failures)
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    return [result.assignments for result in await parse_syllabi_results_async(syllabi, term)]
+
+
+async def parse_syllabi_results_async(
+    syllabi: list[tuple[str, Optional[str]]],
+    term: Optional[str] = None,
+) -> list[ParseResult]:
+    """
+    Parse several syllabi, packing short ones into shared LLM requests.
+
+    Each syllabus first goes through the rule-based fast path, the prompt
+    filter and the result cache as in parse_syllabus_async. What is left
+    and fits in a single window is grouped by pack_syllabi, and each group
+    of two or more is sent as one request with PACKED_SYSTEM_PROMPT, so
+    the system prompt and a round trip are paid once per group instead of
+    once per syllabus. Long syllabi and syllabi without a course code are
+    parsed separately. With PACKING_ENABLED off every syllabus is parsed
+    separately.
+
+    Args:
+        syllabi: (syllabus text, course code) pairs
+        term: Term label shared by all syllabi; each syllabus's term is
+            inferred from its text if not given
+
+    Returns:
+        ParseResult for each syllabus, in order
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling requests
+    """
+    results: list[Optional[ParseResult]] = [None] * len(syllabi)
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+    packable = []
+    separate = []
+    calendars = [resolve_term(term, text) for text, _ in syllabi]
+
+    for index, (text, course_code) in enumerate(syllabi):
+        if not PACKING_ENABLED or not course_code:
+            separate.append(index)
+            continue
+        calendar = calendars[index]
+        try:
+            assignments = rule_fast_path(text, course_code, calendar)
+            if assignments is not None:
+                results[index] = ParseResult(assignments)
+                continue
+
+            prepared = prepare_llm_text(text)
+            if len(prepared) > CHUNK_MAX_CHARS:
+                separate.append(index)
+                continue
+            cache = get_result_cache()
+            content = await cache.get_async(result_cache_key(prepared, course_code, calendar)) if cache else None
+            if content is not None:
+                results[index] = ParseResult(parse_llm_response(content, course_code, calendar))
+                continue
+            packable.append((index, prepared, course_code))
+        except Exception:
+            separate.append(index)
+
+    async def run_separate(index: int) -> None:
+        async with semaphore:
+            results[index] = await parse_syllabus_result_async(*syllabi[index], calendars[index])
+
+    async def run_group(group: list[int]) -> None:
+        members = [packable[i] for i in group]
+        async with semaphore:
+            if len(members) == 1:
+                index, prepared, course_code = members[0]
+                results[index] = await extract_chunk_async(prepared, course_code, calendars[index])
+                return
+            extracted = await extract_packed_async(
+                [(prepared, course_code) for _, prepared, course_code in members],
+                [calendars[index] for index, _, _ in members],
+            )
+        for (index, _, _), result in zip(members, extracted):
+            results[index] = result
+
+    groups = pack_syllabi([(prepared, course_code) for _, prepared, course_code in packable])
+    await asyncio.gather(
+        *(run_separate(index) for index in separate),
+        *(run_group(group) for group in groups),
+    )
+    return [result or ParseResult([], complete=False) for result in results]
+
+
+async def stream_chunk_async(
+    chunk: str,
+    course_code: Optional[str] = None,
+    term: Optional[TermCalendar] = None,
+) -> AsyncIterator[AssignmentRecord]:
+    """
+    Stream assignments for one text window as the LLM produces them.
+
+    Cached results are replayed immediately. Otherwise each item is yielded
+    as soon as its JSON object closes. Items that fail validation are
+    repaired with one follow-up request once the stream ends (see
+    repair_items_async), and the result is cached if nothing is missing.
+
+    Args:
+        chunk: Syllabus text window
+        course_code: Optional course code to use for all assignments
+        term: Calendar used to resolve due dates
+
+    Yields:
+        AssignmentRecord objects
+    """
+    cache = get_result_cache()
+    key = result_cache_key(chunk, course_code, term)
+
+    content = await cache.get_async(key) if cache else None
+    if content is not None:
+        for assignment in parse_llm_response(content, course_code, term):
+            yield assignment
+        return
+
+    user_prompt = build_user_prompt(chunk, course_code)
+    array_parser = IncrementalJSONArrayParser()
+    pieces = []
+
+    assignments = []
+    errors = []
+
+    async for text in stream_llm_async(SYSTEM_PROMPT, user_prompt):
+        pieces.append(text)
+        valid, invalid = validate_items(array_parser.feed(text), course_code, term)
+        errors += invalid
+        for assignment in valid:
+            assignments.append(assignment)
+            yield assignment
+
+    content = "".join(pieces).strip()
+    errors.extend(ItemError(raw, "invalid JSON") for raw in array_parser.failed)
+    unresolved = 0
+    if errors:
+        repaired, unresolved = await repair_items_async(errors, course_code, term)
+        for assignment in repaired:
+            assignments.append(assignment)
+            yield assignment
+        content = records_json(assignments)
+
+    if cache and array_parser.complete and not unresolved:
+        await cache.set_async(key, content, tag=result_cache_tag())
+
+
+async def stream_syllabus(
+    syllabus_text: str,
+    course_code: Optional[str] = None,
+    term: Union[str, TermCalendar, None] = None,
+) -> AsyncIterator[AssignmentRecord]:
+    """
+    Extract assignments, yielding each one as soon as it is available.
+
+    Same pipeline as parse_syllabus_async (rule-based fast path, chunking,
+    caching), but windows are streamed concurrently and their assignments
+    are passed on in arrival order, with duplicates by (name, due_date)
+    dropped. A failing window ends early without affecting the others.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+        course_code: Optional course code to use for all assignments (overrides LLM extraction)
+        term: Term label or TermCalendar; inferred from the syllabus if not given
+
+    Yields:
+        AssignmentRecord objects
+
+    Raises:
+        LLMThrottledError: If the LLM API keeps throttling a window
+    """
+    term = resolve_term(term, syllabus_text)
+    assignments = rule_fast_path(syllabus_text, course_code, term)
+    if assignments is not None:
+        for assignment in assignments:
+            yield assignment
+        return
+
+    text = prepare_llm_text(syllabus_text)
+    with timed("split"):
+        chunks = split_syllabus(text)
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def produce(chunk: str) -> None:
+        try:
+            async with semaphore:
+                async for assignment in stream_chunk_async(chunk, course_code, term):
+                    await queue.put(assignment)
+        except LLMThrottledError as e:
+            await queue.put(e)
+        except Exception:
+            pass
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(produce(chunk)) for chunk in chunks]
+    remaining = len(tasks)
+    seen = set()
+
+    try:
+        while remaining:
+            assignment = await queue.get()
+            if assignment is None:
+                remaining -= 1
+                continue
+            if isinstance(assignment, LLMThrottledError):
+                raise assignment
+
+            key = (assignment.name.strip().casefold(), assignment.due_date)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield assignment
+    finally:
+        for task in tasks:
+            task.cancel()
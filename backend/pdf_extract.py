@@ -0,0 +1,270 @@
+"""
+PDF text extraction for uploaded syllabi.
+
+Uploads are spooled to a temporary file in fixed-size pieces instead of
+being held in memory, and large documents are split into page ranges that
+are extracted in parallel by a process pool (pdfplumber is CPU-bound and
+holds the GIL). pdfplumber and its dependencies are imported on the first
+extraction, so workers that only serve pasted text never load them.
+"""
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from fastapi import UploadFile
+from backend.cache import CACHE_DIR, DiskCache
+from backend.parser import DATE_PATTERNS, SECTION_HEADING
+
+
+MAX_PDF_BYTES = int(os.environ.get("SYLLABUS_MAX_PDF_BYTES", str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.environ.get("SYLLABUS_MAX_PDF_PAGES", "100"))
+
+# Documents with more pages than this are extracted in the process pool
+PARALLEL_MIN_PAGES = int(os.environ.get("SYLLABUS_PDF_PARALLEL_MIN_PAGES", "8"))
+PROCESS_WORKERS = int(os.environ.get("SYLLABUS_PDF_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_TASK = 4
+
+# Stop reading once the schedule has been found and a batch of pages
+# after it contains no dates
+STOP_EARLY = os.environ.get("SYLLABUS_PDF_STOP_EARLY", "0") == "1"
+
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Extracted text is cached by the SHA-256 of the uploaded bytes
+TEXT_CACHE_ENABLED = os.environ.get("SYLLABUS_PDF_TEXT_CACHE", "1") == "1"
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("SYLLABUS_PDF_TEXT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Separates the text of consecutive pages; split_syllabus cuts windows here
+PAGE_SEPARATOR = "\f"
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_text_cache: Optional[DiskCache] = None
+
+
+class PDFLimitError(ValueError):
+    """Raised when an upload exceeds the configured byte or page limit."""
+
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None) -> tuple[str, str]:
+    """
+    Copy an uploaded file to a temporary file on disk, hashing it on the way.
+
+    Args:
+        file: Uploaded file
+        max_bytes: Size limit; defaults to MAX_PDF_BYTES
+
+    Returns:
+        (path of the temporary file, SHA-256 hex digest of its content);
+        the caller deletes the file
+
+    Raises:
+        PDFLimitError: If the upload is larger than max_bytes
+    """
+    max_bytes = max_bytes or MAX_PDF_BYTES
+    size = 0
+    digest = hashlib.sha256()
+
+    handle = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    try:
+        with handle:
+            while True:
+                chunk = await file.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PDFLimitError(
+                        f"{file.filename} is larger than the {max_bytes // (1024 * 1024)} MB limit"
+                    )
+                digest.update(chunk)
+                handle.write(chunk)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+    return handle.name, digest.hexdigest()
+
+
+def get_text_cache() -> Optional[DiskCache]:
+    """
+    Get the process-wide cache of extracted PDF text.
+
+    Returns:
+        DiskCache bounded by TEXT_CACHE_MAX_BYTES, or None if disabled
+    """
+    global _text_cache
+    if _text_cache is None and TEXT_CACHE_ENABLED:
+        _text_cache = DiskCache(
+            os.path.join(CACHE_DIR, "pdf_text.sqlite3"),
+            max_entries=None,
+            max_bytes=TEXT_CACHE_MAX_BYTES,
+        )
+    return _text_cache
+
+
+def set_text_cache(cache: Optional[DiskCache]) -> None:
+    """
+    Replace the process-wide extracted-text cache (None disables caching).
+
+    Args:
+        cache: DiskCache to use for extracted PDF text
+    """
+    global _text_cache, TEXT_CACHE_ENABLED
+    _text_cache = cache
+    TEXT_CACHE_ENABLED = cache is not None
+
+
+def _extract_page_range(path: str, start: int, end: int) -> list[str]:
+    """
+    Extract the text of pages [start, end) of a PDF (runs in worker processes).
+    """
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that already runs server threads is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def has_dates(text: str) -> bool:
+    """
+    Check whether text contains anything that looks like a date.
+
+    Args:
+        text: Page text
+
+    Returns:
+        True if a date pattern matches
+    """
+    return any(pattern.search(text) for pattern in DATE_PATTERNS)
+
+
+def has_schedule_heading(text: str) -> bool:
+    """
+    Check whether text contains a schedule/week heading line.
+
+    Args:
+        text: Page text
+
+    Returns:
+        True if a heading line matches
+    """
+    return any(SECTION_HEADING.match(line) for line in text.splitlines())
+
+
+def extract_text(
+    path: str,
+    max_pages: Optional[int] = None,
+    stop_early: Optional[bool] = None,
+) -> str:
+    """
+    Extract the text of a PDF file.
+
+    Short documents are read in the calling thread. Longer ones are read
+    in batches of page ranges spread over the process pool; with
+    stop_early, reading ends after the first batch that follows the
+    schedule and contains no dates.
+
+    Args:
+        path: Path of the PDF file
+        max_pages: Page limit; defaults to MAX_PDF_PAGES
+        stop_early: Stop after the schedule section; defaults to STOP_EARLY
+
+    Returns:
+        Page texts joined with PAGE_SEPARATOR
+
+    Raises:
+        PDFLimitError: If the document has more than max_pages pages
+    """
+    max_pages = max_pages or MAX_PDF_PAGES
+    stop_early = STOP_EARLY if stop_early is None else stop_early
+
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+        if page_count > max_pages:
+            raise PDFLimitError(f"PDF has {page_count} pages; the limit is {max_pages}")
+
+        if page_count <= PARALLEL_MIN_PAGES:
+            pages = [page.extract_text() or "" for page in pdf.pages]
+            return PAGE_SEPARATOR.join(pages)
+
+    pool = _get_process_pool()
+    batch_pages = PROCESS_WORKERS * PAGES_PER_TASK
+    pages = []
+    schedule_found = False
+
+    for batch_start in range(0, page_count, batch_pages):
+        batch_end = min(batch_start + batch_pages, page_count)
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + PAGES_PER_TASK, batch_end))
+            for start in range(batch_start, batch_end, PAGES_PER_TASK)
+        ]
+        batch = []
+        for future in futures:
+            batch.extend(future.result())
+        pages.extend(batch)
+
+        if stop_early:
+            batch_text = "\n".join(batch)
+            if schedule_found and not has_dates(batch_text):
+                break
+            schedule_found = schedule_found or (has_schedule_heading(batch_text) and has_dates(batch_text))
+
+    return PAGE_SEPARATOR.join(pages)
+
+
+def extract_text_cached(path: str, digest: str) -> str:
+    """
+    Extract the text of a PDF, reusing earlier extractions of the same bytes.
+
+    Args:
+        path: Path of the PDF file
+        digest: SHA-256 hex digest of the file content
+
+    Returns:
+        Page texts joined with PAGE_SEPARATOR
+
+    Raises:
+        PDFLimitError: If the document has more than the page limit
+    """
+    cache = get_text_cache()
+    key = f"{digest}:early" if STOP_EARLY else digest
+
+    text = cache.get(key) if cache else None
+    if text is not None:
+        return text
+
+    text = extract_text(path)
+    if cache and text.strip():
+        cache.set(key, text)
+    return text
+
+
+def preload() -> None:
+    """
+    Import pdfplumber now instead of on the first extraction.
+    """
+    import pdfplumber  # noqa: F401
+
+
+def shutdown() -> None:
+    """
+    Stop the extraction process pool if it was started.
+    """
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
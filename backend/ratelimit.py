@@ -0,0 +1,552 @@
+"""
+Client-side rate limiting for outbound LLM calls.
+
+LLMGovernor keeps calls within per-minute request and token budgets (token
+buckets), adapts how many calls may run at once (additive increase after
+each success, multiplicative decrease when the API throttles), and retries
+rate-limited (429) and overloaded (529) responses with jittered
+exponential backoff, honoring Retry-After. When retries run out the call
+fails with LLMThrottledError instead of looking like an empty result.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+
+# 0 disables a budget
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get("SYLLABUS_LLM_REQUESTS_PER_MINUTE", "50"))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get("SYLLABUS_LLM_TOKENS_PER_MINUTE", "40000"))
+
+# Bounds for the adaptive number of concurrent LLM calls
+LLM_MAX_IN_FLIGHT = int(os.environ.get("SYLLABUS_LLM_MAX_IN_FLIGHT", "16"))
+LLM_MIN_IN_FLIGHT = int(os.environ.get("SYLLABUS_LLM_MIN_IN_FLIGHT", "1"))
+
+LLM_MAX_RETRIES = int(os.environ.get("SYLLABUS_LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_SECONDS = float(os.environ.get("SYLLABUS_LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.environ.get("SYLLABUS_LLM_RETRY_MAX_SECONDS", "30"))
+
+# Rate limited, overloaded
+RETRYABLE_STATUS_CODES = {429, 529}
+
+_governor: Optional["LLMGovernor"] = None
+
+
+class LLMThrottledError(Exception):
+    """
+    Raised when the LLM API keeps throttling a call after all retries.
+
+    Attributes:
+        retry_after: Seconds the API asked to wait, if it said
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (about four characters per token).
+
+    Args:
+        text: Any text
+
+    Returns:
+        Estimated token count
+    """
+    return max(1, len(text) // 4)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """
+    Get the HTTP status of an API error.
+
+    Args:
+        error: Exception raised by the Anthropic client
+
+    Returns:
+        Status code, or None if the error has no HTTP response
+    """
+    return getattr(error, "status_code", None)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header of an API error.
+
+    Args:
+        error: Exception raised by the Anthropic client
+
+    Returns:
+        Seconds to wait, or None if the header is missing or not a number
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Per-minute budget that refills continuously.
+
+    A full minute's budget may be used in a burst. Reservations are taken
+    immediately and may overdraw the bucket; the caller then waits until
+    the budget has refilled.
+
+    Args:
+        per_minute: Budget per minute
+        clock: Monotonic time source
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take amount from the budget.
+
+        Args:
+            amount: Requests or tokens about to be used
+
+        Returns:
+            Seconds to wait before using them
+        """
+        with self._lock:
+            self._refill()
+            self.available -= amount
+            return max(0.0, -self.available / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Correct an earlier reservation once the real usage is known.
+
+        Args:
+            amount: Extra usage (positive) or unused reservation (negative)
+        """
+        with self._lock:
+            self._refill()
+            self.available = min(self.capacity, self.available - amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on concurrent calls that adapts to throttling (AIMD).
+
+    Each successful call raises the limit by 1/limit (about one per round
+    of calls); a throttled call halves it, at most once per cooldown so a
+    burst of 429s counts as a single congestion signal. Waiting threads
+    and tasks are admitted in arrival order.
+
+    Args:
+        max_limit: Upper bound (and starting value) for the limit
+        min_limit: Lower bound for the limit
+        decrease_factor: Multiplier applied on throttling
+        cooldown_seconds: Minimum time between two decreases
+        clock: Monotonic time source
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        cooldown_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._waiters: deque[Future] = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot if one is free, without waiting.
+
+        Returns:
+            True if a slot was taken
+        """
+        with self._lock:
+            return not self._waiters and self._take()
+
+    def acquire(self) -> None:
+        """
+        Take a slot, blocking the calling thread until one is free.
+        """
+        with self._lock:
+            if not self._waiters and self._take():
+                return
+            waiter = Future()
+            self._waiters.append(waiter)
+        waiter.result()
+
+    async def acquire_async(self) -> None:
+        """
+        Take a slot, waiting without blocking the event loop.
+        """
+        with self._lock:
+            if not self._waiters and self._take():
+                return
+            waiter = Future()
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wrap_future(waiter)
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.done() and not waiter.cancelled()
+            if granted:
+                self.release()
+            raise
+
+    def release(self, throttled: Optional[bool] = None) -> None:
+        """
+        Give a slot back, adapting the limit to the call's outcome.
+
+        Args:
+            throttled: True if the call was throttled, False if it
+                succeeded, None to leave the limit unchanged
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                now = self._clock()
+                if now - self._last_decrease >= self.cooldown_seconds:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif throttled is False:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            while self._waiters and self.in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                if waiter.set_running_or_notify_cancel():
+                    self.in_flight += 1
+                    waiter.set_result(None)
+
+    def _take(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+
+class LLMGovernor:
+    """
+    Admission control and retry policy for LLM calls.
+
+    call and call_async wrap a complete request; callers that need finer
+    control (e.g. streaming) use admit/admit_async, finish and retry_delay
+    directly.
+
+    Args:
+        requests_per_minute: Request budget (0 disables it)
+        tokens_per_minute: Input plus output token budget (0 disables it)
+        max_in_flight: Upper bound for concurrent calls
+        min_in_flight: Lower bound for concurrent calls under throttling
+        max_retries: Retries of a throttled call before giving up
+        retry_base_seconds: Backoff before the first retry (doubles each time)
+        retry_max_seconds: Cap on a single backoff
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        min_in_flight: int = LLM_MIN_IN_FLIGHT,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_seconds: float = LLM_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = LLM_RETRY_MAX_SECONDS,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_in_flight, min_in_flight)
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+    def admission_delay(self, estimated_tokens: int) -> float:
+        """
+        Reserve budget for one call.
+
+        Args:
+            estimated_tokens: Expected tokens for the call
+
+        Returns:
+            Seconds to wait before sending it
+        """
+        with self._lock:
+            delay = max(0.0, self._paused_until - time.monotonic())
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def admit(self, estimated_tokens: int) -> None:
+        """
+        Wait for budget and a concurrency slot (blocking).
+
+        Args:
+            estimated_tokens: Expected tokens for the call
+        """
+        delay = self.admission_delay(estimated_tokens)
+        admitted = False
+        try:
+            if delay:
+                time.sleep(delay)
+            self.concurrency.acquire()
+            admitted = True
+        finally:
+            if not admitted:
+                self.release_reservation(estimated_tokens)
+
+    async def admit_async(self, estimated_tokens: int) -> None:
+        """
+        Wait for budget and a concurrency slot (async).
+
+        Args:
+            estimated_tokens: Expected tokens for the call
+        """
+        delay = self.admission_delay(estimated_tokens)
+        admitted = False
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            await self.concurrency.acquire_async()
+            admitted = True
+        finally:
+            # Cancelled while waiting: the call never reaches the API
+            if not admitted:
+                self.release_reservation(estimated_tokens)
+
+    def release_reservation(self, estimated_tokens: int) -> None:
+        """
+        Give back the budget admission_delay reserved for a call that was
+        never sent.
+
+        Args:
+            estimated_tokens: Tokens reserved for the call
+        """
+        if self.requests:
+            self.requests.adjust(-1)
+        if self.tokens:
+            self.tokens.adjust(-estimated_tokens)
+
+    def finish(
+        self,
+        error: Optional[BaseException] = None,
+        estimated_tokens: int = 0,
+        used_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Release the slot taken by admit and settle the token reservation.
+
+        Args:
+            error: Exception the call failed with, if any
+            estimated_tokens: Tokens reserved by admit
+            used_tokens: Tokens actually used, if known
+        """
+        throttled = error is not None and status_code(error) in RETRYABLE_STATUS_CODES
+        if error is None:
+            self.concurrency.release(throttled=False)
+        else:
+            self.concurrency.release(throttled=True if throttled else None)
+
+        if self.tokens:
+            if used_tokens is not None:
+                self.tokens.adjust(used_tokens - estimated_tokens)
+            elif error is not None:
+                # Rejected, failed and cancelled requests produce no usage to
+                # settle against, so give the reservation back
+                self.tokens.adjust(-estimated_tokens)
+
+        with self._lock:
+            self.calls += 1
+            if throttled:
+                self.throttled += 1
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Decide whether and when to retry a failed call.
+
+        Args:
+            error: Exception the call failed with
+            attempt: Number of retries already made
+
+        Returns:
+            Seconds to wait before retrying, or None if the error is not
+            retryable
+
+        Raises:
+            LLMThrottledError: If the call was throttled and no retries are left
+        """
+        if status_code(error) not in RETRYABLE_STATUS_CODES:
+            return None
+
+        retry_after = retry_after_seconds(error)
+        if attempt >= self.max_retries:
+            with self._lock:
+                self.failures += 1
+            raise LLMThrottledError(
+                f"LLM API is throttling requests (HTTP {status_code(error)}); "
+                f"gave up after {attempt} retries",
+                retry_after=retry_after,
+            ) from error
+
+        # Full jitter, but never earlier than the API asked for
+        delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+        with self._lock:
+            self.retries += 1
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+                # Hold back every other call too until the API is ready
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        return delay
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        estimated_tokens: int = 0,
+        used_tokens: Optional[Callable[[Any], int]] = None,
+    ) -> Any:
+        """
+        Run one LLM request under the budgets, retrying when throttled.
+
+        Args:
+            fn: Function sending the request
+            estimated_tokens: Expected tokens for the request
+            used_tokens: Function reading the actual token usage from fn's result
+
+        Returns:
+            Result of fn
+
+        Raises:
+            LLMThrottledError: If the request stays throttled after all retries
+        """
+        attempt = 0
+        while True:
+            self.admit(estimated_tokens)
+            try:
+                result = fn()
+            except BaseException as e:
+                self.finish(e, estimated_tokens)
+                if not isinstance(e, Exception):
+                    raise
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self.finish(None, estimated_tokens, used_tokens(result) if used_tokens else None)
+                return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        used_tokens: Optional[Callable[[Any], int]] = None,
+    ) -> Any:
+        """
+        Async variant of call; fn is a coroutine function.
+
+        Args:
+            fn: Coroutine function sending the request
+            estimated_tokens: Expected tokens for the request
+            used_tokens: Function reading the actual token usage from fn's result
+
+        Returns:
+            Result of fn
+
+        Raises:
+            LLMThrottledError: If the request stays throttled after all retries
+        """
+        attempt = 0
+        while True:
+            await self.admit_async(estimated_tokens)
+            try:
+                result = await fn()
+            except BaseException as e:
+                self.finish(e, estimated_tokens)
+                if not isinstance(e, Exception):
+                    raise
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self.finish(None, estimated_tokens, used_tokens(result) if used_tokens else None)
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        """
+        Report the current concurrency limit and call outcomes.
+
+        Returns:
+            Dictionary with limit, in_flight, calls, throttled, retries, and failures
+        """
+        with self._lock:
+            return {
+                "limit": int(self.concurrency.limit),
+                "in_flight": self.concurrency.in_flight,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+def get_governor() -> LLMGovernor:
+    """
+    Get the process-wide LLM governor, creating it on first use.
+
+    Returns:
+        LLMGovernor configured from the SYLLABUS_LLM_* environment variables
+    """
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor()
+    return _governor
+
+
+def set_governor(governor: Optional[LLMGovernor]) -> None:
+    """
+    Replace the process-wide LLM governor (None recreates it on next use).
+
+    Args:
+        governor: LLMGovernor to use
+    """
+    global _governor
+    _governor = governor
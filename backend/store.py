@@ -0,0 +1,337 @@
+"""
+Persistent catalog of courses and their extracted assignments (SQLite).
+
+Each extraction is stored as a course row identified by (code, term,
+source hash) so that an identical upload can be answered from the catalog,
+and assignments are indexed by course and due date so a student's plan
+can be assembled with range queries. Rows also record the prompt version
+and model that produced them; a store only serves rows of its own version,
+so changing either re-extracts instead of answering from stale results.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Optional
+from backend.models import Assignment, AssignmentRecord, AssignmentType, Course
+from backend.parser import MODEL_NAME, PROMPT_VERSION
+
+
+STORE_ENABLED = os.environ.get("SYLLABUS_STORE_ENABLED", "1") == "1"
+STORE_PATH = os.environ.get("SYLLABUS_DB_PATH", os.path.join("data", "catalog.sqlite3"))
+
+_store: Optional["CourseStore"] = None
+
+
+class CourseStore:
+    """
+    SQLite-backed store of courses and assignments.
+
+    Terms are free-form labels such as "Fall 2026"; an empty string means
+    the term is unknown.
+
+    Args:
+        path: SQLite database file
+        prompt_version: Prompt version stored with, and required of, rows
+        model: LLM model name stored with, and required of, rows
+    """
+
+    def __init__(self, path: str, prompt_version: str = "", model: str = ""):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.prompt_version = prompt_version
+        self.model = model
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS courses (
+                id INTEGER PRIMARY KEY,
+                code TEXT NOT NULL,
+                term TEXT NOT NULL DEFAULT '',
+                name TEXT NOT NULL,
+                source_hash TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                prompt_version TEXT NOT NULL DEFAULT '',
+                model TEXT NOT NULL DEFAULT '',
+                UNIQUE (code, term, source_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_courses_code_term
+                ON courses (code, term);
+
+            CREATE TABLE IF NOT EXISTS assignments (
+                id INTEGER PRIMARY KEY,
+                course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                course TEXT NOT NULL,
+                due_date TEXT NOT NULL,
+                assignment_type TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_assignments_course_due
+                ON assignments (course_id, due_date);
+            CREATE INDEX IF NOT EXISTS idx_assignments_due
+                ON assignments (due_date);
+            """
+        )
+        # Catalogs created before rows were versioned; their rows keep the
+        # empty version and are no longer served
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(courses)")}
+        for column in ("prompt_version", "model"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE courses ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+    def save_course(
+        self,
+        code: str,
+        term: Optional[str],
+        source_hash: str,
+        assignments: list[Assignment],
+        name: Optional[str] = None,
+    ) -> int:
+        """
+        Store one extracted course, replacing an earlier copy of the same source.
+
+        Only complete extractions should be stored: find_course answers
+        later uploads of the same source from this row.
+
+        Args:
+            code: Course code
+            term: Term label, or None if unknown
+            source_hash: Hash of the syllabus the assignments came from
+            assignments: Extracted assignments
+            name: Optional course name (defaults to the code)
+
+        Returns:
+            Row ID of the stored course
+        """
+        return self.save_courses([(code, term, source_hash, assignments, name)])[0]
+
+    async def save_course_async(
+        self,
+        code: str,
+        term: Optional[str],
+        source_hash: str,
+        assignments: list[Assignment],
+        name: Optional[str] = None,
+    ) -> int:
+        """
+        save_course() on a worker thread, for use from the event loop.
+        """
+        return await asyncio.to_thread(self.save_course, code, term, source_hash, assignments, name)
+
+    def save_courses(
+        self,
+        courses: list[tuple[str, Optional[str], str, list[Assignment], Optional[str]]],
+    ) -> list[int]:
+        """
+        Store many extracted courses in a single transaction.
+
+        Args:
+            courses: (code, term, source_hash, assignments, name) tuples
+
+        Returns:
+            Row IDs of the stored courses, in input order
+        """
+        now = time.time()
+        course_ids = []
+        with self._lock, self._conn:
+            for code, term, source_hash, assignments, name in courses:
+                self._conn.execute(
+                    "DELETE FROM courses WHERE code = ? AND term = ? AND source_hash = ?",
+                    (code, term or "", source_hash),
+                )
+                cursor = self._conn.execute(
+                    """
+                    INSERT INTO courses (code, term, name, source_hash, created_at, prompt_version, model)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (code, term or "", name or code, source_hash, now, self.prompt_version, self.model),
+                )
+                course_id = cursor.lastrowid
+                course_ids.append(course_id)
+                self._conn.executemany(
+                    """
+                    INSERT INTO assignments (course_id, name, course, due_date, assignment_type)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (course_id, a.name, a.course, a.due_date.isoformat(), a.assignment_type.value)
+                        for a in assignments
+                    ],
+                )
+        return course_ids
+
+    async def save_courses_async(
+        self,
+        courses: list[tuple[str, Optional[str], str, list[Assignment], Optional[str]]],
+    ) -> list[int]:
+        """
+        save_courses() on a worker thread, for use from the event loop.
+        """
+        return await asyncio.to_thread(self.save_courses, courses)
+
+    def find_course(self, code: str, term: Optional[str], source_hash: str) -> Optional[list[AssignmentRecord]]:
+        """
+        Look up the assignments extracted from a specific syllabus.
+
+        Args:
+            code: Course code
+            term: Term label, or None if unknown
+            source_hash: Hash of the syllabus
+
+        Returns:
+            Stored assignments sorted by due date, or None if not stored for
+            this store's prompt version and model
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT id FROM courses
+                WHERE code = ? AND term = ? AND source_hash = ? AND prompt_version = ? AND model = ?
+                """,
+                (code, term or "", source_hash, self.prompt_version, self.model),
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                """
+                SELECT name, course, due_date, assignment_type FROM assignments
+                WHERE course_id = ? ORDER BY due_date, id
+                """,
+                (row[0],),
+            ).fetchall()
+        return [_row_to_assignment(r) for r in rows]
+
+    async def find_course_async(
+        self, code: str, term: Optional[str], source_hash: str
+    ) -> Optional[list[AssignmentRecord]]:
+        """
+        find_course() on a worker thread, for use from the event loop.
+        """
+        return await asyncio.to_thread(self.find_course, code, term, source_hash)
+
+    def get_assignments(
+        self,
+        codes: list[str],
+        term: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> list[AssignmentRecord]:
+        """
+        Assemble a plan from stored courses.
+
+        Uses the most recent extraction of each course made with this
+        store's prompt version and model and returns the assignments due
+        between start and end (inclusive).
+
+        Args:
+            codes: Course codes
+            term: Term label, or None if unknown
+            start: Earliest due date, or None for no lower bound
+            end: Latest due date, or None for no upper bound
+
+        Returns:
+            Assignments sorted by due date
+        """
+        if not codes:
+            return []
+
+        placeholders = ", ".join("?" for _ in codes)
+        query = f"""
+            SELECT a.name, a.course, a.due_date, a.assignment_type
+            FROM assignments a
+            WHERE a.course_id IN (
+                SELECT c.id FROM courses c
+                WHERE c.code IN ({placeholders}) AND c.term = ?
+                  AND c.id = (
+                      SELECT MAX(id) FROM courses
+                      WHERE code = c.code AND term = c.term
+                        AND prompt_version = ? AND model = ?
+                  )
+            )
+              AND a.due_date >= ? AND a.due_date <= ?
+            ORDER BY a.due_date, a.id
+        """
+        params = [
+            *codes,
+            term or "",
+            self.prompt_version,
+            self.model,
+            start.isoformat() if start else "0000-00-00",
+            end.isoformat() if end else "9999-99-99",
+        ]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_row_to_assignment(r) for r in rows]
+
+    def list_courses(self, term: Optional[str] = None) -> list[Course]:
+        """
+        List stored courses.
+
+        Args:
+            term: Only list courses for this term if given
+
+        Returns:
+            One Course per stored (code, term), sorted by code
+        """
+        query = "SELECT DISTINCT code, name FROM courses"
+        params = []
+        if term is not None:
+            query += " WHERE term = ?"
+            params.append(term)
+        query += " ORDER BY code"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [Course(code=code, name=name) for code, name in rows]
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def _row_to_assignment(row: tuple) -> AssignmentRecord:
+    name, course, due_date, assignment_type = row
+    return AssignmentRecord(
+        name=name,
+        course=course,
+        due_date=date.fromisoformat(due_date),
+        assignment_type=AssignmentType(assignment_type)
+    )
+
+
+def get_store() -> Optional[CourseStore]:
+    """
+    Get the process-wide course store, opening it on first use.
+
+    The store is versioned with the parser's prompt version and model.
+
+    Returns:
+        CourseStore, or None if the store is disabled
+    """
+    global _store
+    if _store is None and STORE_ENABLED:
+        _store = CourseStore(STORE_PATH, PROMPT_VERSION, MODEL_NAME)
+    return _store
+
+
+def set_store(store: Optional[CourseStore]) -> None:
+    """
+    Replace the process-wide course store (None disables it).
+
+    Args:
+        store: CourseStore to use
+    """
+    global _store, STORE_ENABLED
+    _store = store
+    STORE_ENABLED = store is not None
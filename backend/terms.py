@@ -0,0 +1,346 @@
+"""
+Academic term calendars for resolving partial dates and week references.
+
+A syllabus usually gives "Oct 15" or "Week 7 Thursday" rather than a full
+date. The year (and the date a week number refers to) depends on the term
+the syllabus is for, not on the day it happens to be parsed. TermCalendar
+precomputes everything needed for that once per term, so every lookup is
+a little integer arithmetic.
+"""
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional
+
+
+# Default (month, day) bounds of each season's term. Week 1 is the week
+# (Monday to Sunday) containing the start date, unless the syllabus dates
+# its first week (see infer_term). Spring covers both semester (Jan-May)
+# and quarter (Mar-Jun) calendars.
+SEASON_BOUNDS = {
+    "winter": ((1, 3), (3, 24)),
+    "spring": ((1, 6), (6, 14)),
+    "summer": ((6, 15), (8, 31)),
+    "fall": ((8, 20), (12, 22)),
+}
+SEASON_ALIASES = {"autumn": "fall"}
+
+# Term labels are only looked for near the top of a syllabus
+TERM_HEADER_LINES = int(os.environ.get("SYLLABUS_TERM_HEADER_LINES", "15"))
+
+# The year is "2026" or "'26"; two bare digits are too often something
+# else ("Summer 10-week session", "Spring 12 chapters")
+TERM_LABEL = re.compile(
+    r"\b(?P<season>fall|autumn|winter|spring|summer)\s*(?:quarter|semester|term|session)?\s*,?\s*"
+    r"(?:'|(?P<century>20))(?P<year>\d{2})\b",
+    re.IGNORECASE,
+)
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+WEEK_DAY_REFERENCE = re.compile(
+    r"\bweek\s+(?P<week>\d{1,2})\b[\s,:\-–—]*(?:on\s+)?"
+    r"(?P<weekday>mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?",
+    re.IGNORECASE,
+)
+FIRST_WEEK_DATE = re.compile(
+    r"\bweek\s+(?P<week>\d{1,2})\b\D{0,20}?"
+    r"(?:(?P<month_name>jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+(?P<day>\d{1,2})"
+    r"|(?P<month>\d{1,2})/(?P<day2>\d{1,2}))",
+    re.IGNORECASE,
+)
+FULL_DATE_YEAR = re.compile(
+    r"\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s*"
+    r"|\d{1,2}/\d{1,2}/)(?P<year>20\d{2})\b"
+    r"|\b(?P<iso_year>20\d{2})-(?P<iso_month>\d{1,2})-\d{1,2}\b",
+    re.IGNORECASE,
+)
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Get the nth given weekday of a month (n=-1 for the last one).
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def us_holidays(year: int) -> dict[date, str]:
+    """
+    US federal holidays that usually close campuses, plus the Friday
+    after Thanksgiving.
+    """
+    thanksgiving = nth_weekday(year, 11, 3, 4)
+    return {
+        date(year, 1, 1): "New Year's Day",
+        nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        nth_weekday(year, 2, 0, 3): "Presidents' Day",
+        nth_weekday(year, 5, 0, -1): "Memorial Day",
+        date(year, 6, 19): "Juneteenth",
+        date(year, 7, 4): "Independence Day",
+        nth_weekday(year, 9, 0, 1): "Labor Day",
+        date(year, 11, 11): "Veterans Day",
+        thanksgiving: "Thanksgiving",
+        thanksgiving + timedelta(days=1): "Thanksgiving",
+        date(year, 12, 25): "Christmas Day",
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class TermCalendar:
+    """
+    Precomputed calendar of one academic term.
+
+    Week n runs from week_start(n), a Monday, to the following Sunday;
+    week 1 contains start. Weeks are calendar weeks, so a break week still
+    has a number.
+
+    Args:
+        name: Term label, e.g. "Fall 2026"
+        start: First day of the term
+        end: Last day of the term
+        holidays: Days without classes in the term, with their names
+    """
+    name: str
+    start: date
+    end: date
+    holidays: dict[date, str] = field(default_factory=dict, compare=False)
+    # Ordinal of week 1's Monday
+    _first_monday: int = field(init=False, repr=False, compare=False)
+    # Year to use for a month without one, indexed by month (0 unused)
+    _month_years: tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        first_monday = self.start.toordinal() - self.start.weekday()
+        # Months outside the term go to the year that puts them closest to
+        # it, e.g. a January final exam in a Fall term is in the next year
+        middle = (self.start.toordinal() + self.end.toordinal()) // 2
+        month_years = [0]
+        for month in range(1, 13):
+            month_years.append(min(
+                (self.start.year - 1, self.start.year, self.start.year + 1, self.end.year),
+                key=lambda year: abs(date(year, month, 15).toordinal() - middle),
+            ))
+        object.__setattr__(self, "_first_monday", first_monday)
+        object.__setattr__(self, "_month_years", tuple(month_years))
+
+    @property
+    def weeks(self) -> int:
+        """Number of weeks the term spans."""
+        return self.week_number(self.end)
+
+    def resolve(self, month: int, day: int) -> date:
+        """
+        Resolve a month and day without a year to a date in or near the term.
+
+        Raises:
+            ValueError: If the month and day do not form a date
+        """
+        if not 1 <= month <= 12:
+            raise ValueError(f"month must be in 1..12: {month}")
+        return date(self._month_years[month], month, day)
+
+    def week_number(self, d: date) -> int:
+        """
+        Get the term week of a date (0 or negative before the term).
+        """
+        return (d.toordinal() - self._first_monday) // 7 + 1
+
+    def week_start(self, week: int) -> date:
+        """
+        Get the Monday of a term week.
+        """
+        return date.fromordinal(self._first_monday + 7 * (week - 1))
+
+    def resolve_week_day(self, week: int, weekday: int) -> date:
+        """
+        Resolve a reference like "Week 7 Thursday".
+
+        Args:
+            week: Term week number (1 is the first week)
+            weekday: 0 for Monday through 6 for Sunday
+
+        Raises:
+            ValueError: If the week is outside the term
+        """
+        if not 1 <= week <= self.weeks + 1:
+            raise ValueError(f"{self.name} has no week {week}")
+        return date.fromordinal(self._first_monday + 7 * (week - 1) + weekday)
+
+    def is_holiday(self, d: date) -> bool:
+        """Whether d is a day without classes."""
+        return d in self.holidays
+
+
+@lru_cache(maxsize=256)
+def term_calendar(season: str, year: int, start: Optional[date] = None) -> TermCalendar:
+    """
+    Build (once) the calendar of a season's term.
+
+    Args:
+        season: "fall", "winter", "spring" or "summer"
+        year: Calendar year the term starts in
+        start: First day of the term, if the syllabus gives it
+
+    Returns:
+        TermCalendar with the season's default bounds
+    """
+    (start_month, start_day), (end_month, end_day) = SEASON_BOUNDS[season]
+    start = start or date(year, start_month, start_day)
+    end = max(date(year, end_month, end_day), start + timedelta(weeks=8))
+    holidays = {
+        day: name
+        for holiday_year in {start.year, end.year}
+        for day, name in us_holidays(holiday_year).items()
+        if start <= day <= end
+    }
+    return TermCalendar(f"{season.title()} {year}", start, end, holidays)
+
+
+def parse_term(label: str) -> Optional[TermCalendar]:
+    """
+    Get the calendar for a term label such as "Fall 2026" or "Spring '27".
+
+    Args:
+        label: Term label
+
+    Returns:
+        TermCalendar, or None if the label names no season and year
+    """
+    match = TERM_LABEL.search(label)
+    if match is None:
+        return None
+    season = match.group("season").lower()
+    return term_calendar(SEASON_ALIASES.get(season, season), 2000 + int(match.group("year")))
+
+
+def season_for(month: int) -> str:
+    """
+    Get the season whose term a month most likely belongs to.
+    """
+    if month <= 5:
+        return "spring"
+    if month <= 7:
+        return "summer"
+    return "fall"
+
+
+def infer_term(syllabus_text: str) -> Optional[TermCalendar]:
+    """
+    Work out the term a syllabus is for from its text.
+
+    Looks for a term label ("Spring 2027") in the first lines, then falls
+    back to the most common year among fully dated lines, with the season
+    of the month most of them fall in. A label more than a year away from
+    that year is ignored in favour of the dates. If a line dates week 1
+    ("Week 1 | Jan 13"), the term starts on that date.
+
+    Args:
+        syllabus_text: Raw text content of the syllabus
+
+    Returns:
+        TermCalendar, or None if the text gives no year at all
+    """
+    header = "\n".join(syllabus_text.splitlines()[:TERM_HEADER_LINES])
+    calendar = parse_term(header)
+
+    years = Counter()
+    months = Counter()
+    for match in FULL_DATE_YEAR.finditer(syllabus_text):
+        years[int(match.group("year") or match.group("iso_year"))] += 1
+        if match.group("iso_month"):
+            months[int(match.group("iso_month"))] += 1
+        else:
+            month = re.match(r"[a-z]+|\d+", match.group(0), re.IGNORECASE).group(0)
+            months[MONTHS[month[:3].lower()] if month.isalpha() else int(month)] += 1
+    if years:
+        year = years.most_common(1)[0][0]
+        # A term's dates may spill into the next or previous year (a
+        # January final, a December deadline), so only a label more than a
+        # year off disagrees with them
+        if calendar is None or abs(year - calendar.start.year) > 1:
+            calendar = _dated_term(years, months)
+    if calendar is None:
+        return None
+
+    first_week = FIRST_WEEK_DATE.search(syllabus_text)
+    if first_week is not None:
+        month = first_week.group("month_name")
+        month = MONTHS[month[:3].lower()] if month else int(first_week.group("month"))
+        day = int(first_week.group("day") or first_week.group("day2"))
+        try:
+            dated = calendar.resolve(month, day)
+        except ValueError:
+            return calendar
+        start = dated - timedelta(weeks=int(first_week.group("week")) - 1)
+        if abs((start - calendar.start).days) <= 45:
+            season, year = calendar.name.lower().split()
+            calendar = term_calendar(season, int(year), start)
+    return calendar
+
+
+def infer_term_from_dates(dates: list[date]) -> Optional[TermCalendar]:
+    """
+    Work out the term from due dates alone, as infer_term does from the
+    fully dated lines of a syllabus.
+
+    Args:
+        dates: Due dates
+
+    Returns:
+        TermCalendar, or None if there are no dates
+    """
+    if not dates:
+        return None
+    return _dated_term(Counter(d.year for d in dates), Counter(d.month for d in dates))
+
+
+def _dated_term(years: Counter, months: Counter) -> TermCalendar:
+    # The most common year, with the season of the most common month
+    return term_calendar(season_for(months.most_common(1)[0][0]), years.most_common(1)[0][0])
+
+
+def resolve_term(term, syllabus_text: str = "") -> Optional[TermCalendar]:
+    """
+    Get the calendar for an explicit term label, or infer it from the text.
+
+    Args:
+        term: Term label given by the user (e.g. "Fall 2026"), a
+            TermCalendar (returned as is) or None
+        syllabus_text: Raw text content of the syllabus
+
+    Returns:
+        TermCalendar, or None if neither gives a term
+    """
+    if isinstance(term, TermCalendar):
+        return term
+    calendar = parse_term(term) if term else None
+    if calendar is None and syllabus_text:
+        calendar = infer_term(syllabus_text)
+    elif calendar is not None and syllabus_text:
+        inferred = infer_term(syllabus_text)
+        # Keep the label's term but take the syllabus's first week
+        if inferred is not None and inferred.name == calendar.name:
+            calendar = inferred
+    return calendar
+
+
+def find_week_reference(text: str) -> Optional[tuple[re.Match, int, int]]:
+    """
+    Find a reference like "Week 7 Thursday" or "week 3, Mon".
+
+    Returns:
+        (match, week number, weekday 0-6), or None
+    """
+    match = WEEK_DAY_REFERENCE.search(text)
+    if match is None:
+        return None
+    return match, int(match.group("week")), WEEKDAYS[match.group("weekday")[:3].lower()]
@@ -1,10 +1,36 @@
 """
 Test cases for models.py, parser.py, and workload.py
 """
-from datetime import date
-from backend.models import Assignment, AssignmentType, Course, WeeklyWorkload
-from backend.workload import compute_weekly_workload, get_week_start
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from backend import llm, pdf_extract, terms
+from backend.cache import DiskCache, SingleFlight
+from backend.store import CourseStore
+from backend.fake_llm import FakeLLMTransport
+from backend.models import (
+    Assignment,
+    AssignmentRecord,
+    AssignmentType,
+    Course,
+    WeeklyWorkload,
+    WeeklyWorkloadRecord,
+)
+from backend.workload import TYPE_WEIGHTS, IncrementalWorkload, compute_weekly_workload, get_week_start
+from backend.workload_batch import compute_cohort_workloads, compute_weekly_workload_batch
+from backend.workload_query import MAX_SPAN_DAYS, WorkloadIndex, WorkloadSpanError
+from backend.bench import make_pdf
+from backend.bench_workload import generate_assignments, generate_cohort
+import backend.parser as parser
+import backend.ratelimit as ratelimit
+from backend import metrics
+import asyncio
 import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
 
 
 def test_models():
@@ -41,6 +67,21 @@ def test_models():
     assert workload.intensity_score == 5.5
     print("  [OK] WeeklyWorkload model works")
 
+    # Internal records convert to the API models without revalidation
+    record = AssignmentRecord.from_model(assignment)
+    assert record.to_model() == assignment
+    assert record.to_json() == assignment.model_dump(mode="json")
+    week_record = WeeklyWorkloadRecord(**dict(workload))
+    assert week_record.to_model() == workload
+    assert week_record.to_json() == workload.model_dump(mode="json")
+    assert parser.item_to_assignment(assignment.model_dump(mode="json")) == record
+    try:
+        parser.item_to_assignment({"name": 1, "course": "X", "due_date": "2024-10-15", "assignment_type": "quiz"})
+        assert False, "non-string name accepted"
+    except ValueError:
+        pass
+    print("  [OK] Records match the Pydantic models and their JSON")
+
     print("[OK] All model tests passed!\n")
 
 
@@ -220,6 +261,1354 @@ def test_integration():
     print("[OK] Integration test passed!\n")
 
 
+def test_result_cache():
+    """Test the on-disk LLM result cache"""
+    print("Testing cache.py...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # LRU eviction
+        cache = DiskCache(os.path.join(tmp, "lru.sqlite3"), max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        assert cache.get("a") == "1"
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        stats = cache.stats()
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        cache.close()
+        print("  [OK] LRU eviction and hit/miss counts work")
+
+        # Hits are recorded in memory and written with the next set or close
+        path = os.path.join(tmp, "access.sqlite3")
+        cache = DiskCache(path)
+        cache.set("a", "1")
+        assert asyncio.run(cache.get_async("a")) == "1"
+        assert list(cache._accessed) == ["a"]
+        asyncio.run(cache.set_async("b", "2"))
+        assert cache._accessed == {}
+        assert cache.get("b") == "2"
+        cache.close()
+        cache = DiskCache(path)
+        assert cache.get("a") == "1" and cache.get("b") == "2"
+        cache.close()
+        print("  [OK] Hits do not write; async variants work")
+
+        # TTL expiry
+        cache = DiskCache(os.path.join(tmp, "ttl.sqlite3"), ttl_seconds=-1)
+        cache.set("a", "1")
+        assert cache.get("a") is None
+        cache.close()
+        print("  [OK] TTL expiry works")
+
+        # Tag invalidation
+        cache = DiskCache(os.path.join(tmp, "tags.sqlite3"))
+        cache.set("a", "1", tag="old")
+        cache.set("b", "2", tag="new")
+        assert cache.retain_only("new") == 1
+        assert cache.get("a") is None
+        assert cache.get("b") == "2"
+        cache.close()
+        print("  [OK] Tag invalidation works")
+
+        # parse_syllabus only calls the LLM on a miss
+        calls = []
+
+        def fake_call_llm(system_prompt, user_prompt):
+            calls.append(user_prompt)
+            return '[{"name": "HW 1", "course": "X", "due_date": "2024-10-15", "assignment_type": "homework"}]'
+
+        original_call_llm = parser.call_llm
+        original_cache = parser.get_result_cache()
+        parser.call_llm = fake_call_llm
+        parser.set_result_cache(DiskCache(os.path.join(tmp, "results.sqlite3")))
+        try:
+            first = parser.parse_syllabus("HW 1 is due after fall break", "CSE 374")
+            second = parser.parse_syllabus("HW 1   is due after fall break\n\n", "CSE 374")
+            other_course = parser.parse_syllabus("HW 1 is due after fall break", "CSE 143")
+            assert first == second
+            assert first[0].course == "CSE 374"
+            assert other_course[0].course == "CSE 143"
+            assert len(calls) == 2
+            assert parser.get_result_cache().stats()["hits"] == 1
+        finally:
+            parser.get_result_cache().close()
+            parser.call_llm = original_call_llm
+            parser.set_result_cache(original_cache)
+        print("  [OK] parse_syllabus serves repeat submissions from cache")
+
+    print("[OK] All cache tests passed!\n")
+
+
+def test_llm_client():
+    """Test the shared LLM clients against the local stub transport"""
+    print("Testing llm.py...")
+
+    def responder(system_prompt, user_prompt):
+        assert system_prompt == parser.SYSTEM_PROMPT
+        assert user_prompt.startswith("Course: CSE 374")
+        return '[{"name": "Midterm", "course": "CSE 374", "due_date": "2024-11-03", "assignment_type": "exam"}]'
+
+    transport = FakeLLMTransport(responder)
+    original_cache = parser.get_result_cache()
+    llm.set_transport(transport, api_key="test-key")
+    parser.set_result_cache(None)
+    try:
+        assert llm.get_client() is llm.get_client()
+
+        assignments = parser.parse_syllabus("Midterm is the week after fall break", "CSE 374")
+        assert len(assignments) == 1
+        assert assignments[0].assignment_type == AssignmentType.EXAM
+        print("  [OK] Sync client reused across calls")
+
+        async def run_many():
+            client = llm.get_async_client()
+            results = await asyncio.gather(*(
+                parser.parse_syllabus_async(f"Midterm is the week after fall break (section {i})", "CSE 374")
+                for i in range(10)
+            ))
+            assert llm.get_async_client() is client
+            return results
+
+        results = asyncio.run(run_many())
+        assert all(r == assignments for r in results)
+        assert transport.requests == 11
+        print("  [OK] Async client serves concurrent calls")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original_cache)
+
+    print("[OK] All LLM client tests passed!\n")
+
+
+def test_rule_based_extraction():
+    """Test the rule-based fast-path extractor"""
+    print("Testing rule-based extraction...")
+
+    syllabus = """
+    CSE 374 Software Engineering
+    Grading: Exams are worth 40% of your grade.
+
+    1. Homework 1 - Due October 15, 2024
+    - Project Proposal — Due Tue, Oct. 22nd, 2024
+    Midterm Exam: November 3, 2024
+    10/29/2024 | Quiz 2
+    Final Project due 12/08/2024
+    Reading: Chapter 3, Oct 1
+    2024-11-20  Lab 4 due Thursday
+    """
+    assignments, confidence = parser.extract_assignments_rule_based(syllabus, "CSE 374")
+
+    found = {(a.name, a.due_date, a.assignment_type) for a in assignments}
+    assert found == {
+        ("Homework 1", date(2024, 10, 15), AssignmentType.HOMEWORK),
+        ("Project Proposal", date(2024, 10, 22), AssignmentType.PROJECT),
+        ("Midterm Exam", date(2024, 11, 3), AssignmentType.EXAM),
+        ("Quiz 2", date(2024, 10, 29), AssignmentType.QUIZ),
+        ("Final Project", date(2024, 12, 8), AssignmentType.PROJECT),
+        ("Lab 4", date(2024, 11, 20), AssignmentType.HOMEWORK),
+    }
+    assert all(a.course == "CSE 374" for a in assignments)
+    assert confidence == 1.0
+    print("  [OK] Tabular schedule extracted with full confidence")
+
+    assignments, confidence = parser.extract_assignments_rule_based(
+        "Homework 1 - Due October 15, 2024\n"
+        "Oct 20: guest lecture\n"
+        "Homework 2 is due the Friday after break\n"
+    )
+    assert len(assignments) == 1
+    assert assignments[0].course == "UNKNOWN"
+    assert confidence < parser.RULE_CONFIDENCE_THRESHOLD
+    print("  [OK] Ambiguous lines lower confidence")
+
+    # Labelled lines: (line, expected (name, due date), whether the line
+    # alone may skip the LLM)
+    fixtures = [
+        ("Week 2 (Oct 5, 2024): Homework 1 due", [("Homework 1", date(2024, 10, 5))], True),
+        ("Week 3: Lab 2 due 10/14/2024", [("Lab 2", date(2024, 10, 14))], True),
+        ("Homework 4 due: Fri 10/18/2024", [("Homework 4", date(2024, 10, 18))], True),
+        ("Homework 5 due 11/1", [("Homework 5", parser.normalize_date("11-01"))], True),
+        ("Quiz 1 due Oct 3, 2024; Lab 2 due Oct 4, 2024",
+         [("Quiz 1", date(2024, 10, 3)), ("Lab 2", date(2024, 10, 4))], True),
+        ("Lab 2 due; Quiz 1", [], False),
+        ("Quiz 1 covers sections 3/4", [], False),
+        ("Lab 3 is worth 10/20 points", [], False),
+        ("Exams: marks 10 and 11 are curved", [], False),
+        ("Homework 1 and Quiz 1 due Oct 5, 2024", None, False),
+        ("Quiz 2 due Oct 9, 2024 (covers the Oct 2, 2024 lecture)", None, False),
+    ]
+    for line, expected, confident in fixtures:
+        assignments, confidence = parser.extract_assignments_rule_based(line, "CSE 374")
+        if expected is not None:
+            assert [(a.name, a.due_date) for a in assignments] == expected, line
+        assert (confidence >= parser.RULE_CONFIDENCE_THRESHOLD) == confident, line
+    print("  [OK] Labelled fixtures: week labels, ';' lists, bare fractions, several dates")
+
+    # High confidence skips the LLM, low confidence falls back to it
+    calls = []
+
+    def fake_call_llm(system_prompt, user_prompt):
+        calls.append(user_prompt)
+        return "[]"
+
+    original_call_llm = parser.call_llm
+    original_cache = parser.get_result_cache()
+    original_fast_path = parser.RULE_FAST_PATH_ENABLED
+    parser.call_llm = fake_call_llm
+    parser.set_result_cache(None)
+    parser.RULE_FAST_PATH_ENABLED = True
+    try:
+        assert len(parser.parse_syllabus(syllabus, "CSE 374")) == 6
+        assert calls == []
+        assert parser.parse_syllabus("Homework 2 is due the Friday after break", "CSE 374") == []
+        assert len(calls) == 1
+    finally:
+        parser.call_llm = original_call_llm
+        parser.set_result_cache(original_cache)
+        parser.RULE_FAST_PATH_ENABLED = original_fast_path
+    print("  [OK] LLM is only called when confidence is low")
+
+    print("[OK] All rule-based extraction tests passed!\n")
+
+
+def test_chunked_extraction():
+    """Test chunked, parallel extraction of long syllabi"""
+    print("Testing chunked extraction...")
+
+    weeks = []
+    for week in range(1, 11):
+        lines = [f"Week {week}"]
+        lines += [f"Lecture notes for topic {week}.{n}, see the course site" for n in range(8)]
+        lines.append(f"Problem set {week} is posted; turn it in by week {week + 1}'s Friday")
+        weeks.append("\n".join(lines))
+    syllabus = "MATH 101 Calculus\nSpring 2025\n" + "\n".join(weeks)
+
+    chunks = parser.split_syllabus(syllabus, max_chars=1000)
+    assert len(chunks) > 1
+    assert chunks[0].startswith("MATH 101 Calculus")
+    for chunk in chunks[1:]:
+        assert chunk.startswith("MATH 101 Calculus\nSpring 2025")
+        body = chunk.split("\n...\n", 1)[1]
+        assert len(body) <= 1000
+        assert body.startswith("Week ")
+    for week in range(1, 11):
+        assert sum(f"Problem set {week} " in chunk for chunk in chunks) == 1
+    assert parser.split_syllabus("short", max_chars=1000) == ["short"]
+    print("  [OK] Long syllabi split at week headings")
+
+    def responder(system_prompt, user_prompt):
+        items = [{"name": "Syllabus Quiz", "course": "X", "due_date": "2025-01-10", "assignment_type": "quiz"}]
+        for week in re.findall(r"^Problem set (\d+) ", user_prompt, re.MULTILINE):
+            items.append({
+                "name": f"Problem Set {week}",
+                "course": "X",
+                "due_date": f"2025-03-{int(week):02d}",
+                "assignment_type": "homework",
+            })
+        return json.dumps(items)
+
+    transport = FakeLLMTransport(responder, latency=0.2)
+    original_cache = parser.get_result_cache()
+    original_max_chars = parser.CHUNK_MAX_CHARS
+    original_filter = parser.PROMPT_FILTER_ENABLED
+    llm.set_transport(transport, api_key="test-key")
+    parser.set_result_cache(None)
+    parser.CHUNK_MAX_CHARS = 1000
+    # Every line here mentions a week, but keep the filter out of the chunk count
+    parser.PROMPT_FILTER_ENABLED = False
+    try:
+        start = time.perf_counter()
+        assignments = parser.parse_syllabus(syllabus, "MATH 101")
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        async_assignments = asyncio.run(parser.parse_syllabus_async(syllabus, "MATH 101"))
+        async_elapsed = time.perf_counter() - start
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original_cache)
+        parser.CHUNK_MAX_CHARS = original_max_chars
+        parser.PROMPT_FILTER_ENABLED = original_filter
+
+    expected = ["Syllabus Quiz"] + [f"Problem Set {w}" for w in range(1, 11)]
+    assert sorted(a.name for a in assignments) == sorted(expected)
+    assert sorted(a.name for a in async_assignments) == sorted(expected)
+    assert transport.requests == 2 * len(chunks)
+    print("ELAPSED", elapsed, async_elapsed); assert elapsed < 0.2 * len(chunks)
+    assert async_elapsed < 0.2 * len(chunks)
+    print("  [OK] Chunks extracted in parallel and merged without duplicates")
+
+    def failing_responder(system_prompt, user_prompt):
+        if "Problem set 5 " in user_prompt:
+            return "Sorry, I can't help with that."
+        return responder(system_prompt, user_prompt)
+
+    llm.set_transport(FakeLLMTransport(failing_responder), api_key="test-key")
+    parser.set_result_cache(None)
+    parser.CHUNK_MAX_CHARS = 1000
+    parser.PROMPT_FILTER_ENABLED = False
+    try:
+        result = parser.parse_syllabus_result(syllabus, "MATH 101")
+        async_result = asyncio.run(parser.parse_syllabus_result_async(syllabus, "MATH 101"))
+        complete = parser.parse_syllabus_result("Problem set 1 is posted", "MATH 101")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original_cache)
+        parser.CHUNK_MAX_CHARS = original_max_chars
+        parser.PROMPT_FILTER_ENABLED = original_filter
+
+    for partial in (result, async_result):
+        assert not partial.complete
+        assert "Problem Set 5" not in {a.name for a in partial.assignments}
+        assert "Problem Set 1" in {a.name for a in partial.assignments}
+    assert complete.complete
+    print("  [OK] A failed chunk keeps the other chunks but marks the result incomplete")
+
+    print("[OK] All chunked extraction tests passed!\n")
+
+
+def test_streaming_parser():
+    """Test incremental JSON parsing of streamed LLM output"""
+    print("Testing streaming extraction...")
+
+    items = [
+        {"name": "HW 1 {draft}", "course": "X", "due_date": "2024-10-15", "assignment_type": "homework"},
+        {"name": 'Essay "Why [we] write"', "course": "X", "due_date": "2024-10-20", "assignment_type": "other"},
+        {"name": "Midterm \\ Part 1", "course": "X", "due_date": "2024-11-03", "assignment_type": "exam"},
+    ]
+    response = "Here you go:\n```json\n" + json.dumps(items, indent=2) + "\n```"
+
+    for size in (1, 3, 7, len(response)):
+        array_parser = parser.IncrementalJSONArrayParser()
+        parsed = []
+        for start in range(0, len(response), size):
+            parsed.extend(array_parser.feed(response[start:start + size]))
+        assert parsed == items, size
+        assert array_parser.errors == 0
+    print("  [OK] Elements are emitted as soon as they close")
+
+    array_parser = parser.IncrementalJSONArrayParser()
+    assert array_parser.feed('[{"a": 1}, {"a": 2') == [{"a": 1}]
+    assert array_parser.feed('}, {"a": bad}, {"a": 3}]') == [{"a": 2}, {"a": 3}]
+    assert array_parser.errors == 1
+    print("  [OK] Malformed elements are skipped")
+
+    transport = FakeLLMTransport(
+        lambda system_prompt, user_prompt: json.dumps(items),
+        stream_chunk_chars=8,
+        stream_delay=0.01,
+    )
+    original_cache = parser.get_result_cache()
+    llm.set_transport(transport, api_key="test-key")
+
+    async def collect():
+        arrivals = []
+        start = time.perf_counter()
+        async for assignment in parser.stream_syllabus("Assignments posted on the course site", "CSE 374"):
+            arrivals.append((time.perf_counter() - start, assignment))
+        return arrivals, time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parser.set_result_cache(DiskCache(os.path.join(tmp, "results.sqlite3")))
+        try:
+            arrivals, total = asyncio.run(collect())
+            cached_arrivals, _ = asyncio.run(collect())
+        finally:
+            parser.get_result_cache().close()
+            llm.set_transport(None)
+            parser.set_result_cache(original_cache)
+
+    assert [a.name for _, a in arrivals] == [item["name"] for item in items]
+    assert all(a.course == "CSE 374" for _, a in arrivals)
+    assert arrivals[0][0] < total / 2
+    assert [a for _, a in cached_arrivals] == [a for _, a in arrivals]
+    assert transport.requests == 1
+    print("  [OK] stream_syllabus yields assignments before the response completes")
+
+    print("[OK] All streaming tests passed!\n")
+
+
+def test_pdf_extraction():
+    """Test PDF text extraction, limits and page-parallel extraction"""
+    print("Testing pdf_extract.py...")
+
+    pages = [["CSE 374 Software Engineering", "Grading policy and office hours"]]
+    pages += [["Course Schedule", f"Homework {n} - Due October {n}, 2024"] for n in range(1, 21)]
+    pages += [["Academic integrity", "Do your own work"] for _ in range(9)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "syllabus.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf(pages))
+
+        text = pdf_extract.extract_text(path)
+        page_texts = text.split(pdf_extract.PAGE_SEPARATOR)
+        assert len(page_texts) == 30
+        assert page_texts[0].startswith("CSE 374 Software Engineering")
+        assert page_texts[20] == "Course Schedule\nHomework 20 - Due October 20, 2024"
+        print("  [OK] Large PDFs extracted in parallel in page order")
+
+        original_workers = pdf_extract.PROCESS_WORKERS
+        pdf_extract.PROCESS_WORKERS = 1
+        try:
+            short = pdf_extract.extract_text(path, stop_early=True).split(pdf_extract.PAGE_SEPARATOR)
+        finally:
+            pdf_extract.PROCESS_WORKERS = original_workers
+        assert len(short) < 30
+        assert short[20].endswith("Homework 20 - Due October 20, 2024")
+        print("  [OK] Extraction stops early after the schedule")
+
+        try:
+            pdf_extract.extract_text(path, max_pages=10)
+            assert False, "page limit not enforced"
+        except pdf_extract.PDFLimitError:
+            pass
+        print("  [OK] Page limit enforced")
+
+    pdf_extract.shutdown()
+    print("[OK] All PDF extraction tests passed!\n")
+
+
+def test_batch_workload():
+    """Test that the vectorized engine matches compute_weekly_workload"""
+    print("Testing workload_batch.py...")
+
+    assert compute_weekly_workload_batch([]) == []
+
+    # Sunday/Monday boundaries and a year boundary
+    assignments = [
+        Assignment(name="A", course="X", due_date=date(2024, 10, 20), assignment_type=AssignmentType.EXAM),
+        Assignment(name="B", course="X", due_date=date(2024, 10, 21), assignment_type=AssignmentType.QUIZ),
+        Assignment(name="C", course="X", due_date=date(2024, 12, 31), assignment_type=AssignmentType.PROJECT),
+        Assignment(name="D", course="X", due_date=date(2025, 1, 5), assignment_type=AssignmentType.OTHER),
+    ]
+    assert compute_weekly_workload_batch(assignments) == compute_weekly_workload(assignments)
+    print("  [OK] Week boundaries match")
+
+    assignments = generate_assignments(5000, seed=1)
+    assert compute_weekly_workload_batch(assignments) == compute_weekly_workload(assignments)
+    print("  [OK] Random assignment set matches")
+
+    courses, students = generate_cohort(course_count=8, student_count=50)
+    students["no-courses"] = []
+    workloads = compute_cohort_workloads(courses, students)
+    for student_id, codes in students.items():
+        expected = compute_weekly_workload([a for code in codes for a in courses[code]])
+        assert workloads[student_id] == expected, student_id
+    print("  [OK] Cohort workloads match per-student computation")
+
+    try:
+        compute_cohort_workloads(courses, {"s1": ["NOPE 101"]})
+        assert False, "unknown course accepted"
+    except ValueError:
+        pass
+    assert compute_cohort_workloads({}, {"s1": []}) == {"s1": []}
+    print("  [OK] Unknown courses rejected")
+
+    print("[OK] All batch workload tests passed!\n")
+
+
+def test_workload_query():
+    """Test that WorkloadIndex queries match scanning the weekly workload"""
+    print("Testing workload_query.py...")
+
+    empty = WorkloadIndex([])
+    assert empty.weekly_workload() == [] and empty.top_weeks(3) == []
+    assert empty.summary() is None and empty.peak_window(2) is None
+    assert empty.heatmap() == (None, [])
+    print("  [OK] Empty index")
+
+    assignments = generate_assignments(3000, seed=2)
+    index = WorkloadIndex(assignments)
+    weeks = compute_weekly_workload(assignments)
+    assert index.weekly_workload() == weeks
+    assert index.week(weeks[3].week_start_date) == weeks[3]
+    assert index.week(date(2000, 1, 3)) is None
+    expected = sorted(weeks, key=lambda w: (-w.intensity_score, w.week_start_date))
+    assert index.top_weeks(5) == expected[:5]
+    assert index.top_weeks(10_000) == expected
+    print("  [OK] Weeks and top weeks match compute_weekly_workload")
+
+    start, end = date(2024, 9, 10), date(2024, 10, 31)
+    due = [a for a in assignments if start <= a.due_date <= end]
+    summary = index.summary(start, end)
+    assert summary.assignment_count == len(due)
+    assert summary.intensity_score == sum(TYPE_WEIGHTS[a.assignment_type] for a in due)
+    assert summary.assignments_by_type == {
+        t.value: n for t in AssignmentType if (n := sum(a.assignment_type == t for a in due))
+    }
+    assert sum(summary.intensity_by_course.values()) == summary.intensity_score
+    course_intensity = list(summary.intensity_by_course.values())
+    assert course_intensity == sorted(course_intensity, reverse=True)
+    assert index.summary().assignment_count == len(assignments)
+    print("  [OK] Range summaries by type and course")
+
+    # Brute force over the calendar, including weeks without assignments
+    by_week = {w.week_start_date: w.intensity_score for w in weeks}
+    first = weeks[0].week_start_date
+    week_count = (weeks[-1].week_start_date - first).days // 7 + 1
+    intensities = [by_week.get(first + timedelta(weeks=i), 0.0) for i in range(week_count)]
+    for length in (1, 3, 8):
+        sums = [sum(intensities[i:i + length]) for i in range(week_count - length + 1)]
+        assert index.rolling_intensity(length).tolist() == sums
+        best = sums.index(max(sums))
+        window = index.peak_window(length)
+        assert window.start_date == first + timedelta(weeks=best)
+        assert window.end_date == window.start_date + timedelta(weeks=length, days=-1)
+        assert window.intensity_score == max(sums)
+    assert index.peak_window(10_000).intensity_score == sum(intensities)
+    try:
+        index.peak_window(0)
+        assert False, "empty window accepted"
+    except ValueError:
+        pass
+    print("  [OK] Rolling windows and peak window")
+
+    heatmap_start, rows = index.heatmap(date(2024, 10, 2), date(2024, 10, 20))
+    assert heatmap_start == date(2024, 9, 30) and len(rows) == 3
+    daily = {}
+    for a in assignments:
+        daily[a.due_date] = daily.get(a.due_date, 0.0) + TYPE_WEIGHTS[a.assignment_type]
+    assert rows == [
+        [daily.get(heatmap_start + timedelta(days=7 * week + day), 0.0) for day in range(7)]
+        for week in range(3)
+    ]
+    print("  [OK] Daily heatmap")
+
+    courses, students = generate_cohort(course_count=10, student_count=200)
+    cohort = WorkloadIndex.from_cohort(courses, students)
+    per_student = compute_cohort_workloads(courses, students)
+    department = {}
+    for student_weeks in per_student.values():
+        for week in student_weeks:
+            department[week.week_start_date] = department.get(week.week_start_date, 0) + week.assignment_count
+    assert {w.week_start_date: w.assignment_count for w in cohort.weekly_workload()} == department
+    try:
+        WorkloadIndex.from_cohort(courses, {"s1": ["NOPE 101"]})
+        assert False, "unknown course accepted"
+    except ValueError:
+        pass
+    print("  [OK] Cohort index weights courses by enrollment")
+
+    fall = terms.parse_term("Fall 2024")
+    assert [w.week_number for w in WorkloadIndex(assignments, term=fall).top_weeks(3)] == [
+        fall.week_number(w.week_start_date) for w in expected[:3]
+    ]
+    print("  [OK] Term week numbers")
+
+    def quiz(due):
+        return Assignment(name="Quiz", course="CSE 374", due_date=due, assignment_type=AssignmentType.QUIZ)
+
+    try:
+        WorkloadIndex([quiz(date(2024, 1, 1)), quiz(date(2024, 1, 1) + timedelta(days=MAX_SPAN_DAYS))])
+        assert False, "span longer than MAX_SPAN_DAYS accepted"
+    except WorkloadSpanError:
+        pass
+    last = WorkloadIndex([quiz(date(9999, 12, 29)), quiz(date.max)])
+    assert last.summary().end_date == date.max
+    assert last.summary().assignment_count == 2
+    assert last.peak_window(4).end_date == date.max
+    assert [w.week_end_date for w in last.weekly_workload()] == [date.max]
+    print("  [OK] Long spans rejected, weeks clamped to date.max")
+
+    print("[OK] All workload query tests passed!\n")
+
+
+def test_single_flight():
+    """Test that identical in-flight extractions share one LLM call"""
+    print("Testing request coalescing...")
+
+    items = [{"name": "Lab 1", "course": "X", "due_date": "2024-10-16", "assignment_type": "homework"}]
+    text = "Lab reports are due the week after each lab session"
+    original_cache = parser.get_result_cache()
+    parser.set_result_cache(None)
+    transport = FakeLLMTransport(lambda s, u: json.dumps(items), latency=0.2)
+    llm.set_transport(transport, api_key="test-key")
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: parser.parse_syllabus(text, "BIO 180"), range(6)))
+        assert transport.requests == 1, transport.requests
+        assert all([a.name for a in r] == ["Lab 1"] for r in results)
+        print("  [OK] Concurrent threads share one LLM call")
+
+        async def run_async():
+            return await asyncio.gather(*(parser.parse_syllabus_async(text, "BIO 180") for _ in range(6)))
+
+        results = asyncio.run(run_async())
+        assert transport.requests == 2, transport.requests
+        assert all(r[0].course == "BIO 180" for r in results)
+
+        asyncio.run(parser.parse_syllabus_async(text, "BIO 181"))
+        assert transport.requests == 3
+        print("  [OK] Concurrent tasks share one LLM call per course")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original_cache)
+
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("LLM unavailable")
+
+    async def run_failing():
+        return await asyncio.gather(
+            *(flights.run_async("k", failing) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(run_failing())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def cancel_waiter():
+        leader = asyncio.create_task(flights.run_async("k", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.run_async("k", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(cancel_waiter()) == "done"
+    assert flights.stats() == {"leaders": 2, "coalesced": 3, "in_flight": 0}
+    print("  [OK] Errors reach every waiter; a cancelled waiter leaves the leader running")
+
+    calls = []
+
+    async def counted():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def cancel_leader():
+        leader = asyncio.create_task(flights.run_async("k", counted))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(flights.run_async("k", counted)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(cancel_leader()) == ["done"] * 3
+    assert len(calls) == 2
+    assert flights.stats()["in_flight"] == 0
+
+    def interrupted():
+        time.sleep(0.05)
+        raise KeyboardInterrupt
+
+    def threaded(leader):
+        if leader:
+            try:
+                flights.run("t", interrupted)
+            except KeyboardInterrupt:
+                return "interrupted"
+        time.sleep(0.01)
+        return flights.run("t", lambda: "done")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        assert list(pool.map(threaded, [True, False, False])) == ["interrupted", "done", "done"]
+    print("  [OK] A cancelled leader hands the call to one of its waiters")
+
+    print("[OK] All coalescing tests passed!\n")
+
+
+def test_rate_limiting():
+    """Test token buckets, adaptive concurrency and throttling retries"""
+    print("Testing ratelimit.py...")
+
+    now = [0.0]
+    bucket = ratelimit.TokenBucket(60, clock=lambda: now[0])
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(2) == 2.0
+    now[0] = 10.0
+    assert bucket.reserve(1) == 0
+    bucket.adjust(-100)
+    assert bucket.available == 60
+    print("  [OK] Token bucket refills per second and caps at one minute of budget")
+
+    limiter = ratelimit.AdaptiveConcurrency(max_limit=4, cooldown_seconds=60)
+    assert all(limiter.try_acquire() for _ in range(4))
+    assert not limiter.try_acquire()
+    limiter.release(throttled=True)
+    limiter.release(throttled=True)
+    assert limiter.limit == 2.0
+    assert not limiter.try_acquire()
+    limiter.release(throttled=False)
+    assert limiter.limit == 2.5
+    assert limiter.in_flight == 1 and limiter.try_acquire()
+    print("  [OK] Concurrency limit halves once per throttling burst and grows on success")
+
+    async def wait_for_slot():
+        limiter = ratelimit.AdaptiveConcurrency(max_limit=1)
+        await limiter.acquire_async()
+        waiter = asyncio.create_task(limiter.acquire_async())
+        cancelled = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        assert not waiter.done()
+        limiter.release(throttled=False)
+        await asyncio.wait_for(waiter, 1)
+        await asyncio.gather(cancelled, return_exceptions=True)
+        return limiter.in_flight
+
+    assert asyncio.run(wait_for_slot()) == 1
+    print("  [OK] Waiters are admitted as slots free up")
+
+    items = [{"name": "Problem Set 3", "course": "X", "due_date": "2024-10-30", "assignment_type": "homework"}]
+    text = "Problem sets are due every other week"
+    original_cache = parser.get_result_cache()
+    parser.set_result_cache(None)
+    try:
+        ratelimit.set_governor(ratelimit.LLMGovernor(
+            requests_per_minute=0, tokens_per_minute=0, max_retries=3,
+            retry_base_seconds=0.01, retry_max_seconds=0.02,
+        ))
+        transport = FakeLLMTransport(lambda s, u: json.dumps(items), error_statuses=[429, 529], retry_after=0.2)
+        llm.set_transport(transport, api_key="test-key")
+        llm_stage = metrics.STAGE_SECONDS.labels("llm")
+        wait_stage = metrics.STAGE_SECONDS.labels("llm_wait")
+        llm_before, wait_before = llm_stage.sum, wait_stage.sum
+        start = time.perf_counter()
+        assignments = parser.parse_syllabus(text, "MATH 126")
+        elapsed = time.perf_counter() - start
+        assert [a.name for a in assignments] == ["Problem Set 3"]
+        assert transport.requests == 3
+        assert elapsed >= 0.4, f"Retry-After not honored ({elapsed:.2f}s)"
+        assert ratelimit.get_governor().stats()["retries"] == 2
+        print("  [OK] 429 and 529 responses retried after Retry-After")
+
+        if metrics.METRICS_ENABLED:
+            assert llm_stage.sum - llm_before < 0.2
+            assert wait_stage.sum - wait_before >= 0.4
+            print("  [OK] Retry backoff is timed as llm_wait, not as the llm request")
+
+        ratelimit.set_governor(ratelimit.LLMGovernor(
+            requests_per_minute=0, tokens_per_minute=0, max_retries=2,
+            retry_base_seconds=0.01, retry_max_seconds=0.02,
+        ))
+        transport = FakeLLMTransport(lambda s, u: json.dumps(items), requests_per_minute=0)
+        llm.set_transport(transport, api_key="test-key")
+        for parse in (parser.parse_syllabus, lambda *args: asyncio.run(parser.parse_syllabus_async(*args))):
+            try:
+                parse(text, "MATH 126")
+                assert False, "throttling returned a result"
+            except ratelimit.LLMThrottledError:
+                pass
+        assert transport.requests == 6
+        assert ratelimit.get_governor().stats()["failures"] == 2
+        print("  [OK] Persistent throttling raises LLMThrottledError instead of returning []")
+
+        ratelimit.set_governor(ratelimit.LLMGovernor(requests_per_minute=600, tokens_per_minute=0))
+        transport = FakeLLMTransport(lambda s, u: json.dumps(items))
+        llm.set_transport(transport, api_key="test-key")
+        governor = ratelimit.get_governor()
+        governor.requests.available = 0
+        start = time.perf_counter()
+        parser.parse_syllabus(text + " (budget)", "MATH 126")
+        assert time.perf_counter() - start >= 0.09
+        print("  [OK] Calls wait for the per-minute request budget")
+
+        governor = ratelimit.LLMGovernor(requests_per_minute=60, tokens_per_minute=600)
+        now = [0.0]
+        governor.tokens = ratelimit.TokenBucket(600, clock=lambda: now[0])
+
+        async def cancel_while_waiting():
+            governor.tokens.reserve(900)
+            waiting = asyncio.create_task(governor.call_async(lambda: asyncio.sleep(0), estimated_tokens=100))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+
+        asyncio.run(cancel_while_waiting())
+        assert governor.tokens.available == -300 and governor.requests.available == 60
+        governor.tokens.adjust(-900)
+
+        def unreachable():
+            raise ConnectionError("no route to the API")
+
+        try:
+            governor.call(unreachable, estimated_tokens=100)
+            assert False, "connection error swallowed"
+        except ConnectionError:
+            pass
+        assert governor.tokens.available == 600
+        print("  [OK] Cancelled and failed calls give their token reservation back")
+    finally:
+        llm.set_transport(None)
+        ratelimit.set_governor(None)
+        parser.set_result_cache(original_cache)
+
+    print("[OK] All rate limiting tests passed!\n")
+
+
+def test_metrics():
+    """Test Prometheus rendering and the cost of stage timers"""
+    print("Testing metrics.py...")
+
+    histogram = metrics.Histogram("test_seconds", "Test histogram.", labelnames=("stage",), buckets=(0.1, 1.0))
+    counter = metrics.Counter("test_total", "Test counter.", labelnames=("kind",))
+    try:
+        histogram.observe(0.05, "a")
+        histogram.observe(0.5, "a")
+        histogram.observe(5, "a")
+        counter.inc(3, 'say "hi"')
+        text = metrics.render()
+    finally:
+        metrics._registry.remove(histogram)
+        metrics._registry.remove(counter)
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
+    assert 'test_total{kind="say \\"hi\\""} 3' in text
+    print("  [OK] Histograms and counters rendered in Prometheus text format")
+
+    before = metrics.STAGE_SECONDS.labels("workload").count
+    compute_weekly_workload(generate_assignments(10))
+    assert metrics.STAGE_SECONDS.labels("workload").count == before + 1
+
+    iterations = 20000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.timed("overhead_check"):
+            pass
+    per_call = (time.perf_counter() - start) / iterations
+    metrics.STAGE_SECONDS._children.pop(("overhead_check",))
+    assert per_call < 20e-6, f"timer overhead {per_call * 1e6:.1f} us"
+    print(f"  [OK] Stage timer overhead {per_call * 1e6:.2f} us per block")
+
+    print("[OK] All metrics tests passed!\n")
+
+
+def test_incremental_workload():
+    """Test that IncrementalWorkload tracks compute_weekly_workload"""
+    print("Testing IncrementalWorkload...")
+
+    courses, _ = generate_cohort(course_count=6, student_count=0)
+    plan = IncrementalWorkload()
+    enabled = []
+    rng = random.Random(3)
+
+    for _ in range(30):
+        code = rng.choice(list(courses))
+        if code in enabled:
+            changed = plan.remove_many(courses[code])
+            enabled.remove(code)
+        else:
+            changed = plan.add_many(courses[code])
+            enabled.append(code)
+
+        current = [a for c in enabled for a in courses[c]]
+        expected = compute_weekly_workload(current)
+        assert plan.workloads() == expected
+        assert len(plan) == len(current)
+        touched = {get_week_start(a.due_date) for a in courses[code]}
+        assert set(changed) == touched
+        by_week = {w.week_start_date: w for w in expected}
+        assert all(changed[week] == by_week.get(week) for week in changed)
+    print("  [OK] Toggling courses matches full recomputation")
+
+    plan = IncrementalWorkload()
+    quiz = Assignment(name="Quiz", course="X", due_date=date(2024, 10, 17), assignment_type=AssignmentType.QUIZ)
+    moved = quiz.model_copy(update={"due_date": date(2024, 10, 24)})
+    plan.add(quiz)
+    changed = plan.update(quiz, moved)
+    assert changed[date(2024, 10, 14)] is None
+    assert changed[date(2024, 10, 21)].intensity_score == 1.5
+    assert list(plan.remove(moved).values()) == [None]
+    try:
+        plan.remove(moved)
+        assert False, "missing assignment removed"
+    except ValueError:
+        pass
+    print("  [OK] Update moves an assignment between weeks; empty weeks reported as None")
+
+    fall = terms.parse_term("Fall 2024")
+    current = [a for c in enabled for a in courses[c]]
+    plan = IncrementalWorkload(current, term=fall)
+    expected = compute_weekly_workload(current, fall)
+    assert plan.workloads() == expected
+    assert all(w.week_number is not None for w in plan.workloads())
+    week = expected[0]
+    assert plan.week(week.week_start_date) == week
+    plan.add(quiz)
+    assert plan.workloads() == compute_weekly_workload(current + [quiz], fall)
+    print("  [OK] Term weeks numbered as in compute_weekly_workload")
+
+    print("[OK] All incremental workload tests passed!\n")
+
+
+def test_course_store():
+    """Test the SQLite course catalog"""
+    print("Testing store.py...")
+
+    def hw(name, course, due):
+        return Assignment(name=name, course=course, due_date=due, assignment_type=AssignmentType.HOMEWORK)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CourseStore(os.path.join(tmp, "catalog.sqlite3"))
+        try:
+            assert store.find_course("CSE 374", "Fall 2024", "abc") is None
+
+            store.save_courses([
+                ("CSE 374", "Fall 2024", "abc", [hw("HW 2", "CSE 374", date(2024, 10, 22)),
+                                                 hw("HW 1", "CSE 374", date(2024, 10, 8))], None),
+                ("MATH 101", "Fall 2024", "def", [hw("PSet 1", "MATH 101", date(2024, 10, 15))], "Calculus"),
+                ("CSE 374", None, "abc", [hw("Old HW", "CSE 374", date(2024, 1, 10))], None),
+            ])
+            stored = store.find_course("CSE 374", "Fall 2024", "abc")
+            assert [a.name for a in stored] == ["HW 1", "HW 2"]
+            assert stored[0].assignment_type == AssignmentType.HOMEWORK
+            print("  [OK] Courses stored and found by code, term and source hash")
+
+            plan = store.get_assignments(["CSE 374", "MATH 101"], "Fall 2024", start=date(2024, 10, 10))
+            assert [a.name for a in plan] == ["PSet 1", "HW 2"]
+            assert [a.name for a in store.get_assignments(["CSE 374"])] == ["Old HW"]
+            assert store.get_assignments([]) == []
+            print("  [OK] Range queries filter by course, term and due date")
+
+            # A newer extraction of the same course replaces the older one in plans
+            store.save_course("CSE 374", "Fall 2024", "xyz", [hw("HW 1 (revised)", "CSE 374", date(2024, 10, 9))])
+            plan = store.get_assignments(["CSE 374"], "Fall 2024")
+            assert [a.name for a in plan] == ["HW 1 (revised)"]
+            store.save_course("CSE 374", "Fall 2024", "abc", [hw("HW 1", "CSE 374", date(2024, 10, 8))])
+            assert [a.name for a in store.find_course("CSE 374", "Fall 2024", "abc")] == ["HW 1"]
+            print("  [OK] Latest extraction of a course is used")
+
+            async def save_and_find():
+                await store.save_course_async("CSE 374", "Winter 2025", "abc", [hw("HW 1", "CSE 374", date(2025, 1, 14))])
+                return await store.find_course_async("CSE 374", "Winter 2025", "abc")
+
+            assert [a.due_date for a in asyncio.run(save_and_find())] == [date(2025, 1, 14)]
+            print("  [OK] Async wrappers read and write on a worker thread")
+
+            courses = store.list_courses("Fall 2024")
+            assert [(c.code, c.name) for c in courses] == [("CSE 374", "CSE 374"), ("MATH 101", "Calculus")]
+            print("  [OK] Courses listed by term")
+        finally:
+            store.close()
+
+        # Rows from another prompt version or model are not served
+        path = os.path.join(tmp, "catalog.sqlite3")
+        for version, model in (("v2", ""), ("", "other-model")):
+            other = CourseStore(path, prompt_version=version, model=model)
+            try:
+                assert other.find_course("CSE 374", "Fall 2024", "abc") is None
+                assert other.get_assignments(["CSE 374"], "Fall 2024") == []
+                other.save_course("CSE 374", "Fall 2024", "abc", [hw("HW 1 (v2)", "CSE 374", date(2024, 10, 8))])
+                assert [a.name for a in other.find_course("CSE 374", "Fall 2024", "abc")] == ["HW 1 (v2)"]
+            finally:
+                other.close()
+        print("  [OK] Rows from another prompt version or model are ignored")
+
+        # Catalogs from before rows were versioned gain the columns
+        legacy = os.path.join(tmp, "legacy.sqlite3")
+        conn = sqlite3.connect(legacy)
+        conn.execute(
+            "CREATE TABLE courses (id INTEGER PRIMARY KEY, code TEXT NOT NULL, term TEXT NOT NULL DEFAULT '',"
+            " name TEXT NOT NULL, source_hash TEXT NOT NULL, created_at REAL NOT NULL,"
+            " UNIQUE (code, term, source_hash))"
+        )
+        conn.execute("INSERT INTO courses (code, name, source_hash, created_at) VALUES ('CSE 374', 'CSE 374', 'abc', 0)")
+        conn.commit()
+        conn.close()
+        migrated = CourseStore(legacy, prompt_version="v1", model="m")
+        try:
+            assert migrated.find_course("CSE 374", None, "abc") is None
+            migrated.save_course("CSE 374", None, "abc", [hw("HW 1", "CSE 374", date(2024, 10, 8))])
+            assert [a.name for a in migrated.find_course("CSE 374", None, "abc")] == ["HW 1"]
+        finally:
+            migrated.close()
+        print("  [OK] Unversioned catalogs are migrated and their rows re-extracted")
+
+    print("[OK] All course store tests passed!\n")
+
+
+def test_prompt_filter():
+    """Test that non-schedule text is dropped before the LLM call"""
+    print("Testing prompt filter...")
+
+    policy = [f"Policy paragraph {n}: be kind, cite sources, and attend section." for n in range(12)]
+    syllabus = "\n".join(
+        ["BIO 180 Introductory Biology", "Winter 2025"]
+        + policy
+        + ["Schedule", "Lab report 1", "January 24", "Midterm exam on Feb 14"]
+        + policy
+    ) + "\fPage two office hours\nFinal paper due March 14"
+
+    filtered = parser.filter_schedule_text(syllabus)
+    assert filtered.startswith("BIO 180 Introductory Biology\nWinter 2025\n...")
+    assert "Lab report 1\nJanuary 24\nMidterm exam on Feb 14" in filtered
+    assert "Policy paragraph 5" not in filtered
+    assert "\f" in filtered and filtered.endswith("Final paper due March 14")
+    report = parser.prompt_filter_report(syllabus, filtered)
+    assert report["saved_tokens"] > 0 and 0.5 < report["saved_ratio"] < 1
+    print(f"  [OK] Policies dropped, dates kept with context ({report['saved_ratio']:.0%} tokens saved)")
+
+    assert parser.filter_schedule_text("\n".join(policy)) == "\n".join(policy)
+    short = "Homework 1 due Oct 3\nSee the course site"
+    assert parser.filter_schedule_text(short) == short
+    print("  [OK] Text without schedule lines, or barely shorter, sent unchanged")
+
+    table = "\n".join(
+        ["CSE 351 Hardware/Software Interface", "Autumn 2024"]
+        + policy
+        + ["Homework 1 due Oct 3", "10/15  Pointers  Quiz 3", "11/07  Midterm Exam", "Thurs  Lab 4"]
+        + policy
+    )
+    filtered_table = parser.filter_schedule_text(table, context_lines=0)
+    for row in ("10/15  Pointers  Quiz 3", "11/07  Midterm Exam", "Thurs  Lab 4"):
+        assert row in filtered_table, row
+    assert "Policy paragraph 5" not in filtered_table
+    print("  [OK] Bare m/d and weekday table rows kept")
+
+    prompts = []
+
+    def responder(system_prompt, user_prompt):
+        prompts.append(user_prompt)
+        return "[]"
+
+    original_cache = parser.get_result_cache()
+    original_fast_path = parser.RULE_FAST_PATH_ENABLED
+    llm.set_transport(FakeLLMTransport(responder), api_key="test-key")
+    parser.set_result_cache(None)
+    parser.RULE_FAST_PATH_ENABLED = False
+    removed = metrics.PROMPT_FILTER_TOKENS.value("removed")
+    try:
+        parser.parse_syllabus(syllabus, "BIO 180")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original_cache)
+        parser.RULE_FAST_PATH_ENABLED = original_fast_path
+
+    assert prompts == [parser.build_user_prompt(filtered, "BIO 180")]
+    assert metrics.PROMPT_FILTER_TOKENS.value("removed") - removed == report["saved_tokens"]
+    print("  [OK] parse_syllabus sends the filtered text and counts removed tokens")
+
+    print("[OK] All prompt filter tests passed!\n")
+
+
+def test_packed_parsing():
+    """Test packing several short syllabi into one LLM request"""
+    print("Testing packed multi-syllabus parsing...")
+
+    syllabi = [
+        ("Homework 1 due October 3, 2024", "CSE 374"),
+        ("Quiz 1 on October 10, 2024", "MATH 126"),
+        ("Homework 2 due October 17, 2024", "CSE 374"),
+        ("x" * 400, "PHYS 121"),
+    ]
+    assert parser.pack_syllabi(syllabi, max_tokens=50) == [[0, 1], [2], [3]]
+    print("  [OK] Groups fit the token budget and never repeat a course")
+
+    prompts = []
+
+    def responder(system_prompt, user_prompt):
+        prompts.append((system_prompt, user_prompt))
+        if system_prompt == parser.PACKED_SYSTEM_PROMPT:
+            # MATH 126 is left out, so it is extracted on its own
+            return json.dumps({
+                "CSE 374": [{"name": "Homework 1", "course": "CSE 374", "due_date": "2024-10-03", "assignment_type": "homework"}],
+                "BIO 180": [],
+            })
+        return json.dumps([{"name": "Quiz 1", "course": "MATH 126", "due_date": "2024-10-10", "assignment_type": "quiz"}])
+
+    original = (parser.get_result_cache(), parser.RULE_FAST_PATH_ENABLED, parser.PACKING_ENABLED)
+    llm.set_transport(FakeLLMTransport(responder), api_key="test-key")
+    parser.RULE_FAST_PATH_ENABLED = False
+    parser.PACKING_ENABLED = True
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskCache(os.path.join(tmp, "results.sqlite3"))
+            parser.set_result_cache(cache)
+            results = asyncio.run(parser.parse_syllabi_async(syllabi[:2]))
+            assert [[a.name for a in assignments] for assignments in results] == [["Homework 1"], ["Quiz 1"]]
+            assert [system for system, _ in prompts] == [parser.PACKED_SYSTEM_PROMPT, parser.SYSTEM_PROMPT]
+            assert prompts[0][1] == parser.build_packed_prompt(syllabi[:2])
+            print("  [OK] One packed request, missing course re-extracted separately")
+
+            assert cache.get(parser.result_cache_key(*syllabi[0], parser.resolve_term(None, syllabi[0][0]))) is not None
+            assert asyncio.run(parser.parse_syllabi_async(syllabi[:2])) == results
+            assert len(prompts) == 2
+            print("  [OK] Per-course results cached under the single-syllabus key")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original[0])
+        parser.RULE_FAST_PATH_ENABLED, parser.PACKING_ENABLED = original[1:]
+
+    print("[OK] All packed parsing tests passed!\n")
+
+
+def test_prompt_caching():
+    """Test that the system prompt is sent cacheable and cache usage is counted"""
+    print("Testing prompt caching...")
+
+    system_tokens = ratelimit.estimate_tokens(parser.SYSTEM_PROMPT)
+
+    def counts():
+        return (
+            [metrics.LLM_PROMPT_CACHE.value(outcome) for outcome in ("hit", "write", "miss")],
+            metrics.LLM_TOKENS.value("cache_read"),
+            metrics.LLM_TOKENS.value("cache_write"),
+        )
+
+    async def stream_once():
+        return [text async for text in parser.stream_llm_async(parser.SYSTEM_PROMPT, "Homework 1 due Oct 3")]
+
+    original = parser.PROMPT_CACHE_ENABLED
+    transport = FakeLLMTransport(prompt_cache_min_tokens=100)
+    llm.set_transport(transport, api_key="test-key")
+    try:
+        outcomes, read, write = counts()
+        parser.call_llm(parser.SYSTEM_PROMPT, "Homework 1 due Oct 3")
+        asyncio.run(stream_once())
+        asyncio.run(parser.call_llm_async(parser.SYSTEM_PROMPT, "Quiz 2 on Oct 10"))
+        new_outcomes, new_read, new_write = counts()
+        assert [b - a for a, b in zip(outcomes, new_outcomes)] == [2, 1, 0]
+        assert new_write - write == system_tokens
+        assert new_read - read == 2 * system_tokens
+        print("  [OK] First request writes the system prompt, later ones (also streamed) read it")
+
+        parser.PROMPT_CACHE_ENABLED = False
+        outcomes, _, _ = counts()
+        parser.call_llm(parser.SYSTEM_PROMPT, "Homework 1 due Oct 3")
+        assert counts()[0][2] - outcomes[2] == 1
+        print("  [OK] SYLLABUS_PROMPT_CACHE=0 sends the system prompt uncached")
+
+        parser.PROMPT_CACHE_ENABLED = True
+        llm.set_transport(FakeLLMTransport(), api_key="test-key")
+        outcomes, _, _ = counts()
+        parser.call_llm(parser.SYSTEM_PROMPT, "Homework 1 due Oct 3")
+        assert counts()[0][2] - outcomes[2] == 1
+        print("  [OK] Prompts below the API's minimum length are not cached")
+    finally:
+        llm.set_transport(None)
+        parser.PROMPT_CACHE_ENABLED = original
+
+    print("[OK] All prompt caching tests passed!\n")
+
+
+def test_response_salvage():
+    """Test that valid items survive a partly invalid LLM response"""
+    print("Testing partial response salvage...")
+
+    good = {"name": "Homework 1", "course": "X", "due_date": "2024-10-03", "assignment_type": "homework"}
+    bad_date = {"name": "Quiz 1", "course": "X", "due_date": "Oct 10th", "assignment_type": "quiz"}
+    bad_type = {"name": "Lab 1", "course": "X", "due_date": "2024-10-12", "assignment_type": "lab"}
+    content = "Here you go:\n```json\n" + json.dumps([good, bad_date, bad_type, {"name": None}]) + "\n```"
+
+    assignments, errors = parser.parse_llm_response_partial(content, "CSE 374")
+    assert [a.name for a in assignments] == ["Homework 1"]
+    assert [e.item for e in errors] == [bad_date, bad_type, {"name": None}]
+    assert errors[1].error.startswith("ValueError")
+    try:
+        parser.parse_llm_response(content, "CSE 374")
+        assert False, "strict parsing should reject the response"
+    except ValueError:
+        pass
+    print("  [OK] Items are validated independently, errors reported per item")
+
+    broken = '[' + json.dumps(good) + ', {"name": oops}, ' + json.dumps(good)[:-20]
+    assignments, errors = parser.parse_llm_response_partial(broken)
+    assert len(assignments) == 1 and errors[0].item == '{"name": oops}'
+    assert errors[-1].error == parser.TRUNCATED_ERROR and errors[-1].item == json.dumps(good)[:-20]
+    assert parser.is_truncated(errors) and not parser.is_truncated(errors[:-1])
+    for content in ("I could not find any assignments.", ""):
+        try:
+            parser.parse_llm_response_partial(content)
+            assert False, "a response without an array should be rejected"
+        except ValueError:
+            pass
+    print("  [OK] Invalid JSON and truncated output keep the decodable items")
+
+    prompts = []
+    fixed = {"name": "Quiz 1", "course": "CSE 374", "due_date": "2024-10-10", "assignment_type": "quiz"}
+
+    def responder(system_prompt, user_prompt):
+        prompts.append((system_prompt, user_prompt))
+        if system_prompt == parser.REPAIR_SYSTEM_PROMPT:
+            return json.dumps([fixed])
+        return json.dumps([good, bad_date])
+
+    original = (parser.get_result_cache(), parser.RESPONSE_REPAIR_ENABLED)
+    llm.set_transport(FakeLLMTransport(responder), api_key="test-key")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            parser.set_result_cache(DiskCache(os.path.join(tmp, "results.sqlite3")))
+            repaired = metrics.RESPONSE_ITEM_ERRORS.value("repaired")
+            result = parser.extract_chunk("Homework 1 due Oct 3, Quiz 1 Oct 10th", "CSE 374")
+            assignments = result.assignments
+            assert [a.name for a in assignments] == ["Homework 1", "Quiz 1"]
+            assert result.complete
+            assert [system for system, _ in prompts] == [parser.SYSTEM_PROMPT, parser.REPAIR_SYSTEM_PROMPT]
+            assert "Homework 1" not in prompts[1][1] and "Oct 10th" in prompts[1][1]
+            assert metrics.RESPONSE_ITEM_ERRORS.value("repaired") - repaired == 1
+            assert parser.extract_chunk("Homework 1 due Oct 3, Quiz 1 Oct 10th", "CSE 374").assignments == assignments
+            assert len(prompts) == 2
+            print("  [OK] Only the rejected item is re-queried, repaired result cached")
+
+            async def stream():
+                return [a async for a in parser.stream_chunk_async("Quiz 1 on Oct 10th", "CSE 374")]
+
+            assert [a.name for a in asyncio.run(stream())] == ["Homework 1", "Quiz 1"]
+            assert prompts[-1][0] == parser.REPAIR_SYSTEM_PROMPT
+            print("  [OK] Streamed extraction yields repaired items at the end")
+
+            parser.RESPONSE_REPAIR_ENABLED = False
+            dropped = metrics.RESPONSE_ITEM_ERRORS.value("dropped")
+            calls = len(prompts)
+            result = asyncio.run(parser.extract_chunk_async("Homework 1 due Oct 3", "CSE 374"))
+            assert [a.name for a in result.assignments] == ["Homework 1"]
+            assert not result.complete
+            assert len(prompts) == calls + 1
+            assert metrics.RESPONSE_ITEM_ERRORS.value("dropped") - dropped == 1
+            assert parser.get_result_cache().get(parser.result_cache_key("Homework 1 due Oct 3", "CSE 374")) is None
+            print("  [OK] Without repair the valid items are kept but not cached or marked complete")
+
+            # Cut off at max_tokens: the open element is repaired, but the
+            # elements after it are lost, so the window stays uncached
+            parser.RESPONSE_REPAIR_ENABLED = True
+            truncated_text = "Homework 1 due Oct 3, Homework 2 due Oct 17, Quiz 1 Oct 10th"
+
+            def truncating_responder(system_prompt, user_prompt):
+                prompts.append((system_prompt, user_prompt))
+                if system_prompt == parser.REPAIR_SYSTEM_PROMPT:
+                    return json.dumps([fixed])
+                return "[" + json.dumps(good) + ', {"name": "Homework 2", "due_da'
+
+            llm.set_transport(FakeLLMTransport(truncating_responder), api_key="test-key")
+            for extract in (parser.extract_chunk, lambda *args: asyncio.run(parser.extract_chunk_async(*args))):
+                result = extract(truncated_text, "CSE 374")
+                assert "Homework 1" in [a.name for a in result.assignments]
+                assert not result.complete
+                assert parser.get_result_cache().get(parser.result_cache_key(truncated_text, "CSE 374")) is None
+            print("  [OK] Truncated responses are marked incomplete and not cached")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original[0])
+        parser.RESPONSE_REPAIR_ENABLED = original[1]
+
+    print("[OK] All response salvage tests passed!\n")
+
+
+def test_term_calendar():
+    """Test term-aware resolution of partial dates and week references"""
+    print("Testing term calendars...")
+
+    spring = terms.parse_term("Spring 2027")
+    assert spring.name == "Spring 2027" and spring.start == date(2027, 1, 6)
+    assert spring.resolve(3, 4) == date(2027, 3, 4)
+    assert terms.parse_term("Autumn quarter '26").resolve(1, 5) == date(2027, 1, 5)
+    assert terms.parse_term("no term here") is None
+    assert terms.parse_term("Summer 10-week session") is None
+    assert terms.parse_term("Spring 12 chapters") is None
+    print("  [OK] Dates without a year land in the term, not the current year")
+
+    mislabeled = "BIO 180\nSummer 10-week session, Spring 2012 edition\nLab 1 due July 3, 2025\nLab 2 due July 17, 2025"
+    assert terms.infer_term(mislabeled).name == "Summer 2025"
+    assert parser.normalize_date("07-03", terms.infer_term(mislabeled)) == date(2025, 7, 3)
+    assert terms.infer_term("Fall 2024\nFinal exam on January 8, 2025").name == "Fall 2024"
+    print("  [OK] Bare two-digit years ignored; full dates win over a label that disagrees")
+
+    assert spring.week_start(1) == date(2027, 1, 4)
+    assert spring.week_number(date(2027, 1, 10)) == 1
+    assert spring.week_number(date(2027, 2, 18)) == 7
+    assert spring.resolve_week_day(7, 3) == date(2027, 2, 18)
+    assert terms.find_week_reference("Lab 2 due Week 7, Thursday")[1:] == (7, 3)
+    try:
+        spring.resolve_week_day(40, 0)
+        assert False, "week outside the term accepted"
+    except ValueError:
+        pass
+    assert terms.parse_term("Fall 2026").is_holiday(date(2026, 11, 26))
+    print("  [OK] Week numbers, week references and holidays")
+
+    header = "PSYCH 101 - Spring 2025\nWeek | Date | Topic\nWeek 1 | Jan 13 | Foundations\nWeek 3 | Jan 27 | Brain"
+    inferred = terms.infer_term(header)
+    assert inferred.name == "Spring 2025" and inferred.week_start(1) == date(2025, 1, 13)
+    assert terms.infer_term("Paper due September 20, 2024\nExam October 18, 2024").name == "Fall 2024"
+    assert terms.infer_term("Homework 1 due Oct 3") is None
+    assert terms.infer_term_from_dates([date(2025, 2, 3), date(2025, 3, 4)]).name == "Spring 2025"
+    assert terms.infer_term_from_dates([]) is None
+    assert terms.resolve_term("Fall 2026", header).name == "Fall 2026"
+    print("  [OK] Term inferred from the header, dated weeks and full dates")
+
+    assert parser.normalize_date("03-04", spring) == date(2027, 3, 4)
+    assert parser.normalize_date("Week 2 Friday", spring) == date(2027, 1, 15)
+    assignments, confidence = parser.extract_assignments_rule_based(
+        "Homework 1 due Feb 3\nLab 2 due Week 7 Thursday", "BIO 180", spring
+    )
+    assert [(a.name, a.due_date) for a in assignments] == [
+        ("Homework 1", date(2027, 2, 3)), ("Lab 2", date(2027, 2, 18)),
+    ]
+    assert confidence == 1.0
+    print("  [OK] normalize_date and the rule-based extractor use the term")
+
+    def responder(system_prompt, user_prompt):
+        if system_prompt == parser.REPAIR_SYSTEM_PROMPT:
+            return "[]"
+        return json.dumps([
+            {"name": "Essay", "course": "X", "due_date": "03-04", "assignment_type": "other"},
+            {"name": "Quiz 1", "course": "X", "due_date": "Week 2 Friday", "assignment_type": "quiz"},
+        ])
+
+    original = (parser.get_result_cache(), parser.RULE_FAST_PATH_ENABLED)
+    llm.set_transport(FakeLLMTransport(responder), api_key="test-key")
+    parser.set_result_cache(None)
+    parser.RULE_FAST_PATH_ENABLED = False
+    try:
+        assignments = parser.parse_syllabus("ENGL 111 Spring 2027\nEssay and quiz dates below", "ENGL 111")
+        without_term = parser.parse_syllabus("Essay and quiz dates below", "ENGL 111")
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original[0])
+        parser.RULE_FAST_PATH_ENABLED = original[1]
+    assert sorted(a.due_date for a in assignments) == [date(2027, 1, 15), date(2027, 3, 4)]
+    assert [a.name for a in without_term] == ["Essay"]
+    print("  [OK] LLM dates resolved in the inferred term")
+
+    def repair_responder(system_prompt, user_prompt):
+        if system_prompt == parser.REPAIR_SYSTEM_PROMPT:
+            return json.dumps([{"name": "Quiz 1", "course": "X", "due_date": "Week 2 Friday", "assignment_type": "quiz"}])
+        return json.dumps([
+            {"name": "Essay", "course": "X", "due_date": "03-04", "assignment_type": "other"},
+            {"name": "Quiz 1", "course": "X", "due_date": "the second Friday", "assignment_type": "quiz"},
+        ])
+
+    fall = terms.parse_term("Fall 2026")
+    llm.set_transport(FakeLLMTransport(repair_responder), api_key="test-key")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            parser.set_result_cache(DiskCache(os.path.join(tmp, "results.sqlite3")))
+            for term in (spring, fall, spring):
+                result = parser.extract_chunk("Essay and quiz dates below", "ENGL 111", term)
+                assert result.complete
+                dates = sorted(a.due_date for a in result.assignments)
+                assert dates == sorted([parser.normalize_date("03-04", term), term.week_start(2) + timedelta(days=4)])
+    finally:
+        llm.set_transport(None)
+        parser.set_result_cache(original[0])
+    print("  [OK] Repaired results cached per term")
+
+    weeks = compute_weekly_workload(assignments, spring)
+    assert [(w.week_number, w.week_start_date) for w in weeks] == [(2, date(2027, 1, 11)), (9, date(2027, 3, 1))]
+    plain = compute_weekly_workload(assignments)
+    assert [w.week_start_date for w in plain] == [w.week_start_date for w in weeks]
+    assert all(w.week_number is None for w in plain)
+    print("  [OK] Weekly workload numbered by term week")
+
+    print("[OK] All term calendar tests passed!\n")
+
+
 if __name__ == "__main__":
     print("=" * 50)
     print("Running Backend Tests")
@@ -230,6 +1619,24 @@ if __name__ == "__main__":
         test_workload_aggregation()
         test_parser_validation()
         test_integration()
+        test_result_cache()
+        test_llm_client()
+        test_rule_based_extraction()
+        test_chunked_extraction()
+        test_streaming_parser()
+        test_pdf_extraction()
+        test_batch_workload()
+        test_workload_query()
+        test_single_flight()
+        test_rate_limiting()
+        test_metrics()
+        test_incremental_workload()
+        test_course_store()
+        test_prompt_filter()
+        test_packed_parsing()
+        test_prompt_caching()
+        test_response_salvage()
+        test_term_calendar()
 
         print("=" * 50)
         print("[OK] ALL TESTS PASSED!")
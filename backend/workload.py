@@ -1,6 +1,9 @@
 from datetime import date, timedelta
 from collections import defaultdict
-from backend.models import Assignment, AssignmentType, WeeklyWorkload
+from typing import Optional
+from backend.metrics import timed
+from backend.models import Assignment, AssignmentType, WeeklyWorkloadRecord
+from backend.terms import TermCalendar
 
 
 TYPE_WEIGHTS = {
@@ -26,29 +29,51 @@ def get_week_start(d: date) -> date:
     return d - timedelta(days=days_since_monday)
 
 
-def compute_weekly_workload(assignments: list[Assignment]) -> list[WeeklyWorkload]:
+def compute_weekly_workload(
+    assignments: list[Assignment],
+    term: Optional[TermCalendar] = None,
+) -> list[WeeklyWorkloadRecord]:
     """
     Aggregate assignments into weekly workload summaries.
 
+    With a term, assignments are grouped by the term calendar's week
+    number (integer arithmetic on the date's ordinal) and each summary
+    carries its week_number. Term weeks start on Monday, so the weeks are
+    the same as without a term.
+
     Args:
-        assignments: List of Assignment objects
+        assignments: List of Assignment or AssignmentRecord objects
+        term: Calendar of the term the assignments belong to
 
     Returns:
-        List of WeeklyWorkload objects sorted chronologically
+        List of WeeklyWorkloadRecord objects sorted chronologically
     """
     if not assignments:
         return []
 
+    with timed("workload"):
+        return _compute_weekly_workload(assignments, term)
+
+
+def _compute_weekly_workload(
+    assignments: list[Assignment],
+    term: Optional[TermCalendar] = None,
+) -> list[WeeklyWorkloadRecord]:
     weeks = defaultdict(list)
 
-    for assignment in assignments:
-        week_start = get_week_start(assignment.due_date)
-        weeks[week_start].append(assignment)
+    if term is None:
+        for assignment in assignments:
+            weeks[get_week_start(assignment.due_date)].append(assignment)
+    else:
+        week_number = term.week_number
+        for assignment in assignments:
+            weeks[week_number(assignment.due_date)].append(assignment)
 
     workloads = []
 
-    for week_start in sorted(weeks.keys()):
-        week_assignments = weeks[week_start]
+    for week in sorted(weeks.keys()):
+        week_assignments = weeks[week]
+        week_start = week if term is None else term.week_start(week)
         week_end = week_start + timedelta(days=6)
 
         assignment_count = len(week_assignments)
@@ -63,13 +88,201 @@ def compute_weekly_workload(assignments: list[Assignment]) -> list[WeeklyWorkloa
             type_name = assignment.assignment_type.value
             assignments_by_type[type_name] += 1
 
-        workload = WeeklyWorkload(
+        workload = WeeklyWorkloadRecord(
             week_start_date=week_start,
             week_end_date=week_end,
             assignment_count=assignment_count,
             intensity_score=intensity_score,
-            assignments_by_type=dict(assignments_by_type)
+            assignments_by_type=dict(assignments_by_type),
+            week_number=None if term is None else week,
         )
         workloads.append(workload)
 
     return workloads
+
+
+class IncrementalWorkload:
+    """
+    Weekly workload that is kept up to date as assignments change.
+
+    Holds per-week type counts so that adding, removing or updating an
+    assignment touches only the affected weeks. Every change returns the
+    new summaries of the weeks it touched, keyed by week start date; a
+    week that no longer has assignments maps to None.
+
+    With a term, assignments are bucketed by the term calendar's week
+    number and summaries carry it, as in compute_weekly_workload.
+
+    Args:
+        assignments: Initial assignments
+        term: Calendar of the term the assignments belong to
+    """
+
+    def __init__(self, assignments: list[Assignment] = (), term: Optional[TermCalendar] = None):
+        self.term = term
+        self._weeks: dict[date, dict[AssignmentType, int]] = {}
+        self._assignments: dict[tuple, int] = defaultdict(int)
+        self._size = 0
+        self.add_many(assignments)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, assignment: Assignment) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        """
+        Add one assignment.
+
+        Args:
+            assignment: Assignment to add
+
+        Returns:
+            Summary of the changed week
+        """
+        return self.add_many([assignment])
+
+    def remove(self, assignment: Assignment) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        """
+        Remove one assignment.
+
+        Args:
+            assignment: Assignment to remove (matched by value)
+
+        Returns:
+            Summary of the changed week, or None if it is now empty
+
+        Raises:
+            ValueError: If the assignment is not present
+        """
+        return self.remove_many([assignment])
+
+    def update(self, old: Assignment, new: Assignment) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        """
+        Replace one assignment with another, e.g. after a due date changes.
+
+        Args:
+            old: Assignment to remove
+            new: Assignment to add in its place
+
+        Returns:
+            Summaries of the changed weeks
+
+        Raises:
+            ValueError: If old is not present
+        """
+        return self._summaries({self._remove_one(old), self._add_one(new)})
+
+    def add_many(self, assignments: list[Assignment]) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        """
+        Add several assignments, e.g. when a course is toggled on.
+
+        Args:
+            assignments: Assignments to add
+
+        Returns:
+            Summaries of the changed weeks
+        """
+        changed = set()
+        for assignment in assignments:
+            changed.add(self._add_one(assignment))
+        return self._summaries(changed)
+
+    def remove_many(self, assignments: list[Assignment]) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        """
+        Remove several assignments, e.g. when a course is toggled off.
+
+        Args:
+            assignments: Assignments to remove (matched by value)
+
+        Returns:
+            Summaries of the changed weeks
+
+        Raises:
+            ValueError: If an assignment is not present; earlier ones in
+                the list have already been removed
+        """
+        changed = set()
+        for assignment in assignments:
+            changed.add(self._remove_one(assignment))
+        return self._summaries(changed)
+
+    def week(self, week_start: date) -> Optional[WeeklyWorkloadRecord]:
+        """
+        Get the summary of one week.
+
+        Args:
+            week_start: Monday of the week
+
+        Returns:
+            WeeklyWorkloadRecord, or None if the week has no assignments
+        """
+        counts = self._weeks.get(week_start)
+        return self._week_summary(week_start, counts) if counts else None
+
+    def workloads(self) -> list[WeeklyWorkloadRecord]:
+        """
+        Get every week's summary, as compute_weekly_workload would return it.
+
+        Returns:
+            List of WeeklyWorkloadRecord objects sorted chronologically
+        """
+        return [self._week_summary(week_start, self._weeks[week_start]) for week_start in sorted(self._weeks)]
+
+    def _week_start(self, due_date: date) -> date:
+        if self.term is None:
+            return get_week_start(due_date)
+        return self.term.week_start(self.term.week_number(due_date))
+
+    def _add_one(self, assignment: Assignment) -> date:
+        week_start = self._week_start(assignment.due_date)
+        counts = self._weeks.setdefault(week_start, {})
+        counts[assignment.assignment_type] = counts.get(assignment.assignment_type, 0) + 1
+        self._assignments[_assignment_key(assignment)] += 1
+        self._size += 1
+        return week_start
+
+    def _remove_one(self, assignment: Assignment) -> date:
+        key = _assignment_key(assignment)
+        if not self._assignments.get(key):
+            raise ValueError(f"Assignment not in workload: {assignment.name}")
+        self._assignments[key] -= 1
+        if not self._assignments[key]:
+            del self._assignments[key]
+        self._size -= 1
+
+        week_start = self._week_start(assignment.due_date)
+        counts = self._weeks[week_start]
+        counts[assignment.assignment_type] -= 1
+        if not counts[assignment.assignment_type]:
+            del counts[assignment.assignment_type]
+        if not counts:
+            del self._weeks[week_start]
+        return week_start
+
+    def _summaries(self, week_starts: set[date]) -> dict[date, Optional[WeeklyWorkloadRecord]]:
+        return {week_start: self.week(week_start) for week_start in sorted(week_starts)}
+
+    def _week_summary(self, week_start: date, counts: dict[AssignmentType, int]) -> WeeklyWorkloadRecord:
+        week_number = None if self.term is None else self.term.week_number(week_start)
+        return _week_summary(week_start, counts, week_number)
+
+
+def _assignment_key(assignment: Assignment) -> tuple:
+    return (assignment.name, assignment.course, assignment.due_date, assignment.assignment_type)
+
+
+def _week_summary(
+    week_start: date,
+    counts: dict[AssignmentType, int],
+    week_number: Optional[int] = None,
+) -> WeeklyWorkloadRecord:
+    # Types are ordered as in AssignmentType so the result does not depend
+    # on the order assignments were added in
+    ordered = [(t, counts[t]) for t in AssignmentType if t in counts]
+    return WeeklyWorkloadRecord(
+        week_start_date=week_start,
+        week_end_date=week_start + timedelta(days=6),
+        assignment_count=sum(n for _, n in ordered),
+        intensity_score=sum(TYPE_WEIGHTS[t] * n for t, n in ordered),
+        assignments_by_type={t.value: n for t, n in ordered},
+        week_number=week_number,
+    )
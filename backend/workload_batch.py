@@ -0,0 +1,243 @@
+"""
+Vectorized weekly workload aggregation for large assignment sets.
+
+compute_weekly_workload in workload.py walks Assignment objects one by one,
+which is fine for a single student's plan but slow for department-wide
+analytics. This module works on columnar NumPy arrays instead:
+
+    due_ordinals  int64 array of date.toordinal() values
+    type_codes    int8 array of indexes into TYPE_ORDER
+
+and produces results identical to compute_weekly_workload.
+"""
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+from backend.models import Assignment, AssignmentType, WeeklyWorkloadRecord
+from backend.workload import TYPE_WEIGHTS
+
+
+TYPE_ORDER = list(AssignmentType)
+TYPE_CODES = {assignment_type: code for code, assignment_type in enumerate(TYPE_ORDER)}
+TYPE_VALUES = [assignment_type.value for assignment_type in TYPE_ORDER]
+TYPE_WEIGHT_ARRAY = np.array([TYPE_WEIGHTS[t] for t in TYPE_ORDER], dtype=np.float64)
+
+# Enrollment sets summed per matrix product in compute_cohort_workloads
+ENROLLMENT_BLOCK_SIZE = 1024
+
+
+class WeeklyColumns(NamedTuple):
+    """
+    Weekly workload in columnar form, one row per week with assignments.
+    """
+    week_start_ordinals: np.ndarray    # int64, ordinal of each week's Monday
+    assignment_counts: np.ndarray      # int64
+    intensity_scores: np.ndarray       # float64
+    counts_by_type: np.ndarray         # int64, shape (weeks, len(TYPE_ORDER))
+
+
+def assignments_to_columns(assignments: list[Assignment]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert Assignment objects to columnar arrays.
+
+    Args:
+        assignments: List of Assignment or AssignmentRecord objects
+
+    Returns:
+        (due_ordinals, type_codes) arrays
+    """
+    count = len(assignments)
+    due_ordinals = np.fromiter(
+        (a.due_date.toordinal() for a in assignments), dtype=np.int64, count=count
+    )
+    type_codes = np.fromiter(
+        (TYPE_CODES[a.assignment_type] for a in assignments), dtype=np.int8, count=count
+    )
+    return due_ordinals, type_codes
+
+
+def week_start_ordinals(due_ordinals: np.ndarray) -> np.ndarray:
+    """
+    Map date ordinals to the ordinal of the Monday of their week.
+
+    Ordinal 1 (0001-01-01) is a Monday, so (ordinal - 1) % 7 is the weekday.
+
+    Args:
+        due_ordinals: int64 array of date ordinals
+
+    Returns:
+        int64 array of week-start ordinals
+    """
+    return due_ordinals - (due_ordinals - 1) % 7
+
+
+def compute_weekly_columns(due_ordinals: np.ndarray, type_codes: np.ndarray) -> WeeklyColumns:
+    """
+    Aggregate columnar assignments into weekly workload columns.
+
+    Args:
+        due_ordinals: int64 array of date ordinals
+        type_codes: int array of indexes into TYPE_ORDER
+
+    Returns:
+        WeeklyColumns sorted by week
+    """
+    type_count = len(TYPE_ORDER)
+    week_starts, week_index = np.unique(week_start_ordinals(due_ordinals), return_inverse=True)
+    week_count = len(week_starts)
+    type_codes = type_codes.astype(np.int64, copy=False)
+
+    assignment_counts = np.bincount(week_index, minlength=week_count)
+    intensity_scores = np.bincount(
+        week_index, weights=TYPE_WEIGHT_ARRAY[type_codes], minlength=week_count
+    )
+    counts_by_type = np.bincount(
+        week_index * type_count + type_codes, minlength=week_count * type_count
+    ).reshape(week_count, type_count)
+
+    return WeeklyColumns(week_starts, assignment_counts, intensity_scores, counts_by_type)
+
+
+def columns_to_weekly_workloads(columns: WeeklyColumns) -> list[WeeklyWorkloadRecord]:
+    """
+    Build WeeklyWorkloadRecord objects from weekly columns.
+
+    Args:
+        columns: Output of compute_weekly_columns
+
+    Returns:
+        List of WeeklyWorkloadRecord objects sorted chronologically
+    """
+    workloads = []
+    rows = zip(
+        columns.week_start_ordinals.tolist(),
+        columns.assignment_counts.tolist(),
+        columns.intensity_scores.tolist(),
+        columns.counts_by_type.tolist(),
+    )
+    for week_start, assignment_count, intensity_score, type_counts in rows:
+        workloads.append(WeeklyWorkloadRecord(
+            week_start_date=_week_dates(week_start)[0],
+            week_end_date=_week_dates(week_start)[1],
+            assignment_count=assignment_count,
+            intensity_score=intensity_score,
+            assignments_by_type={
+                TYPE_VALUES[code]: count
+                for code, count in enumerate(type_counts)
+                if count
+            }
+        ))
+    return workloads
+
+
+@lru_cache(maxsize=4096)
+def _week_dates(week_start: int) -> tuple[date, date]:
+    return date.fromordinal(week_start), date.fromordinal(week_start + 6)
+
+
+def compute_weekly_workload_batch(assignments: list[Assignment]) -> list[WeeklyWorkloadRecord]:
+    """
+    Vectorized drop-in replacement for compute_weekly_workload.
+
+    Args:
+        assignments: List of Assignment or AssignmentRecord objects
+
+    Returns:
+        List of WeeklyWorkloadRecord objects sorted chronologically
+    """
+    if not assignments:
+        return []
+    due_ordinals, type_codes = assignments_to_columns(assignments)
+    return columns_to_weekly_workloads(compute_weekly_columns(due_ordinals, type_codes))
+
+
+def compute_cohort_workloads(
+    course_assignments: dict[str, list[Assignment]],
+    enrollments: dict[str, list[str]],
+) -> dict[str, list[WeeklyWorkloadRecord]]:
+    """
+    Compute weekly workloads for many students in one pass.
+
+    Each course is aggregated once onto a shared week axis; a student's
+    workload is the sum of their courses' rows. Students with the same set
+    of courses share one computed result.
+
+    Args:
+        course_assignments: Extracted assignments keyed by course code
+        enrollments: Course codes keyed by student ID
+
+    Returns:
+        Weekly workloads keyed by student ID
+
+    Raises:
+        ValueError: If a student is enrolled in a course that is not provided
+    """
+    course_codes = list(course_assignments)
+    course_index = {code: i for i, code in enumerate(course_codes)}
+
+    unknown = {
+        code for courses in enrollments.values() for code in courses
+        if code not in course_index
+    }
+    if unknown:
+        raise ValueError(f"Unknown course codes: {', '.join(sorted(unknown))}")
+
+    all_assignments = [a for code in course_codes for a in course_assignments[code]]
+    if not all_assignments:
+        return {student_id: [] for student_id in enrollments}
+
+    # Aggregate every course onto a shared week axis
+    lengths = [len(course_assignments[code]) for code in course_codes]
+    due_ordinals, type_codes = assignments_to_columns(all_assignments)
+    course_of = np.repeat(np.arange(len(course_codes)), lengths)
+
+    type_count = len(TYPE_ORDER)
+    week_starts, week_index = np.unique(week_start_ordinals(due_ordinals), return_inverse=True)
+    week_count = len(week_starts)
+    cell = course_of * week_count + week_index
+    cells = len(course_codes) * week_count
+    type_codes = type_codes.astype(np.int64, copy=False)
+
+    course_counts = np.bincount(cell, minlength=cells).reshape(-1, week_count)
+    course_intensity = np.bincount(
+        cell, weights=TYPE_WEIGHT_ARRAY[type_codes], minlength=cells
+    ).reshape(-1, week_count)
+    course_by_type = np.bincount(
+        cell * type_count + type_codes, minlength=cells * type_count
+    ).reshape(-1, week_count, type_count)
+
+    # Sum course rows once per distinct enrollment set, as a matrix product
+    # of a (sets x courses) indicator matrix with the per-course tables
+    set_index: dict[frozenset, int] = {}
+    student_sets = {}
+    for student_id, courses in enrollments.items():
+        key = frozenset(courses)
+        student_sets[student_id] = set_index.setdefault(key, len(set_index))
+
+    course_by_type = course_by_type.reshape(len(course_codes), -1)
+    set_results: list[list[WeeklyWorkloadRecord]] = []
+    sets = list(set_index)
+    for block_start in range(0, len(sets), ENROLLMENT_BLOCK_SIZE):
+        block = sets[block_start:block_start + ENROLLMENT_BLOCK_SIZE]
+        indicator = np.zeros((len(block), len(course_codes)), dtype=np.int64)
+        for row, key in enumerate(block):
+            indicator[row, [course_index[code] for code in key]] = 1
+
+        counts = indicator @ course_counts
+        intensity = indicator.astype(np.float64) @ course_intensity
+        by_type = (indicator @ course_by_type).reshape(len(block), week_count, type_count)
+
+        for row in range(len(block)):
+            busy = np.nonzero(counts[row])[0]
+            set_results.append(columns_to_weekly_workloads(WeeklyColumns(
+                week_starts[busy],
+                counts[row, busy],
+                intensity[row, busy],
+                by_type[row, busy],
+            )))
+
+    return {
+        student_id: set_results[index]
+        for student_id, index in student_sets.items()
+    }
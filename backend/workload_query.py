@@ -0,0 +1,386 @@
+"""
+Precomputed workload aggregates for peak-week, window and heatmap queries.
+
+compute_weekly_workload returns a flat list of busy weeks, so finding the
+heaviest weeks, the worst stretch of N weeks or the load between two dates
+means scanning that list again for every question. WorkloadIndex builds
+prefix sums over a contiguous, Monday-aligned day axis once:
+
+    cum_counts[d]       assignments due before day d
+    cum_intensity[d]    intensity due before day d
+    cum_by_type[d, t]   assignments of TYPE_ORDER[t] due before day d
+    cum_by_course[d, c] intensity of course c due before day d
+
+after which the total of any date range is a subtraction of two rows, and a
+week's total is the range of its 7 days. Intensities are sums of the
+TYPE_WEIGHTS (multiples of 0.5), which float64 adds exactly, so the
+subtractions give the same numbers as summing directly.
+
+An index over a cohort weights each course by the number of students
+enrolled in it, so counts and intensities are totals over students
+(student-assignments), the department-wide load.
+
+The day axis holds a row per day for every type and course, so assignments
+may span at most MAX_SPAN_DAYS days.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+import numpy as np
+from backend.models import Assignment, WeeklyWorkloadRecord
+from backend.terms import TermCalendar
+from backend.workload_batch import TYPE_ORDER, TYPE_VALUES, TYPE_WEIGHT_ARRAY, assignments_to_columns
+
+
+# Longest span from the first due date to the last an index accepts (two
+# years by default); every day in it costs a row of prefix sums
+MAX_SPAN_DAYS = int(os.environ.get("SYLLABUS_WORKLOAD_MAX_SPAN_DAYS", "731"))
+
+# The last week of the day axis may run past date.max
+_MAX_ORDINAL = date.max.toordinal()
+
+
+class WorkloadSpanError(ValueError):
+    """Raised when assignments span more than MAX_SPAN_DAYS days."""
+
+
+@dataclass(slots=True)
+class WorkloadSummary:
+    """
+    Workload due in a date range.
+
+    Args:
+        start_date: First day of the range
+        end_date: Last day of the range
+        assignment_count: Assignments due in the range
+        intensity_score: Their total intensity
+        assignments_by_type: Assignment counts keyed by type
+        intensity_by_course: Intensity keyed by course code, largest first
+    """
+    start_date: date
+    end_date: date
+    assignment_count: int
+    intensity_score: float
+    assignments_by_type: dict[str, int] = field(default_factory=dict)
+    intensity_by_course: dict[str, float] = field(default_factory=dict)
+
+    def to_json(self) -> dict:
+        """
+        JSON-ready dict.
+        """
+        return {
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "assignment_count": self.assignment_count,
+            "intensity_score": self.intensity_score,
+            "assignments_by_type": self.assignments_by_type,
+            "intensity_by_course": self.intensity_by_course,
+        }
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    # Cumulative sums along the day axis with a leading row of zeros, so the
+    # total of days [i, j) is prefix[j] - prefix[i]
+    prefix = np.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+    np.cumsum(values, axis=0, out=prefix[1:])
+    return prefix
+
+
+class WorkloadIndex:
+    """
+    Workload of a plan or cohort, indexed for range queries.
+
+    Building the index is O(assignments + days x courses). Afterwards a
+    range summary costs O(types + courses), a single week O(types), the
+    heaviest K weeks O(K), and the heaviest N-week window O(1) after one
+    O(weeks) pass per window length.
+
+    Args:
+        assignments: Assignments to index
+        weights: Number of times each assignment counts (e.g. students
+            enrolled in its course); 1 each if not given
+        term: Calendar of the term, to number the weeks
+
+    Raises:
+        WorkloadSpanError: If the due dates span more than MAX_SPAN_DAYS days
+    """
+
+    def __init__(
+        self,
+        assignments: list[Assignment],
+        weights: Optional[list[int]] = None,
+        term: Optional[TermCalendar] = None,
+    ):
+        self.term = term
+        self.courses: list[str] = list(dict.fromkeys(a.course for a in assignments))
+        course_index = {code: i for i, code in enumerate(self.courses)}
+        type_count = len(TYPE_ORDER)
+        course_count = len(self.courses)
+
+        due_ordinals, type_codes = assignments_to_columns(assignments)
+        type_codes = type_codes.astype(np.int64, copy=False)
+        if weights is None:
+            weight = np.ones(len(assignments), dtype=np.float64)
+        else:
+            weight = np.asarray(weights, dtype=np.float64)
+        course_codes = np.fromiter(
+            (course_index[a.course] for a in assignments), dtype=np.int64, count=len(assignments)
+        )
+
+        if len(assignments):
+            # Monday of the first week to Sunday of the last one
+            first = int(due_ordinals.min())
+            last = int(due_ordinals.max())
+            if last - first + 1 > MAX_SPAN_DAYS:
+                raise WorkloadSpanError(
+                    f"Due dates span {last - first + 1} days"
+                    f" ({date.fromordinal(first)} to {date.fromordinal(last)}), more than {MAX_SPAN_DAYS}"
+                )
+            first -= (first - 1) % 7
+            days = (last - first) // 7 * 7 + 7
+        else:
+            first, days = date(1, 1, 1).toordinal(), 0
+        self._first = first
+        self.days = days
+        day = due_ordinals - first
+        intensity = weight * TYPE_WEIGHT_ARRAY[type_codes]
+
+        # Weights are whole numbers, so the float bincounts convert exactly
+        counts = np.bincount(day, weights=weight, minlength=days).astype(np.int64)
+        by_type = np.bincount(
+            day * type_count + type_codes, weights=weight, minlength=days * type_count
+        ).astype(np.int64).reshape(days, type_count)
+        self._day_intensity = np.bincount(day, weights=intensity, minlength=days)
+        by_course = np.bincount(
+            day * course_count + course_codes, weights=intensity, minlength=days * course_count
+        ).reshape(days, course_count)
+
+        self._cum_counts = _prefix(counts)
+        self._cum_intensity = _prefix(self._day_intensity)
+        self._cum_by_type = _prefix(by_type)
+        self._cum_by_course = _prefix(by_course)
+
+        # The day axis starts on a Monday and is a whole number of weeks
+        # long, so every 7th prefix row is a week boundary
+        self._week_counts = np.diff(self._cum_counts[::7])
+        self._week_intensity = np.diff(self._cum_intensity[::7])
+        # Heaviest first; among equal weeks the earlier one first
+        week_positions = np.arange(len(self._week_intensity))
+        order = np.lexsort((week_positions, -self._week_intensity))
+        self._heaviest = order[self._week_counts[order] > 0]
+        # Rolling sums, index of the heaviest window and its summary, per
+        # window length
+        self._windows: dict[int, tuple[np.ndarray, int]] = {}
+        self._peaks: dict[int, WorkloadSummary] = {}
+
+    @classmethod
+    def from_cohort(
+        cls,
+        course_assignments: dict[str, list[Assignment]],
+        enrollments: dict[str, list[str]],
+        term: Optional[TermCalendar] = None,
+    ) -> "WorkloadIndex":
+        """
+        Index the combined workload of many students.
+
+        Each course's assignments are added once, weighted by the number of
+        students enrolled in it.
+
+        Args:
+            course_assignments: Extracted assignments keyed by course code
+            enrollments: Course codes keyed by student ID
+            term: Calendar of the term, to number the weeks
+
+        Returns:
+            WorkloadIndex of the whole cohort
+
+        Raises:
+            ValueError: If a student is enrolled in a course that is not provided
+            WorkloadSpanError: If the due dates span more than MAX_SPAN_DAYS days
+        """
+        students = dict.fromkeys(course_assignments, 0)
+        unknown = set()
+        for courses in enrollments.values():
+            for code in set(courses):
+                if code in students:
+                    students[code] += 1
+                else:
+                    unknown.add(code)
+        if unknown:
+            raise ValueError(f"Unknown course codes: {', '.join(sorted(unknown))}")
+
+        assignments = []
+        weights = []
+        for code, count in students.items():
+            if count:
+                assignments.extend(course_assignments[code])
+                weights.extend([count] * len(course_assignments[code]))
+        return cls(assignments, weights, term)
+
+    @property
+    def start_date(self) -> Optional[date]:
+        """Monday of the first week with assignments, or None if there are none."""
+        return date.fromordinal(self._first) if self.days else None
+
+    @property
+    def weeks(self) -> int:
+        """Number of weeks from the first week with assignments to the last."""
+        return self.days // 7
+
+    def summary(self, start: Optional[date] = None, end: Optional[date] = None) -> Optional[WorkloadSummary]:
+        """
+        Total workload due from start to end (both inclusive).
+
+        Args:
+            start: First day; the start of the index if not given
+            end: Last day; the end of the index if not given
+
+        Returns:
+            WorkloadSummary of the range, or None if the index is empty and
+            the range is open
+        """
+        if not self.days and (start is None or end is None):
+            return None
+        first = self._first if start is None else start.toordinal()
+        last = min(self._first + self.days - 1, _MAX_ORDINAL) if end is None else end.toordinal()
+        i = min(max(first - self._first, 0), self.days)
+        j = min(max(last - self._first + 1, i), self.days)
+
+        type_counts = (self._cum_by_type[j] - self._cum_by_type[i]).tolist()
+        course_intensity = self._cum_by_course[j] - self._cum_by_course[i]
+        busy = np.flatnonzero(course_intensity)
+        # Largest first; courses with equal intensity in index order
+        busy = busy[np.lexsort((busy, -course_intensity[busy]))]
+        courses = self.courses
+        return WorkloadSummary(
+            start_date=date.fromordinal(first),
+            end_date=date.fromordinal(last),
+            assignment_count=int(self._cum_counts[j] - self._cum_counts[i]),
+            intensity_score=float(self._cum_intensity[j] - self._cum_intensity[i]),
+            assignments_by_type={TYPE_VALUES[code]: n for code, n in enumerate(type_counts) if n},
+            intensity_by_course=dict(zip([courses[p] for p in busy.tolist()], course_intensity[busy].tolist())),
+        )
+
+    def week(self, week_start: date) -> Optional[WeeklyWorkloadRecord]:
+        """
+        Get the summary of one week.
+
+        Args:
+            week_start: Monday of the week
+
+        Returns:
+            WeeklyWorkloadRecord, or None if the week has no assignments
+        """
+        position = (week_start.toordinal() - self._first) // 7
+        if not 0 <= position < self.weeks or not self._week_counts[position]:
+            return None
+        return self._week_record(position)
+
+    def weekly_workload(self) -> list[WeeklyWorkloadRecord]:
+        """
+        Get every busy week's summary, as compute_weekly_workload would.
+
+        Returns:
+            List of WeeklyWorkloadRecord objects sorted chronologically
+        """
+        return [self._week_record(position) for position in np.flatnonzero(self._week_counts).tolist()]
+
+    def top_weeks(self, k: int) -> list[WeeklyWorkloadRecord]:
+        """
+        Get the k weeks with the highest intensity, heaviest first.
+
+        Args:
+            k: Number of weeks
+
+        Returns:
+            Up to k WeeklyWorkloadRecord objects; weeks without assignments
+            are never included
+        """
+        return [self._week_record(position) for position in self._heaviest[:max(k, 0)].tolist()]
+
+    def rolling_intensity(self, weeks: int) -> np.ndarray:
+        """
+        Get the intensity of every window of consecutive weeks.
+
+        Args:
+            weeks: Window length in weeks
+
+        Returns:
+            float64 array; element i is the total of the window starting
+            at week i of the index (start_date + 7 * i days)
+
+        Raises:
+            ValueError: If weeks is less than 1
+        """
+        return self._window(weeks)[0]
+
+    def peak_window(self, weeks: int) -> Optional[WorkloadSummary]:
+        """
+        Find the window of consecutive weeks with the highest intensity.
+
+        Args:
+            weeks: Window length in weeks
+
+        Returns:
+            WorkloadSummary of the earliest heaviest window (shared between
+            calls, do not modify it), or None if the index is empty
+
+        Raises:
+            ValueError: If weeks is less than 1
+        """
+        if not self.days:
+            return None
+        peak = self._peaks.get(weeks)
+        if peak is None:
+            _, best = self._window(weeks)
+            first = self._first + 7 * best
+            end = date.fromordinal(min(first + 7 * weeks - 1, _MAX_ORDINAL))
+            peak = self._peaks[weeks] = self.summary(date.fromordinal(first), end)
+        return peak
+
+    def heatmap(self, start: Optional[date] = None, end: Optional[date] = None) -> tuple[Optional[date], list[list[float]]]:
+        """
+        Get the daily intensity of the weeks from start to end.
+
+        Args:
+            start: A day in the first week; the start of the index if not given
+            end: A day in the last week; the end of the index if not given
+
+        Returns:
+            (Monday of the first row, one row of 7 daily intensities per
+            week, Monday first); (None, []) if the range holds no weeks
+        """
+        first = 0 if start is None else (start.toordinal() - self._first) // 7
+        last = self.weeks - 1 if end is None else (end.toordinal() - self._first) // 7
+        first, last = max(first, 0), min(last, self.weeks - 1)
+        if first > last:
+            return None, []
+        days = self._day_intensity[7 * first:7 * (last + 1)]
+        return date.fromordinal(self._first + 7 * first), days.reshape(-1, 7).tolist()
+
+    def _window(self, weeks: int) -> tuple[np.ndarray, int]:
+        if weeks < 1:
+            raise ValueError(f"window must be at least 1 week: {weeks}")
+        window = self._windows.get(weeks)
+        if window is None:
+            boundaries = self._cum_intensity[::7]
+            # A window longer than the index covers all of it
+            span = min(weeks, self.weeks)
+            sums = boundaries[span:] - boundaries[:len(boundaries) - span] if span else boundaries[:0]
+            window = (sums, int(np.argmax(sums)) if len(sums) else 0)
+            self._windows[weeks] = window
+        return window
+
+    def _week_record(self, position: int) -> WeeklyWorkloadRecord:
+        i, j = 7 * position, 7 * position + 7
+        week_start = date.fromordinal(self._first + i)
+        type_counts = (self._cum_by_type[j] - self._cum_by_type[i]).tolist()
+        return WeeklyWorkloadRecord(
+            week_start_date=week_start,
+            week_end_date=date.fromordinal(min(self._first + i + 6, _MAX_ORDINAL)),
+            assignment_count=int(self._week_counts[position]),
+            intensity_score=float(self._week_intensity[position]),
+            assignments_by_type={TYPE_VALUES[code]: n for code, n in enumerate(type_counts) if n},
+            week_number=None if self.term is None else self.term.week_number(week_start),
+        )